@@ -0,0 +1,240 @@
+"""
+승인 제어 모듈
+세션별 공정 분배(가중 공정 큐잉)로 AI 어시스턴트와 검색 엔진 용량을 나눠 쓰는 스케줄러 제공
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from config import env_float, env_int
+
+# 우선순위 (처리 순서는 가중치를 반영한 가상 종료 태그로만 결정)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# 우선순위별 가중치 (가중 공정 큐잉에서 사용 용량 대비 진행 속도)
+_PRIORITY_WEIGHTS = {
+    PRIORITY_INTERACTIVE: 4.0,
+    PRIORITY_BACKGROUND: 1.0,
+}
+
+
+class SchedulerBusyError(Exception):
+    """용량이 부족하여 요청을 즉시 거절할 때 발생"""
+
+
+class _Ticket:
+    """대기 중인 요청"""
+
+    def __init__(self, session_id: str, priority: int, cost: float, finish_tag: float, sequence: int):
+        self.session_id = session_id
+        self.priority = priority
+        self.cost = cost
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+        self.granted = False
+
+    def sort_key(self):
+        # 우선순위를 먼저 비교하면 백그라운드 작업이 굶을 수 있으므로 가중 종료 태그만 사용
+        return (self.finish_tag, self.sequence)
+
+
+class FairShareScheduler:
+    """세션별/우선순위별 대기열과 가중 공정 큐잉 기반 승인 제어기"""
+
+    def __init__(self, capacity: int = 8, per_session_limit: int = 2,
+                 max_queue_per_session: int = 4, max_wait_seconds: float = 20.0):
+        """
+        스케줄러 초기화
+
+        Args:
+            capacity: 동시에 실행할 수 있는 전체 작업 수 (공유 용량)
+            per_session_limit: 세션당 동시 실행 작업 수 상한
+            max_queue_per_session: 세션당 대기 가능한 작업 수 (초과 시 즉시 거절)
+            max_wait_seconds: 대화형 요청의 최대 대기 시간 (초과 시 거절)
+        """
+        self.capacity = max(capacity, 1)
+        self.per_session_limit = max(per_session_limit, 1)
+        self.max_queue_per_session = max(max_queue_per_session, 0)
+        self.max_wait_seconds = max_wait_seconds
+
+        self._condition = threading.Condition()
+        self._running = 0
+        self._running_by_session: Dict[str, int] = {}
+        self._waiting = []
+        self._sequence = itertools.count()
+
+        # 가중 공정 큐잉 상태: 전역 가상 시간과 세션별 마지막 종료 태그
+        self._virtual_time = 0.0
+        self._last_finish: Dict[tuple, float] = {}
+
+        # 통계
+        self._stats = {'admitted': 0, 'rejected': 0, 'total_wait': 0.0}
+
+    def _can_run(self, ticket: _Ticket) -> bool:
+        """용량과 세션 상한을 모두 만족하고, 가장 앞선 실행 가능 요청인지 확인 (잠금 상태)"""
+        if self._running >= self.capacity:
+            return False
+
+        for candidate in sorted(self._waiting, key=_Ticket.sort_key):
+            if self._running_by_session.get(candidate.session_id, 0) >= self.per_session_limit:
+                # 상한에 걸린 세션은 건너뛰고 다음 세션에 기회를 줌
+                continue
+            return candidate is ticket
+        return False
+
+    def _grant(self, ticket: _Ticket):
+        """요청 실행 승인 (잠금 상태)"""
+        self._waiting.remove(ticket)
+        ticket.granted = True
+        self._running += 1
+        self._running_by_session[ticket.session_id] = self._running_by_session.get(ticket.session_id, 0) + 1
+        self._virtual_time = max(self._virtual_time, ticket.finish_tag - ticket.cost / _PRIORITY_WEIGHTS[ticket.priority])
+
+    def acquire(self, session_id: str, priority: int = PRIORITY_INTERACTIVE,
+                cost: float = 1.0, timeout: Optional[float] = None) -> _Ticket:
+        """
+        작업 실행 슬롯 확보
+
+        Args:
+            session_id: 요청한 세션 ID
+            priority: PRIORITY_INTERACTIVE 또는 PRIORITY_BACKGROUND
+            cost: 작업 비용 (예상 토큰 수 등 상대값)
+            timeout: 최대 대기 시간(초), None이면 대화형은 max_wait_seconds, 백그라운드는 무제한
+
+        Returns:
+            _Ticket: release에 전달할 티켓
+
+        Raises:
+            SchedulerBusyError: 대기열이 가득 찼거나, 대화형 요청인데 전체 용량과 세션 상한이 모두 찼거나,
+                대기 시간이 초과된 경우
+        """
+        if timeout is None and priority == PRIORITY_INTERACTIVE:
+            timeout = self.max_wait_seconds
+
+        started = time.monotonic()
+        with self._condition:
+            queued = sum(1 for t in self._waiting if t.session_id == session_id)
+            running = self._running_by_session.get(session_id, 0)
+            if running >= self.per_session_limit and queued >= self.max_queue_per_session:
+                self._stats['rejected'] += 1
+                raise SchedulerBusyError("이전 요청이 아직 처리 중입니다. 잠시 후 다시 시도해주세요.")
+            # 대화형 요청은 전체 용량과 세션 상한이 모두 찬 상태면 기다리지 않고 바로 바쁨 응답
+            if priority == PRIORITY_INTERACTIVE and self._running >= self.capacity and running >= self.per_session_limit:
+                self._stats['rejected'] += 1
+                raise SchedulerBusyError("현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+
+            # 가중 공정 큐잉: 세션/우선순위별 가상 종료 시각 계산
+            key = (session_id, priority)
+            weight = _PRIORITY_WEIGHTS.get(priority, 1.0)
+            start_tag = max(self._virtual_time, self._last_finish.get(key, 0.0))
+            finish_tag = start_tag + cost / weight
+            self._last_finish[key] = finish_tag
+
+            ticket = _Ticket(session_id, priority, cost, finish_tag, next(self._sequence))
+            self._waiting.append(ticket)
+
+            while not self._can_run(ticket):
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        self._stats['rejected'] += 1
+                        self._condition.notify_all()
+                        raise SchedulerBusyError("현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+                self._condition.wait(remaining)
+
+            self._grant(ticket)
+            self._stats['admitted'] += 1
+            self._stats['total_wait'] += time.monotonic() - started
+            return ticket
+
+    def release(self, ticket: _Ticket):
+        """
+        작업 완료 후 슬롯 반환
+
+        Args:
+            ticket: acquire에서 받은 티켓
+        """
+        with self._condition:
+            if not ticket.granted:
+                return
+            ticket.granted = False
+            self._running -= 1
+            remaining = self._running_by_session.get(ticket.session_id, 1) - 1
+            if remaining > 0:
+                self._running_by_session[ticket.session_id] = remaining
+            else:
+                self._running_by_session.pop(ticket.session_id, None)
+                # 대기 중인 작업이 없는 세션의 태그는 정리
+                if not any(t.session_id == ticket.session_id for t in self._waiting):
+                    for key in [k for k in self._last_finish if k[0] == ticket.session_id]:
+                        del self._last_finish[key]
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, session_id: str, priority: int = PRIORITY_INTERACTIVE,
+             cost: float = 1.0, timeout: Optional[float] = None):
+        """
+        with 구문용 슬롯 확보/반환
+
+        Args:
+            session_id: 요청한 세션 ID
+            priority: 우선순위
+            cost: 작업 비용
+            timeout: 최대 대기 시간(초)
+        """
+        ticket = self.acquire(session_id, priority, cost, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def get_stats(self) -> Dict:
+        """
+        스케줄러 상태 통계 반환
+
+        Returns:
+            Dict: 실행/대기 중인 작업 수, 승인/거절 건수, 평균 대기 시간
+        """
+        with self._condition:
+            admitted = self._stats['admitted']
+            return {
+                'running': self._running,
+                'waiting': len(self._waiting),
+                'waiting_interactive': sum(1 for t in self._waiting if t.priority == PRIORITY_INTERACTIVE),
+                'waiting_background': sum(1 for t in self._waiting if t.priority == PRIORITY_BACKGROUND),
+                'active_sessions': len(self._running_by_session),
+                'admitted': admitted,
+                'rejected': self._stats['rejected'],
+                'avg_wait_seconds': self._stats['total_wait'] / admitted if admitted else 0.0,
+                'capacity': self.capacity,
+                'per_session_limit': self.per_session_limit
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairShareScheduler:
+    """
+    프로세스 전체에서 공유하는 스케줄러 반환
+
+    Returns:
+        FairShareScheduler: 공유 스케줄러
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = FairShareScheduler(
+                    capacity=env_int("SMARTDOC_SCHEDULER_CAPACITY", 8),
+                    per_session_limit=env_int("SMARTDOC_SESSION_CONCURRENCY", 2),
+                    max_queue_per_session=env_int("SMARTDOC_SESSION_QUEUE_LIMIT", 4),
+                    max_wait_seconds=env_float("SMARTDOC_INTERACTIVE_MAX_WAIT", 20.0)
+                )
+    return _scheduler
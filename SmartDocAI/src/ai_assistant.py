@@ -4,15 +4,34 @@ Azure OpenAI를 활용한 질문-답변 및 문서 분석 기능 제공
 """
 
 import os
-from typing import List, Dict, Optional
-from openai import AzureOpenAI
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import HumanMessage, SystemMessage
+import asyncio
+import time
+from typing import List, Dict, Optional, Tuple
+from config import env_flag, env_float, env_int
+from context_compressor import ContextCompressor
+from rate_limiter import get_rate_limiter, get_retry_status, get_backoff_delay
+from text_analysis import count_tokens, tokenize
+from openai_client import get_openai_client, get_async_openai_client
+from conversation_memory import ConversationMemory
+from query_expansion import QueryExpander, expanded_search, multi_query_search
+from reranker import LexicalReranker
+from direct_answer import DirectAnswerFinder, is_factoid_question
+from tabular_query import TableQueryEngine, get_table_store, plan_prompt, parse_plan
+from insight_cache import get_insight_store
+from local_insights import LocalInsightEngine
+from document_index import DocumentSummaryIndex, TwoStageRetriever
+from usage_tracker import get_usage_tracker, extract_usage
 
 class AIAssistant:
     """Azure OpenAI 기반 AI 어시스턴트"""
     
+    # 요약/분류/키워드 프롬프트를 바꾸면 올려서 저장된 인사이트를 다시 계산
+    INSIGHT_PROMPT_VERSION = "2"
+    
+    # 인사이트 호출(요약/분류/키워드)이 같은 문서 접두부를 공유하도록 동일한 본문 길이와 시스템 프롬프트 사용
+    INSIGHT_CONTENT_CHARS = 4000
+    INSIGHT_SYSTEM_PROMPT = "당신은 문서 분석 전문가입니다. 주어진 문서를 바탕으로 요청된 작업(요약, 분류, 키워드 추출)을 정확하고 간결하게 수행해주세요."
+    
     def __init__(self):
         """AI 어시스턴트 초기화"""
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
@@ -23,22 +42,69 @@ class AIAssistant:
         if not all([self.api_key, self.endpoint]):
             raise ValueError("Azure OpenAI 설정이 필요합니다.")
         
-        # OpenAI 클라이언트 초기화
-        self.client = AzureOpenAI(
-            api_key=self.api_key,
-            api_version=self.api_version,
-            azure_endpoint=self.endpoint
-        )
+        # OpenAI 클라이언트는 프로세스 전체에서 공유하며 첫 호출 시 생성됨 (client 속성 참고)
+        
+        # 프로세스 전체에서 공유하는 RPM/TPM 제한기
+        self.rate_limiter = get_rate_limiter()
+        self.max_retries = env_int("AZURE_OPENAI_MAX_RETRIES", 5)
+        
+        # 호출별 토큰/지연 시간 기록 (세션 ID는 앱이나 CLI에서 지정)
+        self.usage_tracker = get_usage_tracker()
+        self.session_id = "default"
         
-        # LangChain 모델 초기화
-        self.llm = AzureChatOpenAI(
-            azure_deployment=self.deployment_name,
-            openai_api_version=self.api_version,
-            azure_endpoint=self.endpoint,
-            openai_api_key=self.api_key,
-            temperature=0.7,
-            max_tokens=2000
+        # 컨텍스트 압축 설정 (검색 결과와 프롬프트 생성 사이의 선택적 단계)
+        self.context_compressor = None
+        if env_flag("SMARTDOC_CONTEXT_COMPRESSION"):
+            self.context_compressor = ContextCompressor(
+                target_ratio=env_float("SMARTDOC_COMPRESSION_RATIO", 0.5),
+                window=env_int("SMARTDOC_COMPRESSION_WINDOW", 1)
+            )
+        
+        # 다중 질의 검색 설정 (로컬 질의 확장 + 선택적 LLM 확장)
+        # hybrid_search는 질의마다 검색 요청을 2번 보내므로 기본 4개 질의면 질문당 최대 8번 검색 요청
+        self.multi_query_enabled = env_flag("SMARTDOC_MULTI_QUERY", True)
+        self.query_expander = QueryExpander(
+            max_variants=env_int("SMARTDOC_QUERY_VARIANTS", 4),
+            llm_rewriter=self._generate_query_variants if env_flag("SMARTDOC_LLM_QUERY_EXPANSION") else None
         )
+        # 로컬 질의 검색이 끝난 뒤 LLM 확장 응답을 더 기다리는 최대 시간(초)
+        self.llm_expansion_wait = env_float("SMARTDOC_LLM_QUERY_EXPANSION_WAIT", 1.5)
+        
+        # 2단계 검색 설정 (넓은 후보 집합을 로컬에서 재순위, 0이면 비활성화)
+        self.rerank_candidates = env_int("SMARTDOC_RERANK_CANDIDATES", 0)
+        self.rerank_top_n = env_int("SMARTDOC_RERANK_TOP_N", 3)
+        self.reranker = LexicalReranker() if self.rerank_candidates > 0 else None
+        
+        # 두 단계 검색 설정 (문서 수가 기준 이상이면 관련 문서를 먼저 고른 뒤 그 청크만 검색)
+        self.document_index = None
+        self.two_stage_min_documents = env_int("SMARTDOC_TWO_STAGE_MIN_DOCUMENTS", 50)
+        self.two_stage_top_documents = env_int("SMARTDOC_TWO_STAGE_DOCUMENTS", 5)
+        self.two_stage_budget_ms = env_float("SMARTDOC_TWO_STAGE_BUDGET_MS", 1500)
+        
+        # 사실형 질문 직접 답변 설정 (신뢰도가 높으면 LLM 호출 생략)
+        self.direct_answer_finder = None
+        if env_flag("SMARTDOC_DIRECT_ANSWERS", True):
+            self.direct_answer_finder = DirectAnswerFinder(
+                min_confidence=env_float("SMARTDOC_DIRECT_ANSWER_CONFIDENCE", 0.75)
+            )
+        self.last_answer_info = {'direct': False}
+        
+        # 스프레드시트 집계형 질문 설정 (저장된 컬럼형 표에서 로컬 계산, 규칙으로 안 되면 LLM은 계획만 생성)
+        self.table_engine = None
+        if env_flag("SMARTDOC_TABLE_QUERIES", True):
+            self.table_engine = TableQueryEngine(
+                get_table_store(),
+                planner=self._plan_table_query if env_flag("SMARTDOC_TABLE_LLM_PLANNER", True) else None,
+                max_rows=env_int("SMARTDOC_TABLE_RESULT_ROWS", 50)
+            )
+        
+        # 로컬 키워드 추출/분류 설정 (신뢰도가 낮을 때만 LLM 호출)
+        self.local_insights = None
+        if env_flag("SMARTDOC_LOCAL_INSIGHTS", True):
+            self.local_insights = LocalInsightEngine(
+                min_similarity=env_float("SMARTDOC_LOCAL_CLASSIFY_MIN_SIMILARITY", 0.15),
+                min_margin=env_float("SMARTDOC_LOCAL_CLASSIFY_MIN_MARGIN", 0.05)
+            )
         
         # 시스템 프롬프트 설정
         self.system_prompt = """당신은 SmartDoc AI의 지능형 문서 분석 어시스턴트입니다.
@@ -56,7 +122,19 @@ class AIAssistant:
 
 항상 정확하고 도움이 되는 정보를 제공하도록 노력하세요."""
     
-    def ask_question(self, question: str, documents: List[Dict], search_engine=None) -> str:
+    @property
+    def client(self):
+        """공유 Azure OpenAI 클라이언트 (지연 생성)"""
+        return get_openai_client()
+    
+    @property
+    def async_client(self):
+        """현재 이벤트 루프의 공유 비동기 Azure OpenAI 클라이언트 (지연 생성)"""
+        return get_async_openai_client()
+    
+    def ask_question(self, question: str, documents: List[Dict], search_engine=None,
+                     memory: Optional[ConversationMemory] = None,
+                     allow_direct_answer: bool = True) -> str:
         """
         문서 기반 질문-답변
         
@@ -64,28 +142,283 @@ class AIAssistant:
             question: 사용자 질문
             documents: 문서 리스트
             search_engine: 검색 엔진 (선택사항)
+            memory: 대화 메모리 (선택사항, 후속 질문 처리용)
+            allow_direct_answer: 사실형 질문에 LLM 없이 직접 답변 허용 여부
             
         Returns:
             str: AI 응답
         """
         try:
-            # 관련 문서 검색
-            relevant_docs = self._find_relevant_documents(question, documents, search_engine)
+            self.last_answer_info = {'direct': False}
+            is_follow_up = memory is not None and memory.is_follow_up(question)
+            
+            # 표 집계형 질문은 저장된 표에서 직접 계산 (표 전체를 프롬프트에 넣지 않음)
+            if allow_direct_answer and self.table_engine and not is_follow_up:
+                tabular = self.table_engine.answer(question, documents)
+                if tabular:
+                    response = self._format_direct_answer(tabular)
+                    self.last_answer_info = dict(tabular, direct=True, question=question)
+                    if memory is not None:
+                        memory.add_turn(question, response)
+                    return response
             
-            # 컨텍스트 구성
-            context = self._build_context(relevant_docs)
+            # 짧은 사실형 질문은 문서의 한 문장으로 즉시 답변 (LLM은 요청 시에만 호출)
+            if (allow_direct_answer and self.direct_answer_finder
+                    and is_factoid_question(question)
+                    and not is_follow_up):
+                direct = self.direct_answer_finder.find(question, documents, search_engine)
+                if direct:
+                    response = self._format_direct_answer(direct)
+                    self.last_answer_info = dict(direct, direct=True, question=question)
+                    if memory is not None:
+                        memory.add_turn(question, response)
+                    return response
+            
+            # 후속 질문은 검색용 독립형 질문으로 재작성
+            retrieval_query = question
+            reuse_documents = False
+            if is_follow_up:
+                retrieval_query = self._rewrite_question(question, memory)
+                reuse_documents = memory.should_reuse_documents(retrieval_query)
+            
+            # 관련 문서 검색 (같은 출처를 묻는 후속 질문이면 직전 결과 재사용)
+            if reuse_documents:
+                relevant_docs = memory.last_documents
+            else:
+                relevant_docs = self._find_relevant_documents(retrieval_query, documents, search_engine)
             
             # 프롬프트 생성
-            prompt = self._create_prompt(question, context)
+            prompt = self._prepare_messages(question, relevant_docs, memory, retrieval_query)
             
             # AI 응답 생성
             response = self._generate_response(prompt)
             
+            # 대화 메모리 갱신 (예산을 넘은 오래된 턴은 누적 요약에 반영)
+            if memory is not None:
+                memory.add_turn(question, response, relevant_docs)
+                if memory.needs_summarization():
+                    self._update_memory_summary(memory)
+            
             return response
             
         except Exception as e:
             return f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {str(e)}"
     
+    async def aask_question(self, question: str, documents: List[Dict], search_engine=None) -> str:
+        """
+        문서 기반 질문-답변 (비동기)
+        
+        Args:
+            question: 사용자 질문
+            documents: 문서 리스트
+            search_engine: 검색 엔진 (선택사항)
+            
+        Returns:
+            str: AI 응답
+        """
+        try:
+            result = await self.aask_question_detailed(question, documents, search_engine)
+            return result['answer']
+            
+        except Exception as e:
+            return f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {str(e)}"
+    
+    async def aask_question_detailed(self, question: str, documents: List[Dict], search_engine=None,
+                                     allow_direct_answer: bool = False) -> Dict:
+        """
+        문서 기반 질문-답변 (비동기, 출처/토큰/지연 시간 포함)
+        
+        Args:
+            question: 사용자 질문
+            documents: 문서 리스트
+            search_engine: 검색 엔진 (선택사항)
+            allow_direct_answer: 사실형 질문에 LLM 없이 직접 답변 허용 여부
+            
+        Returns:
+            Dict: answer, sources, prompt_tokens, completion_tokens, latency, direct
+        """
+        started = time.perf_counter()
+        
+        if allow_direct_answer and self.table_engine:
+            tabular = await asyncio.to_thread(self.table_engine.answer, question, documents)
+            if tabular:
+                return {
+                    'answer': tabular['answer'],
+                    'sources': [tabular['source']],
+                    'prompt_tokens': 0,
+                    'completion_tokens': 0,
+                    'latency': time.perf_counter() - started,
+                    'direct': True
+                }
+        
+        if allow_direct_answer and self.direct_answer_finder and is_factoid_question(question):
+            direct = await asyncio.to_thread(self.direct_answer_finder.find, question, documents, search_engine)
+            if direct:
+                return {
+                    'answer': direct['answer'],
+                    'sources': [direct['source']] if direct.get('source') else [],
+                    'prompt_tokens': 0,
+                    'completion_tokens': 0,
+                    'latency': time.perf_counter() - started,
+                    'direct': True
+                }
+        
+        # 검색 엔진은 동기 클라이언트이므로 별도 스레드에서 실행
+        relevant_docs = await asyncio.to_thread(
+            self._find_relevant_documents, question, documents, search_engine
+        )
+        
+        prompt = self._prepare_messages(question, relevant_docs)
+        
+        try:
+            response = await self._achat_completion(
+                prompt,
+                feature='chat',
+                temperature=0.7,
+                max_tokens=2000,
+                top_p=0.9
+            )
+        except Exception as e:
+            raise Exception(f"AI 응답 생성 실패: {str(e)}")
+        
+        usage = getattr(response, 'usage', None)
+        return {
+            'answer': response.choices[0].message.content,
+            'sources': list(dict.fromkeys(doc['name'] for doc in relevant_docs)),
+            'prompt_tokens': usage.prompt_tokens if usage else 0,
+            'completion_tokens': usage.completion_tokens if usage else 0,
+            'latency': time.perf_counter() - started,
+            'direct': False
+        }
+    
+    def _format_direct_answer(self, direct: Dict) -> str:
+        """
+        직접 답변을 출처와 함께 표시용 문자열로 변환
+        
+        Args:
+            direct: DirectAnswerFinder.find 결과
+            
+        Returns:
+            str: 표시용 답변
+        """
+        response = direct['answer']
+        if direct.get('source'):
+            response += f"\n\n📄 출처: {direct['source']}"
+        return response
+    
+    def _prepare_messages(self, question: str, relevant_docs: List[Dict],
+                          memory: Optional[ConversationMemory] = None,
+                          retrieval_query: Optional[str] = None) -> List[Dict]:
+        """
+        관련 문서로부터 프롬프트 메시지 구성
+        
+        Args:
+            question: 사용자 질문
+            relevant_docs: 관련 문서 리스트
+            memory: 대화 메모리 (있으면 요약과 최근 대화를 포함)
+            retrieval_query: 검색에 사용한 독립형 질문 (압축 기준)
+            
+        Returns:
+            List[Dict]: 프롬프트 메시지 리스트
+        """
+        # 컨텍스트 압축 (활성화된 경우)
+        if self.context_compressor:
+            relevant_docs = self.context_compressor.compress(retrieval_query or question, relevant_docs)
+        
+        # 같은 문서 집합이면 컨텍스트가 글자 그대로 같도록 문서명/청크 순서로 정렬
+        relevant_docs = sorted(relevant_docs, key=lambda doc: (doc['name'], doc.get('chunk_index', 0), doc['content']))
+        
+        # 컨텍스트 구성
+        context = self._build_context(relevant_docs)
+        
+        history = memory.get_history_messages() if memory is not None else None
+        return self._create_prompt(question, context, history)
+    
+    def _rewrite_question(self, question: str, memory: ConversationMemory) -> str:
+        """
+        후속 질문을 이전 대화 없이도 이해되는 독립형 질문으로 재작성
+        
+        Args:
+            question: 후속 질문
+            memory: 대화 메모리
+            
+        Returns:
+            str: 독립형 질문 (실패 시 원래 질문)
+        """
+        try:
+            rewrite_prompt = f"""
+이전 대화:
+{memory.format_recent_turns()}
+
+후속 질문: {question}
+
+이전 대화를 참고하여 후속 질문을 문서 검색에 사용할 수 있는 독립적인 질문 한 문장으로 바꿔주세요.
+질문만 출력하세요.
+"""
+            
+            messages = [
+                {"role": "system", "content": "당신은 대화 맥락을 반영하여 검색 질의를 재작성하는 도우미입니다."},
+                {"role": "user", "content": rewrite_prompt}
+            ]
+            
+            response = self._chat_completion(
+                messages,
+                feature='query_rewrite',
+                temperature=0.0,
+                max_tokens=100
+            )
+            
+            rewritten = response.choices[0].message.content.strip()
+            return rewritten or question
+            
+        except Exception as e:
+            print(f"질문 재작성 실패: {str(e)}")
+            return question
+    
+    def _update_memory_summary(self, memory: ConversationMemory):
+        """
+        버퍼에서 밀려난 대화를 누적 요약에 점진적으로 반영
+        
+        Args:
+            memory: 대화 메모리
+        """
+        pending_turns = memory.take_pending_turns()
+        conversation = "\n".join(
+            f"{'사용자' if turn['role'] == 'user' else 'AI'}: {turn['content']}" for turn in pending_turns
+        )
+        
+        try:
+            summary_prompt = f"""
+기존 요약:
+{memory.summary or '(없음)'}
+
+추가된 대화:
+{conversation}
+
+기존 요약에 추가된 대화의 핵심(질문 주제, 답변의 주요 사실, 언급된 문서)을 반영하여 갱신된 요약을 작성해주세요.
+간결한 한국어 문장으로 작성해주세요.
+"""
+            
+            messages = [
+                {"role": "system", "content": "당신은 대화 내용을 간결하게 누적 요약하는 도우미입니다."},
+                {"role": "user", "content": summary_prompt}
+            ]
+            
+            response = self._chat_completion(
+                messages,
+                feature='memory_summary',
+                temperature=0.2,
+                max_tokens=memory.summary_tokens
+            )
+            
+            memory.update_summary(response.choices[0].message.content)
+            
+        except Exception as e:
+            # 요약 실패 시 질문만 요약에 덧붙여 맥락 손실을 최소화
+            print(f"대화 요약 갱신 실패: {str(e)}")
+            questions = " / ".join(turn['content'] for turn in pending_turns if turn['role'] == 'user')
+            memory.update_summary(f"{memory.summary} 이전 질문: {questions}")
+    
     def _find_relevant_documents(self, question: str, documents: List[Dict], search_engine=None) -> List[Dict]:
         """
         질문과 관련된 문서 찾기
@@ -100,23 +433,48 @@ class AIAssistant:
         """
         relevant_docs = []
         
-        # 검색 엔진이 있으면 활용
-        if search_engine:
+        # 질문을 로컬 규칙으로 여러 변형 질의로 확장 (원본 질문이 항상 첫 번째, LLM 확장은 검색과 동시에 실행)
+        queries = self.query_expander.local_variants(question) if self.multi_query_enabled else [question]
+        
+        # 재순위 사용 시 넓은 후보 집합을 가져와 상위 N개만 남김
+        top_k = self.rerank_candidates if self.reranker else 3
+        top_n = self.rerank_top_n if self.reranker else 3
+        
+        # 문서가 많으면 문서 선택 → 청크 검색 두 단계로 검색 범위를 좁힘
+        retriever = self._get_two_stage_retriever(search_engine)
+        
+        # 검색 엔진이 있으면 모든 질의를 병렬로 검색하고 순위 기반으로 융합
+        if search_engine or retriever:
             try:
-                search_results = search_engine.hybrid_search(question, top_k=3)
+                if retriever:
+                    search_fn = lambda query: retriever.retrieve(query, top_k=top_k)
+                else:
+                    search_fn = lambda query: search_engine.hybrid_search(query, top_k=top_k)
+                if self.multi_query_enabled:
+                    search_results, queries = expanded_search(self.query_expander, search_fn, question,
+                                                              self.llm_expansion_wait)
+                else:
+                    search_results = multi_query_search(search_fn, queries)
+                if self.reranker:
+                    search_results = self.reranker.rerank(question, search_results, top_n, score_key='fused_score')
+                
                 for result in search_results:
                     relevant_docs.append({
                         'name': result.get('source', ''),
                         'content': result.get('content', ''),
-                        'score': result.get('score', 0)
+                        'chunk_index': result.get('chunk_index', 0),
+                        'location': result.get('location', ''),
+                        'score': result.get('rerank_score', result.get('fused_score', result.get('score', 0)))
                     })
             except Exception as e:
                 print(f"검색 엔진 오류: {str(e)}")
         
-        # 검색 결과가 부족하면 전체 문서에서 키워드 매칭
+        # 검색 결과가 부족하면 전체 문서에서 키워드 매칭 (조사를 제거한 핵심어 기준)
         if not relevant_docs:
-            question_keywords = question.lower().split()
+            question_keywords = list(dict.fromkeys(tokenize(" ".join(queries))))
             for doc in documents:
+                if not question_keywords:
+                    break
                 content_lower = doc['content'].lower()
                 matches = sum(1 for keyword in question_keywords if keyword in content_lower)
                 if matches > 0:
@@ -128,7 +486,87 @@ class AIAssistant:
         
         # 점수 기준으로 정렬
         relevant_docs.sort(key=lambda x: x['score'], reverse=True)
-        return relevant_docs[:3]  # 상위 3개만 반환
+        return relevant_docs[:top_n]  # 상위 N개만 반환 (기본 3개)
+    
+    def build_document_index(self, documents: List[Dict]):
+        """
+        두 단계 검색용 문서 요약 인덱스 생성 (업로드 시 호출)
+        
+        Args:
+            documents: 전체 문서 리스트
+        """
+        if len([doc for doc in documents if doc.get('content')]) < self.two_stage_min_documents:
+            self.document_index = None
+            return
+        
+        try:
+            index = DocumentSummaryIndex()
+            index.build(documents)
+            self.document_index = index
+        except Exception as e:
+            print(f"문서 인덱스 생성 실패: {str(e)}")
+            self.document_index = None
+    
+    def _get_two_stage_retriever(self, search_engine=None) -> Optional[TwoStageRetriever]:
+        """문서 인덱스가 있으면 두 단계 검색기 반환"""
+        if not self.document_index:
+            return None
+        return TwoStageRetriever(
+            self.document_index,
+            search_engine,
+            top_documents=self.two_stage_top_documents,
+            budget_ms=self.two_stage_budget_ms
+        )
+    
+    def _generate_query_variants(self, question: str) -> List[str]:
+        """
+        LLM으로 검색용 변형 질의 생성 (짧은 단일 호출)
+        
+        Args:
+            question: 사용자 질문
+            
+        Returns:
+            List[str]: 변형 질의 리스트
+        """
+        messages = [
+            {"role": "system", "content": "당신은 문서 검색 질의를 만드는 도우미입니다."},
+            {"role": "user", "content": f"다음 질문과 같은 의미의 검색 질의 2개를 서로 다른 표현(동의어, 영문/한글 표기)으로 한 줄에 하나씩 작성해주세요. 질의만 출력하세요.\n\n질문: {question}"}
+        ]
+        
+        response = self._chat_completion(
+            messages,
+            feature='query_expansion',
+            temperature=0.3,
+            max_tokens=80
+        )
+        
+        lines = response.choices[0].message.content.strip().split('\n')
+        return [line.strip(" -•0123456789.").strip() for line in lines if line.strip()][:2]
+    
+    def _plan_table_query(self, question: str, tables: List[Tuple[str, Dict]]) -> Optional[Dict]:
+        """
+        LLM으로 표 질의 계획 생성 (표 스키마와 예시 값만 전달, 계산은 로컬에서 수행)
+        
+        Args:
+            question: 사용자 질문
+            tables: (표 ID, 카탈로그 항목) 후보 리스트
+            
+        Returns:
+            Optional[Dict]: 질의 계획 (표로 답할 수 없으면 None)
+        """
+        messages = [
+            {"role": "system", "content": "당신은 표 데이터 질의 계획을 JSON으로 작성하는 도우미입니다."},
+            {"role": "user", "content": plan_prompt(question, tables)}
+        ]
+        
+        response = self._chat_completion(
+            messages,
+            feature='table_plan',
+            temperature=0,
+            max_tokens=300
+        )
+        
+        return parse_plan(response.choices[0].message.content)
     
     def _build_context(self, documents: List[Dict]) -> str:
         """
@@ -145,40 +583,47 @@ class AIAssistant:
         
         context_parts = []
         for i, doc in enumerate(documents, 1):
+            # 세그먼트 테이블에서 얻은 위치가 있으면 페이지/슬라이드 단위로 인용할 수 있도록 함께 표시
+            location = f" ({doc['location']})" if doc.get('location') else ""
             context_parts.append(f"""
-문서 {i}: {doc['name']}
+문서 {i}: {doc['name']}{location}
 내용: {doc['content']}
 ---
 """)
         
         return "\n".join(context_parts)
     
-    def _create_prompt(self, question: str, context: str) -> List[Dict]:
+    def _create_prompt(self, question: str, context: str,
+                       history: Optional[List[Dict]] = None) -> List[Dict]:
         """
         AI 프롬프트 생성
         
+        프롬프트 캐시가 적용되도록 변하지 않는 부분을 앞에 둠:
+        시스템 프롬프트 → 지시사항 + 문서 컨텍스트 → 대화 기록 → 질문
+        
         Args:
             question: 사용자 질문
             context: 문서 컨텍스트
+            history: 대화 기록 메시지 (선택사항)
             
         Returns:
             List[Dict]: 프롬프트 메시지 리스트
         """
-        user_prompt = f"""
-사용자 질문: {question}
-
-관련 문서 내용:
-{context}
-
-위 문서 내용을 바탕으로 사용자의 질문에 정확하고 유용한 답변을 제공해주세요.
+        context_prompt = f"""아래 문서 내용을 바탕으로 사용자의 질문에 정확하고 유용한 답변을 제공해주세요.
 문서에서 찾을 수 없는 정보는 명확히 말하고, 추측은 피해주세요.
 답변은 한국어로 제공해주세요.
-"""
+
+관련 문서 내용:
+{context}"""
         
-        return [
+        messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
+            {"role": "user", "content": context_prompt}
         ]
+        if history:
+            messages.extend(history)
+        messages.append({"role": "user", "content": f"사용자 질문: {question}"})
+        return messages
     
     def _generate_response(self, messages: List[Dict]) -> str:
         """
@@ -191,9 +636,9 @@ class AIAssistant:
             str: AI 응답
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
+            response = self._chat_completion(
+                messages,
+                feature='chat',
                 temperature=0.7,
                 max_tokens=2000,
                 top_p=0.9
@@ -204,6 +649,129 @@ class AIAssistant:
         except Exception as e:
             raise Exception(f"AI 응답 생성 실패: {str(e)}")
     
+    def _estimate_tokens(self, messages: List[Dict], max_tokens: int) -> int:
+        """프롬프트 추정 토큰 수 + 최대 완성 토큰 수"""
+        # 메시지당 역할/구분자 오버헤드 약 4토큰
+        prompt_tokens = sum(count_tokens(message['content']) + 4 for message in messages)
+        return prompt_tokens + max_tokens
+    
+    def _chat_completion(self, messages: List[Dict], feature: str = 'other', **params):
+        """
+        제한기와 재시도를 적용한 chat.completions 호출 (사용량 기록 포함)
+        
+        Args:
+            messages: 프롬프트 메시지 리스트
+            feature: 사용량 집계용 기능 이름
+            **params: temperature, max_tokens 등 호출 파라미터
+            
+        Returns:
+            ChatCompletion: API 응답
+        """
+        estimate = self._estimate_tokens(messages, params.get('max_tokens', 2000))
+        attempt = 0
+        queue_wait = 0.0
+        
+        while True:
+            reservation = self.rate_limiter.acquire(estimate)
+            queue_wait += reservation.wait_time
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.deployment_name,
+                    messages=messages,
+                    **params
+                )
+            except Exception as e:
+                # 실패한 시도는 토큰을 쓰지 않았으므로 예약을 반환 (재시도마다 예약이 쌓이지 않도록)
+                self.rate_limiter.reconcile(reservation, 0)
+                status = get_retry_status(e)
+                if status is None or attempt >= self.max_retries:
+                    self._record_usage(feature, None, time.perf_counter() - started, queue_wait, attempt, e)
+                    raise
+                delay = get_backoff_delay(attempt, e)
+                print(f"Azure OpenAI 호출 재시도 ({status}): {delay:.1f}초 후 {attempt + 1}/{self.max_retries}")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            
+            latency = time.perf_counter() - started
+            usage = getattr(response, 'usage', None)
+            self.rate_limiter.reconcile(reservation, usage.total_tokens if usage else estimate)
+            self._record_usage(feature, response, latency, queue_wait, attempt)
+            return response
+    
+    async def _achat_completion(self, messages: List[Dict], feature: str = 'other', **params):
+        """
+        제한기와 재시도를 적용한 chat.completions 호출 (비동기, 사용량 기록 포함)
+        
+        Args:
+            messages: 프롬프트 메시지 리스트
+            feature: 사용량 집계용 기능 이름
+            **params: temperature, max_tokens 등 호출 파라미터
+            
+        Returns:
+            ChatCompletion: API 응답
+        """
+        estimate = self._estimate_tokens(messages, params.get('max_tokens', 2000))
+        attempt = 0
+        queue_wait = 0.0
+        
+        while True:
+            reservation = await self.rate_limiter.acquire_async(estimate)
+            queue_wait += reservation.wait_time
+            started = time.perf_counter()
+            try:
+                response = await self.async_client.chat.completions.create(
+                    model=self.deployment_name,
+                    messages=messages,
+                    **params
+                )
+            except Exception as e:
+                # 실패한 시도는 토큰을 쓰지 않았으므로 예약을 반환 (재시도마다 예약이 쌓이지 않도록)
+                self.rate_limiter.reconcile(reservation, 0)
+                status = get_retry_status(e)
+                if status is None or attempt >= self.max_retries:
+                    self._record_usage(feature, None, time.perf_counter() - started, queue_wait, attempt, e)
+                    raise
+                delay = get_backoff_delay(attempt, e)
+                print(f"Azure OpenAI 호출 재시도 ({status}): {delay:.1f}초 후 {attempt + 1}/{self.max_retries}")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            
+            latency = time.perf_counter() - started
+            usage = getattr(response, 'usage', None)
+            self.rate_limiter.reconcile(reservation, usage.total_tokens if usage else estimate)
+            self._record_usage(feature, response, latency, queue_wait, attempt)
+            return response
+    
+    def _record_usage(self, feature: str, response, latency: float, queue_wait: float,
+                      retries: int, error: Optional[Exception] = None):
+        """
+        호출 사용량 기록 (스트리밍하지 않으므로 첫 토큰 시간은 기록하지 않음)
+        
+        Args:
+            feature: 기능 이름
+            response: API 응답 (실패 시 None)
+            latency: 마지막 시도의 API 호출 시간 (초)
+            queue_wait: 요청 제한기 대기 시간 합계 (초)
+            retries: 재시도 횟수
+            error: 실패 시 예외
+        """
+        try:
+            self.usage_tracker.record(
+                feature=feature,
+                session_id=self.session_id,
+                model=self.deployment_name,
+                usage=extract_usage(response),
+                latency=latency,
+                queue_wait=queue_wait,
+                retries=retries,
+                error=str(error) if error else None
+            )
+        except Exception as e:
+            print(f"사용량 기록 실패: {str(e)}")
+    
     def summarize_document(self, document: Dict) -> str:
         """
         문서 요약 생성
@@ -214,12 +782,13 @@ class AIAssistant:
         Returns:
             str: 문서 요약
         """
+        cached = self.get_cached_insights(document)
+        if cached:
+            return cached['summary']
+        
         try:
-            summary_prompt = f"""
-다음 문서의 내용을 요약해주세요:
-
-문서명: {document['name']}
-내용: {document['content'][:4000]}  # 처음 4000자만
+            summary_prompt = """
+위 문서의 내용을 요약해주세요.
 
 요약 요구사항:
 1. 주요 내용을 3-5개 포인트로 정리
@@ -230,14 +799,11 @@ class AIAssistant:
 요약:
 """
             
-            messages = [
-                {"role": "system", "content": "당신은 문서 요약 전문가입니다. 주어진 문서의 핵심 내용을 명확하고 간결하게 요약해주세요."},
-                {"role": "user", "content": summary_prompt}
-            ]
+            messages = self._insight_messages(document, summary_prompt)
             
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
+            response = self._chat_completion(
+                messages,
+                feature='summary',
                 temperature=0.3,
                 max_tokens=1000
             )
@@ -247,6 +813,64 @@ class AIAssistant:
         except Exception as e:
             return f"문서 요약 생성 실패: {str(e)}"
     
+    def _insight_messages(self, document: Dict, task_prompt: str) -> List[Dict]:
+        """
+        인사이트 호출 메시지 구성 (시스템 프롬프트와 문서 본문을 공통 접두부로, 작업 지시는 마지막에)
+        
+        Args:
+            document: 문서 딕셔너리
+            task_prompt: 작업별 지시사항
+            
+        Returns:
+            List[Dict]: 프롬프트 메시지 리스트
+        """
+        document_prompt = f"문서명: {document['name']}\n내용:\n{document['content'][:self.INSIGHT_CONTENT_CHARS]}"
+        return [
+            {"role": "system", "content": self.INSIGHT_SYSTEM_PROMPT},
+            {"role": "user", "content": document_prompt},
+            {"role": "user", "content": task_prompt}
+        ]
+    
+    def combine_summaries(self, topic: str, summaries: List[str], max_tokens: int = 800) -> str:
+        """
+        여러 요약을 하나의 주제 요약으로 통합 (코퍼스 다이제스트의 reduce 단계)
+        
+        Args:
+            topic: 주제 이름
+            summaries: 통합할 요약 리스트
+            max_tokens: 최대 응답 토큰 수
+            
+        Returns:
+            str: 통합 요약 (호출 실패 시 예외 발생)
+        """
+        combine_prompt = f"""
+다음은 '{topic}' 주제에 속한 문서들의 요약입니다:
+
+{chr(10).join(summaries)}
+
+통합 요구사항:
+1. 여러 문서에 공통된 주제와 핵심 내용을 먼저 정리
+2. 문서별로 중요한 차이점이나 고유한 내용은 문서명과 함께 언급
+3. 중복되는 내용은 한 번만 작성
+4. 한국어로 작성
+
+통합 요약:
+"""
+        
+        messages = [
+            {"role": "system", "content": "당신은 문서 요약 전문가입니다. 여러 문서의 요약을 하나의 주제별 요약으로 통합해주세요."},
+            {"role": "user", "content": combine_prompt}
+        ]
+        
+        response = self._chat_completion(
+            messages,
+            feature='digest',
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        
+        return response.choices[0].message.content
+    
     def classify_document(self, document: Dict) -> str:
         """
         문서 분류
@@ -257,12 +881,27 @@ class AIAssistant:
         Returns:
             str: 문서 카테고리
         """
+        cached = self.get_cached_insights(document)
+        if cached:
+            return cached['category']
+        
+        return self._classify_document(document)[0]
+    
+    def _classify_document(self, document: Dict) -> Tuple[str, str]:
+        """
+        문서 분류 (로컬 분류기 우선, 신뢰도가 낮으면 LLM)
+        
+        Returns:
+            Tuple[str, str]: (카테고리, 분류 방식 'local' 또는 'llm')
+        """
+        if self.local_insights:
+            local = self.local_insights.classify(document)
+            if local:
+                return local[0], 'local'
+        
         try:
-            classification_prompt = f"""
-다음 문서를 적절한 카테고리로 분류해주세요:
-
-문서명: {document['name']}
-내용: {document['content'][:2000]}  # 처음 2000자만
+            classification_prompt = """
+위 문서를 적절한 카테고리로 분류해주세요.
 
 분류 카테고리:
 - 학술/연구: 논문, 연구보고서, 학술 자료
@@ -275,22 +914,19 @@ class AIAssistant:
 분류 결과만 간단히 답변해주세요.
 """
             
-            messages = [
-                {"role": "system", "content": "당신은 문서 분류 전문가입니다. 주어진 문서를 적절한 카테고리로 분류해주세요."},
-                {"role": "user", "content": classification_prompt}
-            ]
+            messages = self._insight_messages(document, classification_prompt)
             
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
+            response = self._chat_completion(
+                messages,
+                feature='classify',
                 temperature=0.1,
                 max_tokens=100
             )
             
-            return response.choices[0].message.content.strip()
+            return response.choices[0].message.content.strip(), 'llm'
             
         except Exception as e:
-            return "분류 실패"
+            return "분류 실패", 'llm'
     
     def extract_keywords(self, document: Dict, num_keywords: int = 10) -> List[str]:
         """
@@ -303,12 +939,18 @@ class AIAssistant:
         Returns:
             List[str]: 키워드 리스트
         """
+        cached = self.get_cached_insights(document)
+        if cached and cached.get('keyword_list') and len(cached['keyword_list']) >= num_keywords:
+            return cached['keyword_list'][:num_keywords]
+        
+        if self.local_insights:
+            keywords = self.local_insights.extract_keywords(document, num_keywords)
+            if keywords:
+                return keywords
+        
         try:
             keyword_prompt = f"""
-다음 문서에서 가장 중요한 키워드 {num_keywords}개를 추출해주세요:
-
-문서명: {document['name']}
-내용: {document['content'][:3000]}  # 처음 3000자만
+위 문서에서 가장 중요한 키워드 {num_keywords}개를 추출해주세요.
 
 요구사항:
 1. 문서의 핵심 개념과 주제를 나타내는 키워드
@@ -319,14 +961,11 @@ class AIAssistant:
 키워드:
 """
             
-            messages = [
-                {"role": "system", "content": "당신은 키워드 추출 전문가입니다. 문서의 핵심을 나타내는 중요한 키워드들을 추출해주세요."},
-                {"role": "user", "content": keyword_prompt}
-            ]
+            messages = self._insight_messages(document, keyword_prompt)
             
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
+            response = self._chat_completion(
+                messages,
+                feature='keywords',
                 temperature=0.2,
                 max_tokens=200
             )
@@ -339,30 +978,99 @@ class AIAssistant:
         except Exception as e:
             return []
     
-    def get_document_insights(self, document: Dict) -> Dict[str, str]:
+    def fit_local_insights(self, documents: List[Dict]):
+        """
+        문서 저장소와 LLM 분류 결과(인사이트 캐시)로 로컬 인사이트 엔진 학습
+        
+        Args:
+            documents: 전체 문서 리스트
+        """
+        if not self.local_insights:
+            return
+        
+        labels = {}
+        for doc in documents:
+            cached = self.get_cached_insights(doc)
+            # 로컬 분류 결과로 다시 학습하지 않도록 LLM 라벨만 사용
+            if cached and cached.get('category_source', 'llm') == 'llm':
+                labels[doc['name']] = cached['category']
+        
+        try:
+            self.local_insights.fit(documents, labels)
+        except Exception as e:
+            print(f"로컬 인사이트 학습 실패: {str(e)}")
+    
+    def get_cached_insights(self, document: Dict) -> Optional[Dict]:
+        """
+        저장된 인사이트 조회 (현재 프롬프트 버전 기준, LLM 호출 없음)
+        
+        Args:
+            document: 문서 딕셔너리
+            
+        Returns:
+            Optional[Dict]: 저장된 인사이트 (없거나 내용/프롬프트가 바뀌었으면 None)
+        """
+        try:
+            return get_insight_store().get(document, self.INSIGHT_PROMPT_VERSION)
+        except Exception as e:
+            print(f"인사이트 캐시 조회 실패: {str(e)}")
+            return None
+    
+    def estimate_insight_tokens(self, document: Dict) -> int:
+        """
+        인사이트 계산(요약/분류/키워드)의 예상 토큰 수
+        
+        Args:
+            document: 문서 딕셔너리
+            
+        Returns:
+            int: 세 호출의 프롬프트 추정치 + 최대 완성 토큰 합계
+        """
+        content = document.get('content', '')
+        # 세 호출이 같은 문서 본문을 사용
+        prompt_tokens = 3 * count_tokens(content[:self.INSIGHT_CONTENT_CHARS])
+        # 지시문 오버헤드 약 300토큰 + 최대 완성 토큰 (1000 + 100 + 200)
+        return prompt_tokens + 300 + 1300
+    
+    def get_document_insights(self, document: Dict, use_cache: bool = True) -> Dict[str, str]:
         """
-        문서 인사이트 생성
+        문서 인사이트 생성 (내용/프롬프트가 바뀌지 않았으면 저장된 결과 반환)
         
         Args:
             document: 문서 딕셔너리
+            use_cache: 저장된 인사이트 사용 여부
             
         Returns:
             Dict[str, str]: 인사이트 딕셔너리
         """
         try:
+            if use_cache:
+                cached = self.get_cached_insights(document)
+                if cached:
+                    return cached
+            
             # 요약, 분류, 키워드 추출을 병렬로 수행
             summary = self.summarize_document(document)
-            category = self.classify_document(document)
+            category, category_source = self._classify_document(document)
             keywords = self.extract_keywords(document)
             
-            return {
+            insights = {
                 'summary': summary,
                 'category': category,
                 'keywords': ', '.join(keywords),
+                'keyword_list': keywords,
+                'category_source': category_source,
                 'word_count': len(document['content'].split()),
                 'char_count': len(document['content'])
             }
             
+            # 세 작업이 모두 성공한 경우에만 저장
+            if (keywords and category != "분류 실패"
+                    and not summary.startswith("문서 요약 생성 실패")):
+                get_insight_store().put(document, self.INSIGHT_PROMPT_VERSION, insights)
+            
+            return insights
+            
         except Exception as e:
             return {
                 'summary': f"인사이트 생성 실패: {str(e)}",
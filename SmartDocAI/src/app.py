@@ -5,13 +5,32 @@ SmartDoc AI - 메인 Streamlit 애플리케이션
 
 import streamlit as st
 import os
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # 로컬 모듈 임포트
 from document_processor import DocumentProcessor
 from search_engine import SearchEngine
 from ai_assistant import AIAssistant
+from conversation_memory import ConversationMemory
+from rate_limiter import get_rate_limiter
+from usage_tracker import get_usage_tracker
+from admission_control import (
+    get_scheduler,
+    SchedulerBusyError,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND
+)
+from config import env_int
+from corpus_digest import CorpusDigestBuilder
+from insight_cache import (
+    content_hash,
+    get_insight_precomputer,
+    STATUS_PENDING,
+    STATUS_DEFERRED,
+    STATUS_FAILED
+)
 from utils import (
     load_documents_content_from_file, 
     save_documents_content_to_file,
@@ -62,6 +81,9 @@ st.markdown("""
 
 def initialize_session_state():
     """세션 상태 초기화"""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
     if 'documents' not in st.session_state:
         # 기존 저장된 문서 로드
         docs_dir = get_documents_directory()
@@ -74,6 +96,11 @@ def initialize_session_state():
     
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
+    if 'conversation_memory' not in st.session_state:
+        st.session_state.conversation_memory = ConversationMemory(
+            token_budget=env_int("SMARTDOC_MEMORY_TOKEN_BUDGET", 1500),
+            summary_tokens=env_int("SMARTDOC_MEMORY_SUMMARY_TOKENS", 300)
+        )
     if 'search_engine' not in st.session_state:
         st.session_state.search_engine = None
     if 'ai_assistant' not in st.session_state:
@@ -115,6 +142,7 @@ def main():
                     with st.expander(f"📄 {doc['name']}"):
                         st.write(f"**크기**: {doc['size']} KB")
                         st.write(f"**업로드 시간**: {doc['upload_time']}")
+                        show_document_insights(doc)
                         if st.button(f"삭제", key=f"delete_{i}"):
                             st.session_state.documents.pop(i)
                             save_documents()  # 문서 삭제 후 저장
@@ -126,6 +154,7 @@ def main():
                 st.success(f"✅ {len(st.session_state.documents)}개 문서가 업로드되어 있습니다.")
                 if st.session_state.ai_assistant:
                     st.success("✅ AI 어시스턴트가 활성화되어 있습니다.")
+                    show_digest_interface()
                 else:
                     st.warning("⚠️ AI 어시스턴트를 초기화하려면 환경 변수를 설정해주세요.")
             else:
@@ -164,9 +193,22 @@ def process_documents(uploaded_files):
             if uploaded_file.name.lower().endswith('.hwp'):
                 st.info("🔄 한글 문서를 처리 중입니다. 복잡한 구조로 인해 시간이 다소 걸릴 수 있습니다...")
             
-            # 문서 내용 추출
-            content = processor.extract_content(uploaded_file)
+            # 문서 내용 추출 (PDF는 페이지 진행률 표시)
+            progress_bar = None
+            if uploaded_file.name.lower().endswith('.pdf'):
+                progress_bar = st.progress(0.0, text=f"📄 {uploaded_file.name} 페이지 추출 중...")
+            
+            def update_progress(page_no, total_pages):
+                progress_bar.progress(page_no / total_pages, text=f"📄 {uploaded_file.name} {page_no}/{total_pages} 페이지")
+            
+            content, segments = processor.extract_content(uploaded_file, update_progress if progress_bar else None,
+                                                          with_segments=True)
+            if progress_bar:
+                progress_bar.empty()
             file_info['content'] = content
+            # 페이지/슬라이드/시트 경계 (경계 맞춤 청크 분할과 검색 결과 위치 표시에 사용)
+            file_info['segments'] = segments
+            file_info['content_hash'] = content_hash(content)
             
             # 세션 상태에 추가
             st.session_state.documents.append(file_info)
@@ -240,7 +282,9 @@ def initialize_ai_components():
                 # 검색 엔진 초기화
                 try:
                     st.session_state.search_engine = SearchEngine()
-                    st.session_state.search_engine.add_documents(st.session_state.documents)
+                    # 인덱싱은 백그라운드 우선순위로 공유 용량을 사용
+                    with get_scheduler().slot(st.session_state.session_id, PRIORITY_BACKGROUND):
+                        st.session_state.search_engine.add_documents(st.session_state.documents)
                     st.info("✅ 검색 엔진 초기화 완료")
                 except Exception as search_error:
                     st.warning(f"⚠️ 검색 엔진 초기화 실패: {str(search_error)}")
@@ -250,16 +294,97 @@ def initialize_ai_components():
                 # AI 어시스턴트 초기화
                 try:
                     st.session_state.ai_assistant = AIAssistant()
+                    st.session_state.ai_assistant.session_id = st.session_state.session_id
                     st.success("✅ AI 어시스턴트 초기화 완료!")
                 except Exception as ai_error:
                     st.error(f"❌ AI 어시스턴트 초기화 실패: {str(ai_error)}")
                     return
                 
+                # 문서 저장소와 저장된 LLM 분류 결과로 로컬 키워드/분류 엔진 학습
+                st.session_state.ai_assistant.fit_local_insights(st.session_state.documents)
+                
+                # 문서가 많으면 두 단계 검색용 문서 요약 인덱스 생성
+                st.session_state.ai_assistant.build_document_index(st.session_state.documents)
+                
+                # 문서 인사이트를 백그라운드에서 미리 계산 (저장된 문서는 건너뜀)
+                precompute_insights()
+                
                 st.success("✅ AI 컴포넌트 초기화 완료!")
         except Exception as e:
             st.error(f"❌ AI 컴포넌트 초기화 실패: {str(e)}")
             st.info("환경 변수 설정을 확인해주세요.")
 
+def precompute_insights():
+    """업로드된 문서의 인사이트 백그라운드 계산 예약"""
+    precomputer = get_insight_precomputer()
+    deferred = 0
+    for doc in st.session_state.documents:
+        if not doc.get('content'):
+            continue
+        status = precomputer.submit(doc, st.session_state.ai_assistant, st.session_state.session_id)
+        if status == STATUS_DEFERRED:
+            deferred += 1
+    if deferred:
+        st.info(f"⏸️ 시간당 인사이트 토큰 예산을 넘어 {deferred}개 문서의 인사이트 계산을 보류했습니다.")
+
+def show_document_insights(doc):
+    """문서 인사이트(분류/키워드/요약) 또는 계산 상태 표시"""
+    assistant = st.session_state.ai_assistant
+    if not assistant or not doc.get('content'):
+        return
+    
+    precomputer = get_insight_precomputer()
+    status = precomputer.status(doc, assistant.INSIGHT_PROMPT_VERSION)
+    if status == STATUS_PENDING:
+        st.caption("⏳ 인사이트 계산 중...")
+    elif status == STATUS_DEFERRED:
+        st.caption("⏸️ 토큰 예산 초과로 인사이트 계산 보류")
+    elif status == STATUS_FAILED:
+        st.caption("⚠️ 인사이트 계산 실패")
+    elif status is not None:
+        insights = precomputer.store.get(doc, assistant.INSIGHT_PROMPT_VERSION)
+        if insights:
+            st.write(f"**분류**: {insights['category']}")
+            st.write(f"**키워드**: {insights['keywords']}")
+            st.caption(insights['summary'])
+
+def show_digest_interface():
+    """전체 문서 다이제스트 생성 및 표시"""
+    st.subheader("전체 문서 다이제스트")
+    period = st.selectbox("대상 문서", ["전체", "최근 7일"], key="digest_period")
+    
+    if st.button("📚 다이제스트 생성"):
+        documents = st.session_state.documents
+        scope = 'all'
+        if period == "최근 7일":
+            since = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
+            documents = [doc for doc in documents if doc.get('upload_time', '') >= since]
+            scope = 'week'
+        
+        builder = CorpusDigestBuilder(
+            st.session_state.ai_assistant,
+            os.path.join(get_documents_directory(), "corpus_digest.json"),
+            max_workers=env_int("SMARTDOC_DIGEST_WORKERS", 4)
+        )
+        try:
+            with st.spinner(f"{len(documents)}개 문서 다이제스트 생성 중..."):
+                with get_scheduler().slot(st.session_state.session_id, PRIORITY_BACKGROUND):
+                    st.session_state.corpus_digest = builder.build(documents, scope)
+        except SchedulerBusyError as e:
+            st.warning(f"⏳ {str(e)}")
+    
+    digest = st.session_state.get('corpus_digest')
+    if digest:
+        if digest.get('error'):
+            st.error(f"❌ {digest['error']}")
+        else:
+            stats = digest['stats']
+            st.caption(f"문서 {digest['documents']}개 · 요약 재사용 {stats['summaries_reused']} / 새로 계산 {stats['summaries_computed']} · "
+                       f"주제 재사용 {stats['topics_reused']} / 갱신 {stats['topics_updated']} / 재계산 {stats['topics_rebuilt']} · "
+                       f"{stats['elapsed']:.1f}초")
+            with st.expander("📚 다이제스트 보기", expanded=True):
+                st.markdown(digest['digest'])
+
 def show_search_interface():
     """검색 인터페이스 표시"""
     # 문서가 없으면 안내 메시지
@@ -288,8 +413,11 @@ def show_search_interface():
         if st.button("🔍 검색") and search_query:
             with st.spinner("검색 중..."):
                 try:
-                    results = st.session_state.search_engine.search(search_query)
+                    with get_scheduler().slot(st.session_state.session_id, PRIORITY_INTERACTIVE):
+                        results = st.session_state.search_engine.search(search_query)
                     display_search_results(results)
+                except SchedulerBusyError as e:
+                    st.warning(f"⏳ {str(e)}")
                 except Exception as e:
                     st.error(f"검색 실패: {str(e)}")
                     # 검색 엔진 실패 시 간단한 검색으로 대체
@@ -308,6 +436,8 @@ def display_search_results(results):
     for i, result in enumerate(results):
         with st.expander(f"📄 결과 {i+1}: {result.get('title', '제목 없음')}"):
             st.write(f"**문서**: {result.get('source', '알 수 없음')}")
+            if result.get('location'):
+                st.write(f"**위치**: {result['location']}")
             st.write(f"**관련도**: {result.get('score', 0):.2f}")
             st.write("**내용**:")
             st.write(result.get('content', '내용 없음'))
@@ -371,6 +501,12 @@ def show_chat_interface():
                 </div>
                 """, unsafe_allow_html=True)
         
+        # 직접 답변(문서 문장)에 대해 필요하면 AI 상세 답변 요청
+        last_message = st.session_state.chat_history[-1] if st.session_state.chat_history else None
+        if last_message and last_message.get('direct'):
+            if st.button("🤖 AI 상세 답변 생성"):
+                process_detailed_answer(last_message['question'])
+        
         # 채팅 입력
         user_input = st.text_input("질문을 입력하세요:", placeholder="문서에 대해 궁금한 것을 물어보세요...")
         
@@ -382,6 +518,7 @@ def show_chat_interface():
         with col2:
             if st.button("🗑️ 채팅 초기화"):
                 st.session_state.chat_history = []
+                st.session_state.conversation_memory.clear()
                 st.rerun()
 
 def process_simple_chat_message(user_input):
@@ -421,14 +558,49 @@ def process_chat_message(user_input):
     
     try:
         with st.spinner("AI가 답변을 생성 중..."):
-            # AI 어시스턴트에게 질문
-            response = st.session_state.ai_assistant.ask_question(
-                user_input, 
-                st.session_state.documents,
-                st.session_state.search_engine
-            )
+            # AI 어시스턴트에게 질문 (세션별 공정 분배 적용)
+            with get_scheduler().slot(st.session_state.session_id, PRIORITY_INTERACTIVE):
+                response = st.session_state.ai_assistant.ask_question(
+                    user_input, 
+                    st.session_state.documents,
+                    st.session_state.search_engine,
+                    memory=st.session_state.conversation_memory
+                )
             
-            # AI 응답 추가
+            # AI 응답 추가 (직접 답변이면 상세 답변 요청용 질문 기록)
+            answer_info = st.session_state.ai_assistant.last_answer_info
+            st.session_state.chat_history.append({
+                'role': 'assistant',
+                'content': response,
+                'timestamp': datetime.now(),
+                'direct': answer_info.get('direct', False),
+                'question': user_input
+            })
+            
+            st.rerun()
+            
+    except SchedulerBusyError as e:
+        # 대기 없이 즉시 안내하고, 답변받지 못한 질문은 기록에서 제거
+        st.session_state.chat_history.pop()
+        st.warning(f"⏳ {str(e)}")
+    except Exception as e:
+        st.error(f"답변 생성 실패: {str(e)}")
+
+def process_detailed_answer(question):
+    """직접 답변을 받은 질문에 대해 LLM 상세 답변 생성"""
+    try:
+        with st.spinner("AI가 상세 답변을 생성 중..."):
+            with get_scheduler().slot(st.session_state.session_id, PRIORITY_INTERACTIVE):
+                response = st.session_state.ai_assistant.ask_question(
+                    question,
+                    st.session_state.documents,
+                    st.session_state.search_engine,
+                    memory=st.session_state.conversation_memory,
+                    allow_direct_answer=False
+                )
+            
+            # 직접 답변 표시를 해제하고 상세 답변 추가
+            st.session_state.chat_history[-1]['direct'] = False
             st.session_state.chat_history.append({
                 'role': 'assistant',
                 'content': response,
@@ -437,6 +609,8 @@ def process_chat_message(user_input):
             
             st.rerun()
             
+    except SchedulerBusyError as e:
+        st.warning(f"⏳ {str(e)}")
     except Exception as e:
         st.error(f"답변 생성 실패: {str(e)}")
 
@@ -479,6 +653,86 @@ def show_settings():
     st.write("**Azure AI Search 설정**")
     st.write(f"검색 키 설정됨: {'✅' if os.getenv('AZURE_SEARCH_API_KEY') else '❌'}")
     st.write(f"인덱스: {os.getenv('AZURE_SEARCH_INDEX_NAME', '설정되지 않음')}")
+    
+    st.write("**Azure OpenAI 요청 제한**")
+    limiter_stats = get_rate_limiter().get_stats()
+    st.write(f"한도: {limiter_stats['requests_per_minute']} RPM / {limiter_stats['tokens_per_minute']} TPM")
+    st.write(f"대기열: {limiter_stats['queue_depth']}건")
+    st.write(f"평균 대기: {limiter_stats['avg_wait_seconds']:.2f}초 (최대 {limiter_stats['max_wait_seconds']:.2f}초)")
+    
+    st.write("**요청 스케줄러**")
+    scheduler_stats = get_scheduler().get_stats()
+    st.write(f"실행 중: {scheduler_stats['running']}/{scheduler_stats['capacity']}건 "
+             f"(활성 세션 {scheduler_stats['active_sessions']}개)")
+    st.write(f"대기 중: 대화형 {scheduler_stats['waiting_interactive']}건 / "
+             f"백그라운드 {scheduler_stats['waiting_background']}건")
+    st.write(f"거절: {scheduler_stats['rejected']}건")
+    
+    assistant = st.session_state.get('ai_assistant')
+    if assistant and assistant.local_insights:
+        st.write("**로컬 키워드/분류**")
+        local_stats = assistant.local_insights.get_stats()
+        st.write(f"키워드: 로컬 {local_stats['keywords_local']}건 / LLM {local_stats['keywords_llm']}건")
+        st.write(f"분류: 로컬 {local_stats['classify_local']}건 / LLM {local_stats['classify_llm']}건 "
+                 f"(학습 문서 {local_stats['trained_examples']}개)")
+        st.write(f"LLM 호출 절감: {local_stats['avoided_ratio']:.0%}")
+    
+    show_usage_report()
+
+def show_usage_report():
+    """LLM 호출 사용량 보고서 (기능별/세션별) 및 JSONL 내보내기"""
+    st.write("**LLM 사용량**")
+    tracker = get_usage_tracker()
+    scope = st.radio("범위", ["현재 세션", "전체 세션"], horizontal=True, key="usage_scope")
+    session_id = st.session_state.session_id if scope == "현재 세션" else None
+    
+    feature_rows = tracker.summarize('feature', session_id)
+    if not feature_rows:
+        st.caption("아직 기록된 LLM 호출이 없습니다.")
+        return
+    
+    total_prompt = sum(row['prompt_tokens'] for row in feature_rows)
+    total_completion = sum(row['completion_tokens'] for row in feature_rows)
+    total_cached = sum(row['cached_tokens'] for row in feature_rows)
+    st.write(f"호출 {sum(row['calls'] for row in feature_rows)}건 · 프롬프트 {total_prompt:,} / 완성 {total_completion:,} 토큰 "
+             f"(캐시 {total_cached / max(total_prompt, 1):.0%})")
+    
+    st.caption("기능별")
+    # 첫 토큰 시간은 스트리밍 호출에서만 측정되므로 측정값이 있을 때만 표시
+    show_ttft = any(row['avg_ttft'] is not None for row in feature_rows)
+    feature_table = []
+    for row in feature_rows:
+        item = {
+            '기능': row['feature'],
+            '호출': row['calls'],
+            '오류': row['errors'],
+            '프롬프트': row['prompt_tokens'],
+            '완성': row['completion_tokens'],
+            '캐시 비율': f"{row['cached_ratio']:.0%}",
+            '평균 지연(초)': round(row['avg_latency'], 2),
+            'p95 지연(초)': round(row['p95_latency'], 2)
+        }
+        if show_ttft:
+            item['첫 토큰(초)'] = round(row['avg_ttft'], 2) if row['avg_ttft'] is not None else "-"
+        feature_table.append(item)
+    st.dataframe(feature_table, hide_index=True)
+    
+    if session_id is None:
+        st.caption("세션별")
+        st.dataframe([{
+            '세션': row['session_id'][:8],
+            '호출': row['calls'],
+            '프롬프트': row['prompt_tokens'],
+            '완성': row['completion_tokens'],
+            '평균 지연(초)': round(row['avg_latency'], 2)
+        } for row in tracker.summarize('session_id')], hide_index=True)
+    
+    st.download_button(
+        "📥 사용량 JSONL 내보내기",
+        data=tracker.to_jsonl(session_id),
+        file_name=f"llm_usage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+        mime="application/jsonl"
+    )
 
 if __name__ == "__main__":
     main()
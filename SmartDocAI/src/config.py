@@ -0,0 +1,81 @@
+"""
+설정 모듈
+환경 변수 기반 옵션 값을 읽는 헬퍼 함수 제공
+"""
+
+import os
+from typing import Optional
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """
+    불리언 환경 변수 읽기
+
+    Args:
+        name: 환경 변수 이름
+        default: 설정되지 않았을 때 기본값
+
+    Returns:
+        bool: 설정 값
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in _TRUE_VALUES
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    정수 환경 변수 읽기 (잘못된 값이면 기본값 사용)
+
+    Args:
+        name: 환경 변수 이름
+        default: 기본값
+
+    Returns:
+        int: 설정 값
+    """
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, '') else default
+    except ValueError:
+        print(f"환경 변수 {name} 값이 올바르지 않습니다: {value}")
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    실수 환경 변수 읽기 (잘못된 값이면 기본값 사용)
+
+    Args:
+        name: 환경 변수 이름
+        default: 기본값
+
+    Returns:
+        float: 설정 값
+    """
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, '') else default
+    except ValueError:
+        print(f"환경 변수 {name} 값이 올바르지 않습니다: {value}")
+        return default
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    문자열 환경 변수 읽기 (앞뒤 공백 제거)
+
+    Args:
+        name: 환경 변수 이름
+        default: 기본값
+
+    Returns:
+        Optional[str]: 설정 값
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip()
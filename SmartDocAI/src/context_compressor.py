@@ -0,0 +1,147 @@
+"""
+컨텍스트 압축 모듈
+검색된 문서 청크에서 질문과 관련된 문장만 추출하여 프롬프트 크기를 줄이는 기능 제공
+"""
+
+from typing import List, Dict, Tuple
+from text_analysis import tokenize, char_ngrams, split_sentences, count_tokens
+
+
+class ContextCompressor:
+    """질문 기반 추출형 컨텍스트 압축기 (추가 LLM 호출 없음)"""
+
+    def __init__(self, target_ratio: float = 0.5, window: int = 1,
+                 min_tokens: int = 150, term_weight: float = 0.7):
+        """
+        컨텍스트 압축기 초기화
+
+        Args:
+            target_ratio: 목표 압축 비율 (압축 후 토큰 수 / 원본 토큰 수)
+            window: 선택된 문장 앞뒤로 함께 포함할 문장 수
+            min_tokens: 문서별 최소 유지 토큰 수 (짧은 문서는 압축하지 않음)
+            term_weight: 단어 일치 점수 가중치 (나머지는 문자 bigram 일치 점수)
+        """
+        self.target_ratio = min(max(target_ratio, 0.05), 1.0)
+        self.window = max(window, 0)
+        self.min_tokens = min_tokens
+        self.term_weight = term_weight
+        self.last_stats = {'before_tokens': 0, 'after_tokens': 0}
+
+    def compress(self, question: str, documents: List[Dict]) -> List[Dict]:
+        """
+        관련 문서 리스트의 내용을 압축
+
+        Args:
+            question: 사용자 질문
+            documents: 관련 문서 리스트 (name, content 포함)
+
+        Returns:
+            List[Dict]: content가 압축된 문서 리스트 (원본은 변경하지 않음)
+        """
+        compressed_docs = []
+        total_before = 0
+        total_after = 0
+
+        for doc in documents:
+            compressed, before, after = self.compress_text(question, doc.get('content', ''))
+            total_before += before
+            total_after += after
+
+            doc_copy = doc.copy()
+            doc_copy['content'] = compressed
+            compressed_docs.append(doc_copy)
+
+        self.last_stats = {'before_tokens': total_before, 'after_tokens': total_after}
+        if total_before:
+            print(f"컨텍스트 압축: {total_before} → {total_after} 토큰 "
+                  f"({total_after / total_before:.0%})")
+
+        return compressed_docs
+
+    def compress_text(self, question: str, text: str) -> Tuple[str, int, int]:
+        """
+        단일 텍스트 압축
+
+        Args:
+            question: 사용자 질문
+            text: 압축할 텍스트
+
+        Returns:
+            Tuple[str, int, int]: (압축된 텍스트, 원본 토큰 수, 압축 후 토큰 수)
+        """
+        total_tokens = count_tokens(text)
+        if total_tokens <= self.min_tokens:
+            return text, total_tokens, total_tokens
+
+        spans = split_sentences(text)
+        if len(spans) <= 1:
+            return text, total_tokens, total_tokens
+
+        sentences = [text[start:end] for start, end in spans]
+        scores = self._score_sentences(question, sentences)
+        costs = [count_tokens(sentence) for sentence in sentences]
+        budget = max(int(total_tokens * self.target_ratio), self.min_tokens)
+
+        selected = self._select_sentences(scores, costs, budget)
+        if not selected:
+            return text, total_tokens, total_tokens
+
+        # 문서 순서대로 이어 붙이고, 떨어진 구간 사이에는 생략 표시
+        parts = []
+        previous = None
+        for idx in sorted(selected):
+            if previous is not None and idx != previous + 1:
+                parts.append("…")
+            parts.append(sentences[idx])
+            previous = idx
+
+        compressed = " ".join(parts)
+        return compressed, total_tokens, count_tokens(compressed)
+
+    def _score_sentences(self, question: str, sentences: List[str]) -> List[float]:
+        """질문과 각 문장의 어휘 일치 점수 계산"""
+        query_terms = set(tokenize(question))
+        query_grams = set(char_ngrams(question))
+
+        scores = []
+        for sentence in sentences:
+            term_score = 0.0
+            gram_score = 0.0
+            if query_terms:
+                sentence_terms = set(tokenize(sentence))
+                term_score = len(query_terms & sentence_terms) / len(query_terms)
+            if query_grams:
+                sentence_grams = set(char_ngrams(sentence))
+                gram_score = len(query_grams & sentence_grams) / len(query_grams)
+            scores.append(self.term_weight * term_score + (1 - self.term_weight) * gram_score)
+        return scores
+
+    def _select_sentences(self, scores: List[float], costs: List[int], budget: int) -> set:
+        """점수가 높은 문장과 주변 문장을 토큰 예산 내에서 선택"""
+        ranked = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+        selected = set()
+        used = 0
+
+        for idx in ranked:
+            if scores[idx] <= 0:
+                break
+            if idx in selected:
+                continue
+            if used + costs[idx] > budget:
+                continue
+
+            selected.add(idx)
+            used += costs[idx]
+
+            # 주변 문장은 예산이 허용하는 경우에만 포함
+            for offset in range(1, self.window + 1):
+                for neighbor in (idx - offset, idx + offset):
+                    if 0 <= neighbor < len(scores) and neighbor not in selected:
+                        if used + costs[neighbor] <= budget:
+                            selected.add(neighbor)
+                            used += costs[neighbor]
+
+            if used >= budget:
+                break
+
+        return selected
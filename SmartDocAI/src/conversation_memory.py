@@ -0,0 +1,172 @@
+"""
+대화 메모리 모듈
+최근 대화 버퍼와 이전 대화의 누적 요약을 고정된 토큰 예산 안에서 관리하는 기능 제공
+"""
+
+import re
+from typing import List, Dict
+from text_analysis import tokenize, count_tokens
+
+# 이전 대화를 참조하는 후속 질문 표현
+_FOLLOW_UP_PATTERN = re.compile(
+    r'^(그럼|그러면|그리고|그건|그거|그것|이건|이거|이것|저건|또|그래서|왜|더)|'
+    r'(첫|두|세|네|다섯)\s*번째|위에서|앞에서|방금|아까|해당|그\s|이\s'
+)
+
+
+class ConversationMemory:
+    """최근 대화 + 누적 요약 기반 대화 메모리"""
+
+    def __init__(self, token_budget: int = 1500, summary_tokens: int = 300, max_answer_tokens: int = 300):
+        """
+        대화 메모리 초기화
+
+        Args:
+            token_budget: 요약과 최근 대화를 합친 최대 토큰 수
+            summary_tokens: 누적 요약의 최대 토큰 수
+            max_answer_tokens: 최근 대화 버퍼에 보관할 답변당 최대 토큰 수
+        """
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.max_answer_tokens = max_answer_tokens
+
+        self.summary = ""
+        self.turns: List[Dict] = []
+        self.pending_summary: List[Dict] = []
+
+        # 직전 질문에서 사용한 검색 결과 (후속 질문 재사용용)
+        self.last_documents: List[Dict] = []
+
+    def is_empty(self) -> bool:
+        """저장된 대화가 없는지 확인"""
+        return not self.turns and not self.summary
+
+    def is_follow_up(self, question: str) -> bool:
+        """
+        이전 대화를 참조하는 후속 질문인지 판단
+
+        Args:
+            question: 사용자 질문
+
+        Returns:
+            bool: 후속 질문 여부
+        """
+        if self.is_empty():
+            return False
+        stripped = question.strip()
+        # 지시 표현이 있거나 핵심어가 거의 없는 짧은 질문
+        return bool(_FOLLOW_UP_PATTERN.search(stripped)) or len(tokenize(stripped)) <= 1
+
+    def should_reuse_documents(self, query: str, min_coverage: float = 0.5) -> bool:
+        """
+        직전 검색 결과로 질문에 답할 수 있는지 판단
+
+        Args:
+            query: 독립형으로 재작성된 질문
+            min_coverage: 직전 결과가 포함해야 하는 질문 핵심어 비율
+
+        Returns:
+            bool: 직전 검색 결과 재사용 여부
+        """
+        if not self.last_documents:
+            return False
+        terms = set(tokenize(query))
+        if not terms:
+            return True
+        content = " ".join(doc.get('content', '') for doc in self.last_documents)
+        content_terms = set(tokenize(content))
+        return len(terms & content_terms) / len(terms) >= min_coverage
+
+    def add_turn(self, question: str, answer: str, documents: List[Dict] = None):
+        """
+        대화 한 턴 추가 후 예산을 넘는 오래된 턴은 요약 대기열로 이동
+
+        Args:
+            question: 사용자 질문
+            answer: AI 답변
+            documents: 답변에 사용한 검색 결과
+        """
+        self.turns.append({'role': 'user', 'content': question})
+        self.turns.append({'role': 'assistant', 'content': self._truncate(answer, self.max_answer_tokens)})
+        if documents is not None:
+            self.last_documents = documents
+
+        recent_budget = self.token_budget - self.summary_tokens
+        while len(self.turns) > 2 and self._turns_tokens() > recent_budget:
+            # 가장 오래된 질문/답변 쌍을 요약 대상으로 이동
+            self.pending_summary.extend(self.turns[:2])
+            self.turns = self.turns[2:]
+
+    def needs_summarization(self) -> bool:
+        """요약에 반영할 오래된 턴이 있는지 확인"""
+        return bool(self.pending_summary)
+
+    def take_pending_turns(self) -> List[Dict]:
+        """
+        요약 대기 턴을 꺼내고 대기열 비우기
+
+        Returns:
+            List[Dict]: 요약할 대화 턴 리스트
+        """
+        pending = self.pending_summary
+        self.pending_summary = []
+        return pending
+
+    def update_summary(self, summary: str):
+        """
+        누적 요약 갱신 (요약 예산을 넘으면 잘라냄)
+
+        Args:
+            summary: 새 누적 요약
+        """
+        self.summary = self._truncate(summary.strip(), self.summary_tokens)
+
+    def get_history_messages(self) -> List[Dict]:
+        """
+        프롬프트에 포함할 대화 메시지 반환
+
+        Returns:
+            List[Dict]: 누적 요약(시스템 메시지) + 최근 대화 메시지 리스트
+        """
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"이전 대화 요약:\n{self.summary}"})
+        messages.extend({"role": turn['role'], "content": turn['content']} for turn in self.turns)
+        return messages
+
+    def format_recent_turns(self, max_turns: int = 4) -> str:
+        """
+        질문 재작성용 최근 대화 텍스트 반환
+
+        Args:
+            max_turns: 포함할 최대 메시지 수
+
+        Returns:
+            str: "사용자: ... / AI: ..." 형식의 대화 텍스트
+        """
+        lines = []
+        for turn in self.turns[-max_turns:]:
+            speaker = "사용자" if turn['role'] == 'user' else "AI"
+            lines.append(f"{speaker}: {self._truncate(turn['content'], 150)}")
+        return "\n".join(lines)
+
+    def clear(self):
+        """대화 메모리 초기화"""
+        self.summary = ""
+        self.turns = []
+        self.pending_summary = []
+        self.last_documents = []
+
+    def _turns_tokens(self) -> int:
+        """최근 대화 버퍼의 토큰 수"""
+        return sum(count_tokens(turn['content']) + 4 for turn in self.turns)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """토큰 예산에 맞게 텍스트 자르기"""
+        if count_tokens(text) <= max_tokens:
+            return text
+        # 토큰/문자 비율로 근사하여 자른 뒤 예산 안으로 들어올 때까지 줄임
+        cut = int(len(text) * max_tokens / max(count_tokens(text), 1))
+        while cut > 0 and count_tokens(text[:cut]) > max_tokens:
+            cut = int(cut * 0.9)
+        return text[:cut] + "…"
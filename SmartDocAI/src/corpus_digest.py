@@ -0,0 +1,237 @@
+"""
+코퍼스 다이제스트 모듈
+업로드된 전체 문서를 주제별로 묶어 병렬 요약(map)과 계층적 통합(reduce)으로
+하나의 다이제스트를 만들고, 문서가 추가되면 바뀐 주제만 다시 계산하는 기능 제공
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from insight_cache import content_hash
+from local_insights import normalize_category
+from text_analysis import count_tokens
+
+# 주제 그룹에 포함된 문서가 이 수 이하로 늘어나면 기존 그룹 요약에 새 요약만 합침
+_MAX_INCREMENTAL_ADDITIONS = 3
+
+
+def _members_key(hashes: List[str]) -> str:
+    """문서 해시 집합의 식별자"""
+    return hashlib.sha256('|'.join(sorted(hashes)).encode('utf-8')).hexdigest()[:16]
+
+
+class CorpusDigestBuilder:
+    """주제별 map-reduce 코퍼스 다이제스트 생성기"""
+
+    def __init__(self, assistant, filepath: str, max_workers: int = 4, batch_tokens: int = 3000):
+        """
+        다이제스트 생성기 초기화
+
+        Args:
+            assistant: 요약/분류/통합 요약에 사용할 AIAssistant
+            filepath: 다이제스트 상태 저장 파일 경로
+            max_workers: 병렬 요약/통합 작업 수
+            batch_tokens: 한 번의 통합 요약에 넣을 최대 입력 토큰 수
+        """
+        self.assistant = assistant
+        self.filepath = filepath
+        self.max_workers = max_workers
+        self.batch_tokens = batch_tokens
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> Dict:
+        """저장된 상태 로드"""
+        try:
+            if os.path.exists(self.filepath):
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"다이제스트 상태 로드 실패: {str(e)}")
+        return {'summaries': {}, 'scopes': {}}
+
+    def _save(self):
+        """상태 저장 (임시 파일 교체 방식)"""
+        try:
+            temp_path = f"{self.filepath}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.filepath)
+        except Exception as e:
+            print(f"다이제스트 상태 저장 실패: {str(e)}")
+
+    def build(self, documents: List[Dict], scope: str = 'all') -> Dict:
+        """
+        다이제스트 생성 (바뀌지 않은 문서 요약과 주제 요약은 재사용)
+
+        Args:
+            documents: 요약할 문서 리스트
+            scope: 다이제스트 범위 이름 (범위별로 주제 요약을 따로 저장, 예: 'all', 'week')
+
+        Returns:
+            Dict: digest(마크다운), topics(주제별 요약), 재사용/계산 통계 또는 error
+        """
+        started = time.perf_counter()
+        stats = {'summaries_reused': 0, 'summaries_computed': 0, 'topics_reused': 0,
+                 'topics_updated': 0, 'topics_rebuilt': 0, 'skipped': 0}
+
+        documents = [doc for doc in documents if doc.get('content')]
+        if not documents:
+            return {'error': "요약할 문서가 없습니다."}
+
+        try:
+            # 1) map: 문서별 요약과 주제를 병렬로 준비
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                entries = list(executor.map(lambda doc: self._document_entry(doc, stats), documents))
+            entries = [entry for entry in entries if entry]
+            if not entries:
+                return {'error': "문서 요약을 생성하지 못했습니다."}
+
+            topics: Dict[str, List[Dict]] = {}
+            for entry in entries:
+                topics.setdefault(entry['topic'], []).append(entry)
+
+            # 2) reduce: 주제별 요약 (바뀐 주제만 다시 계산)
+            scope_state = self._state['scopes'].setdefault(scope, {'topics': {}, 'digest': None})
+            topic_names = sorted(topics)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                summaries = list(executor.map(
+                    lambda topic: self._topic_summary(topic, topics[topic], scope_state['topics'], stats),
+                    topic_names
+                ))
+            topic_summaries = dict(zip(topic_names, summaries))
+
+            # 3) 주제 요약을 모아 전체 개요 생성 (주제 구성이 같으면 재사용)
+            digest_key = _members_key([scope_state['topics'][topic]['key'] for topic in topic_names])
+            digest_state = scope_state.get('digest')
+            if digest_state and digest_state['key'] == digest_key:
+                overview = digest_state['overview']
+            else:
+                overview = self._reduce('전체 문서', [f"[{topic}]\n{topic_summaries[topic]}" for topic in topic_names])
+                scope_state['digest'] = {'key': digest_key, 'overview': overview}
+
+            # 문서 목록에 없는 주제는 범위 상태에서 제거
+            for topic in list(scope_state['topics']):
+                if topic not in topics:
+                    del scope_state['topics'][topic]
+
+            with self._lock:
+                scope_state['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self._save()
+
+        except Exception as e:
+            print(f"다이제스트 생성 실패: {str(e)}")
+            return {'error': f"다이제스트 생성 실패: {str(e)}"}
+
+        sections = [f"## 개요\n{overview}"]
+        for topic in topic_names:
+            names = ', '.join(entry['name'] for entry in topics[topic])
+            sections.append(f"## {topic} ({len(topics[topic])}개 문서)\n*{names}*\n\n{topic_summaries[topic]}")
+
+        stats['elapsed'] = time.perf_counter() - started
+        return {
+            'digest': '\n\n'.join(sections),
+            'topics': topic_summaries,
+            'documents': len(entries),
+            'stats': stats
+        }
+
+    def _document_entry(self, document: Dict, stats: Dict) -> Optional[Dict]:
+        """문서 요약과 주제 (저장된 요약/인사이트가 있으면 재사용)"""
+        digest = document.get('content_hash') or content_hash(document['content'])
+
+        with self._lock:
+            saved = self._state['summaries'].get(digest)
+        if saved:
+            with self._lock:
+                stats['summaries_reused'] += 1
+            return {'hash': digest, 'name': document['name'], **saved}
+
+        cached = self.assistant.get_cached_insights(document)
+        if cached:
+            summary, category = cached['summary'], cached['category']
+            reused = True
+        else:
+            summary = self.assistant.summarize_document(document)
+            category = self.assistant.classify_document(document)
+            reused = False
+
+        if summary.startswith("문서 요약 생성 실패"):
+            with self._lock:
+                stats['skipped'] += 1
+            return None
+
+        saved = {'summary': summary, 'topic': normalize_category(category) or '일반'}
+        with self._lock:
+            self._state['summaries'][digest] = saved
+            stats['summaries_reused' if reused else 'summaries_computed'] += 1
+        return {'hash': digest, 'name': document['name'], **saved}
+
+    def _topic_summary(self, topic: str, entries: List[Dict], topic_states: Dict, stats: Dict) -> str:
+        """
+        주제 요약 (구성 문서가 같으면 재사용, 소수 추가면 기존 요약에 합침, 그 외에는 다시 계산)
+        """
+        hashes = [entry['hash'] for entry in entries]
+        key = _members_key(hashes)
+        with self._lock:
+            previous = topic_states.get(topic)
+
+        if previous and previous['key'] == key:
+            with self._lock:
+                stats['topics_reused'] += 1
+            return previous['summary']
+
+        previous_members = set(previous['members']) if previous else set()
+        added = [entry for entry in entries if entry['hash'] not in previous_members]
+        if previous and previous_members <= set(hashes) and len(added) <= _MAX_INCREMENTAL_ADDITIONS:
+            summary = self._reduce(topic, [previous['summary']] + [self._format_entry(entry) for entry in added])
+            stat_key = 'topics_updated'
+        else:
+            summary = self._reduce(topic, [self._format_entry(entry) for entry in entries])
+            stat_key = 'topics_rebuilt'
+
+        with self._lock:
+            topic_states[topic] = {'key': key, 'members': hashes, 'summary': summary}
+            stats[stat_key] += 1
+        return summary
+
+    @staticmethod
+    def _format_entry(entry: Dict) -> str:
+        return f"[{entry['name']}]\n{entry['summary']}"
+
+    def _reduce(self, topic: str, texts: List[str]) -> str:
+        """
+        요약들을 토큰 예산 단위로 묶어 통합하고, 결과가 여러 개면 다시 통합 (계층적 reduce)
+
+        Args:
+            topic: 주제 이름
+            texts: 통합할 요약 리스트
+
+        Returns:
+            str: 통합 요약
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+        for text in texts:
+            tokens = count_tokens(text)
+            # 한 묶음에 최소 두 개를 넣어 단계마다 요약 수가 줄어들도록 보장
+            if len(current) >= 2 and current_tokens + tokens > self.batch_tokens:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+
+        if len(batches) == 1:
+            return self.assistant.combine_summaries(topic, batches[0])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            partials = list(executor.map(lambda batch: self.assistant.combine_summaries(topic, batch), batches))
+        return self._reduce(topic, partials)
@@ -0,0 +1,208 @@
+"""
+직접 답변 모듈
+짧은 사실형 질문에 대해 LLM 호출 없이 문서의 한 문장을 답으로 돌려주는 기능 제공
+"""
+
+import re
+from typing import Dict, List, Optional
+from text_analysis import tokenize, split_sentences
+
+# 사실형 질문 표현 (날짜, 수량, 사람, 장소, 이름 등)
+_FACTOID_PATTERN = re.compile(
+    r'언제|며칠|몇|얼마|누구|어디|마감|기한|날짜|일정|일자|시간|금액|비용|가격|인원|'
+    r'이름|명칭|주소|연락처|전화|이메일|담당자|위치|장소|버전|\b(when|who|where|how many|how much)\b',
+    re.IGNORECASE
+)
+
+# 설명/분석형 질문 표현 (LLM 답변이 필요한 경우)
+_EXPLANATORY_PATTERN = re.compile(r'왜|어떻게|설명|요약|비교|분석|차이|장단점|방법|의견|추천|정리|why|how to|explain', re.IGNORECASE)
+
+# 숫자/날짜 답이 기대되는 질문
+_NUMERIC_QUESTION = re.compile(r'언제|며칠|몇|얼마|마감|기한|날짜|일정|일자|시간|금액|비용|가격|인원|버전', re.IGNORECASE)
+_NUMERIC_ANSWER = re.compile(r'\d')
+
+# 답이 아직 정해지지 않았음을 나타내는 표현 (숫자가 있어도 답이 아닌 문장)
+_HEDGE_PATTERN = re.compile(
+    r'추후|미정|미확정|확정되지|결정되지|변경될\s*수|검토\s*중|협의\s*중|(공지|안내)\s*예정|별도\s*(공지|안내)|\bTBD\b',
+    re.IGNORECASE
+)
+
+
+def is_factoid_question(question: str, max_length: int = 40) -> bool:
+    """
+    짧은 사실형 질문인지 판단
+
+    Args:
+        question: 사용자 질문
+        max_length: 사실형으로 볼 최대 질문 길이 (문자 수)
+
+    Returns:
+        bool: 사실형 질문 여부
+    """
+    stripped = question.strip()
+    if not stripped or len(stripped) > max_length:
+        return False
+    if _EXPLANATORY_PATTERN.search(stripped):
+        return False
+    return bool(_FACTOID_PATTERN.search(stripped))
+
+
+class DirectAnswerFinder:
+    """검색 서비스의 시맨틱 답변/캡션 또는 로컬 문장 점수 기반 직접 답변 탐색기"""
+
+    def __init__(self, min_confidence: float = 0.75, service_min_score: float = 0.9,
+                 max_answer_chars: int = 300, window: int = 3):
+        """
+        직접 답변 탐색기 초기화
+
+        Args:
+            min_confidence: 로컬 문장 점수의 최소 신뢰도 (0~1)
+            service_min_score: Azure 시맨틱 답변의 최소 점수 (0~1)
+            max_answer_chars: 답변으로 사용할 문장의 최대 길이
+            window: 답 유형 토큰과 질문 단어 사이의 최대 토큰 거리
+        """
+        self.min_confidence = min_confidence
+        self.service_min_score = service_min_score
+        self.max_answer_chars = max_answer_chars
+        self.window = window
+
+    def find(self, question: str, documents: List[Dict], search_engine=None) -> Optional[Dict]:
+        """
+        신뢰도 높은 추출형 답변 찾기
+
+        Args:
+            question: 사용자 질문
+            documents: 전체 문서 리스트 (검색 엔진이 없을 때 사용)
+            search_engine: 검색 엔진 (선택사항)
+
+        Returns:
+            Optional[Dict]: {'answer', 'source', 'confidence', 'method'} 또는 None
+        """
+        passages = []
+
+        if search_engine:
+            try:
+                response = search_engine.semantic_answers(question, top_k=3)
+            except Exception as e:
+                print(f"시맨틱 답변 검색 실패: {str(e)}")
+                response = {'answers': [], 'results': []}
+
+            # 1) 서비스 측 추출형 답변
+            for answer in response['answers']:
+                if answer['score'] >= self.service_min_score and answer['text']:
+                    return {
+                        'answer': answer['text'].strip(),
+                        'source': answer['source'],
+                        'confidence': answer['score'],
+                        'method': 'semantic_answer'
+                    }
+
+            # 2) 캡션과 검색 결과 본문을 로컬 문장 점수 대상으로 사용
+            for result in response['results']:
+                for caption in result.get('captions', []):
+                    passages.append((caption, result.get('source', '')))
+                passages.append((result.get('content', ''), result.get('source', '')))
+        else:
+            passages = [(doc.get('content', ''), doc.get('name', '')) for doc in documents]
+
+        return self.find_in_passages(question, passages)
+
+    def find_in_passages(self, question: str, passages: List[tuple]) -> Optional[Dict]:
+        """
+        본문 문장을 질문과 비교하여 가장 답에 가까운 문장 선택
+
+        Args:
+            question: 사용자 질문
+            passages: (본문, 출처) 튜플 리스트
+
+        Returns:
+            Optional[Dict]: 신뢰도가 기준 이상이면 답변 딕셔너리, 아니면 None
+        """
+        query_terms = set(tokenize(question))
+        if not query_terms:
+            return None
+        expects_number = bool(_NUMERIC_QUESTION.search(question))
+
+        candidates = []
+        for text, source in passages:
+            for start, end in split_sentences(text):
+                if end - start > self.max_answer_chars:
+                    continue
+                sentence = text[start:end]
+                sentence_terms = tokenize(sentence)
+                if not sentence_terms:
+                    continue
+                score = self._sentence_score(query_terms, sentence_terms, expects_number)
+                if score == 0:
+                    continue
+                if _HEDGE_PATTERN.search(sentence):
+                    score *= 0.5
+                candidates.append((score, sentence, source))
+
+        if not candidates:
+            return None
+
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        best_score, best_sentence, best_source = candidates[0]
+
+        # 서로 다른 내용의 문장이 비슷한 점수면 모호하므로 LLM에 맡김
+        for score, sentence, _ in candidates[1:]:
+            if sentence != best_sentence:
+                if best_score - score < 0.1:
+                    best_score *= 0.8
+                break
+
+        if best_score < self.min_confidence:
+            return None
+
+        return {
+            'answer': best_sentence.strip(),
+            'source': best_source,
+            'confidence': best_score,
+            'method': 'local_sentence'
+        }
+
+    def _sentence_score(self, query_terms: set, sentence_terms: List[str], expects_number: bool) -> float:
+        """
+        문장 하나의 답변 점수 (질문 단어 포함 비율 × 답 유형 근접 여부 × 답 구간 비중)
+
+        답 유형 토큰(숫자 질문이면 숫자, 아니면 질문에 없는 단어)은 일치한 질문 단어에서 window 토큰 이내에
+        있어야 하며, 질문 단어와 답 구간이 문장에서 차지하는 비율이 낮으면(나머지 내용이 많으면) 점수를 낮춤
+
+        Args:
+            query_terms: 질문 토큰 집합
+            sentence_terms: 문장 토큰 리스트
+            expects_number: 숫자/날짜 답이 기대되는지 여부
+
+        Returns:
+            float: 0~1 점수 (질문 단어가 하나도 없으면 0)
+        """
+        # 어간 접두 일치로 조사가 붙은 형태도 포함
+        matched_positions = [index for index, token in enumerate(sentence_terms)
+                             if any(token.startswith(term) for term in query_terms)]
+        if not matched_positions:
+            return 0.0
+        matched = sum(1 for term in query_terms if any(token.startswith(term) for token in sentence_terms))
+        coverage = matched / len(query_terms)
+
+        # 질문 단어 가까이에 있는 답 유형 토큰
+        matched_set = set(matched_positions)
+        answer_positions = [index for index, token in enumerate(sentence_terms)
+                            if index not in matched_set and token not in query_terms
+                            and (not expects_number or _NUMERIC_ANSWER.search(token))]
+        nearby = [index for index in answer_positions
+                  if min(abs(index - position) for position in matched_positions) <= self.window]
+        if not nearby:
+            # 답 유형이 맞지 않거나 질문 단어와 멀리 떨어진 문장 (새 정보가 아예 없으면 더 낮게)
+            return coverage * (0.5 if answer_positions else 0.3)
+
+        # 답 구간: 가장 가까운 답 토큰부터 이어지는 숫자/단위 토큰까지 (예: 2024 년 3 월 15 일)
+        answer = min(nearby, key=lambda index: min(abs(index - position) for position in matched_positions))
+        answer_end = answer
+        while (answer_end + 1 < len(sentence_terms) and answer_end + 1 not in matched_set
+               and (_NUMERIC_ANSWER.search(sentence_terms[answer_end + 1]) or len(sentence_terms[answer_end + 1]) == 1)):
+            answer_end += 1
+        span_start = min(matched_positions[0], answer)
+        span_end = max(matched_positions[-1], answer_end)
+        focus = (span_end - span_start + 1) / len(sentence_terms)
+        return coverage * (0.7 + 0.3 * focus)
@@ -0,0 +1,309 @@
+"""
+문서 요약 인덱스 모듈
+문서 단위 대표 벡터와 키워드로 관련 문서를 먼저 고르고(1단계),
+선택된 문서의 청크만 검색하는(2단계) 두 단계 검색 기능 제공
+"""
+
+import math
+import time
+import zlib
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from text_analysis import tokenize, char_ngrams, split_sentences
+from local_insights import CorpusStats, KeywordExtractor, MAX_ANALYZED_CHARS
+from reranker import LexicalReranker
+from segments import SegmentTable
+
+# 2단계 검색을 실행할 공유 스레드 (예산 초과 시 결과를 기다리지 않기 위함)
+_stage_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="two-stage")
+
+
+def chunk_spans(content: str, chunk_chars: int = 1500,
+                segments: Optional[SegmentTable] = None) -> List[Tuple[int, int]]:
+    """
+    문장 경계를 지키며 본문을 일정 길이 청크 범위로 분할 (로컬 청크 검색용)
+
+    세그먼트 테이블이 있으면 청크가 절반 이상 찬 뒤 새 페이지/슬라이드/시트가 시작될 때도 분할
+
+    Args:
+        content: 문서 내용
+        chunk_chars: 청크 최대 문자 수
+        segments: extract_content의 세그먼트 테이블
+
+    Returns:
+        List[Tuple[int, int]]: 청크별 (시작 오프셋, 끝 오프셋) 리스트
+    """
+    spans = []
+    chunk_start = None
+    chunk_end = 0
+    chunk_segment = 0
+    for start, end in split_sentences(content):
+        segment = segments.locate(start) if segments else 0
+        if chunk_start is None:
+            chunk_start = start
+        elif end - chunk_start > chunk_chars or (segment != chunk_segment and
+                                                 chunk_end - chunk_start >= chunk_chars // 2):
+            spans.append((chunk_start, chunk_end))
+            chunk_start = start
+        chunk_end = end
+        chunk_segment = segment
+    if chunk_start is not None:
+        spans.append((chunk_start, chunk_end))
+    return spans
+
+
+def chunk_text(content: str, chunk_chars: int = 1500, segments: Optional[SegmentTable] = None) -> List[str]:
+    """
+    문장 경계를 지키며 본문을 일정 길이 청크로 분할 (로컬 청크 검색용)
+
+    Args:
+        content: 문서 내용
+        chunk_chars: 청크 최대 문자 수
+        segments: extract_content의 세그먼트 테이블
+
+    Returns:
+        List[str]: 청크 리스트
+    """
+    return _chunk_texts(content, chunk_spans(content, chunk_chars, segments), segments)
+
+
+def _chunk_texts(content: str, spans: List[Tuple[int, int]], segments: Optional[SegmentTable]) -> List[str]:
+    """청크 범위를 텍스트로 변환 (표 행 묶음 중간에서 시작하는 청크에는 표 헤더를 붙임)"""
+    if not segments:
+        return [content[start:end] for start, end in spans]
+    return [segments.header_for(content, start) + content[start:end] for start, end in spans]
+
+
+class DocumentSummaryIndex:
+    """문서 단위 해싱 TF-IDF 대표 벡터 + 키워드 인덱스"""
+
+    def __init__(self, dim: int = 4096, num_keywords: int = 30, chunk_chars: int = 1500,
+                 keyword_weight: float = 0.3):
+        """
+        문서 인덱스 초기화
+
+        Args:
+            dim: 대표 벡터 차원 (단어 + 문자 2-gram 해싱)
+            num_keywords: 문서별로 저장할 키워드 수
+            chunk_chars: 로컬 청크 최대 문자 수
+            keyword_weight: 문서 점수에서 키워드 일치율 비중 (나머지는 벡터 유사도)
+        """
+        self.dim = dim
+        self.num_keywords = num_keywords
+        self.chunk_chars = chunk_chars
+        self.keyword_weight = keyword_weight
+
+        self.corpus = CorpusStats()
+        self.names: List[str] = []
+        self.keywords: List[frozenset] = []
+        self.chunks: List[List[str]] = []
+        # 출처 위치 표시용 (문서별 세그먼트 테이블과 청크 시작 오프셋)
+        self.segments: List[Optional[SegmentTable]] = []
+        self.chunk_starts: List[array] = []
+        self.chunk_ends: List[array] = []
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_chunks(self) -> int:
+        return sum(len(chunks) for chunks in self.chunks)
+
+    def build(self, documents: List[Dict]):
+        """
+        업로드된 문서로 인덱스 생성
+
+        Args:
+            documents: 문서 리스트 (name, content 포함)
+        """
+        started = time.perf_counter()
+        documents = [doc for doc in documents if doc.get('content')]
+        self.corpus = CorpusStats.from_documents(documents)
+        extractor = KeywordExtractor(self.corpus)
+
+        self.names = [doc['name'] for doc in documents]
+        self.keywords = [frozenset(keyword for keyword, _ in extractor.extract(doc['content'], self.num_keywords))
+                         for doc in documents]
+        self.segments = [doc.get('segments') for doc in documents]
+        self.chunks = []
+        self.chunk_starts = []
+        self.chunk_ends = []
+        for doc, segments in zip(documents, self.segments):
+            spans = chunk_spans(doc['content'], self.chunk_chars, segments)
+            self.chunks.append(_chunk_texts(doc['content'], spans, segments))
+            self.chunk_starts.append(array('q', (start for start, _ in spans)))
+            self.chunk_ends.append(array('q', (end for _, end in spans)))
+        self.vectors = (np.vstack([self._vectorize(doc['content'][:MAX_ANALYZED_CHARS]) for doc in documents])
+                        if documents else np.zeros((0, self.dim), dtype=np.float32))
+
+        print(f"문서 인덱스 생성: 문서 {len(self.names)}개, 청크 {self.num_chunks}개 "
+              f"({(time.perf_counter() - started) * 1000:.0f}ms)")
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        """L2 정규화된 해싱 TF-IDF 벡터"""
+        words = Counter(tokenize(text))
+        indices = []
+        weights = []
+        for word, count in words.items():
+            weight = (1 + math.log(count)) * self.corpus.word_idf(word)
+            indices.append(zlib.crc32(('w:' + word).encode('utf-8')) % self.dim)
+            weights.append(weight)
+            # 문자 2-gram으로 조사/복합어 변형도 일부 일치
+            for gram in char_ngrams(word, 2):
+                indices.append(zlib.crc32(('c:' + gram).encode('utf-8')) % self.dim)
+                weights.append(0.5 * weight)
+
+        if not indices:
+            return np.zeros(self.dim, dtype=np.float32)
+        vector = np.bincount(np.asarray(indices, dtype=np.int64), weights=weights, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).astype(np.float32)
+
+    def select_documents(self, query: str, top_m: int = 5) -> List[Tuple[int, float]]:
+        """
+        1단계: 질의와 관련된 상위 문서 선택
+
+        Args:
+            query: 검색 질의
+            top_m: 선택할 문서 수
+
+        Returns:
+            List[Tuple[int, float]]: (문서 번호, 점수) 리스트
+        """
+        if not self.names:
+            return []
+
+        similarities = self.vectors @ self._vectorize(query)
+        query_terms = set(tokenize(query))
+        if query_terms:
+            overlap = np.fromiter((len(query_terms & keywords) / len(query_terms) for keywords in self.keywords),
+                                  dtype=np.float32, count=len(self.keywords))
+            scores = (1 - self.keyword_weight) * similarities + self.keyword_weight * overlap
+        else:
+            scores = similarities
+
+        top_m = min(top_m, len(self.names))
+        candidates = np.argpartition(-scores, top_m - 1)[:top_m]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(idx), float(scores[idx])) for idx in order if scores[idx] > 0]
+
+    def location(self, doc_idx: int, chunk_idx: int) -> str:
+        """
+        청크의 출처 위치 표시 (예: '3페이지', '슬라이드 2~3')
+
+        Args:
+            doc_idx: 문서 번호
+            chunk_idx: 청크 번호
+
+        Returns:
+            str: 위치 표시 (세그먼트 정보가 없으면 빈 문자열)
+        """
+        segments = self.segments[doc_idx]
+        if not segments:
+            return ""
+        return segments.label_range(self.chunk_starts[doc_idx][chunk_idx], self.chunk_ends[doc_idx][chunk_idx])
+
+    def search_chunks(self, query: str, doc_indices: List[int], top_k: int = 5,
+                      reranker: Optional[LexicalReranker] = None) -> List[Dict]:
+        """
+        2단계(로컬): 선택된 문서의 청크만 대상으로 검색
+
+        Args:
+            query: 검색 질의
+            doc_indices: 1단계에서 선택된 문서 번호 리스트
+            top_k: 반환할 청크 수
+            reranker: 청크 점수 계산기 (기본값: LexicalReranker())
+
+        Returns:
+            List[Dict]: 검색 결과 리스트 (title, content, source, chunk_index, location, score)
+        """
+        candidates = []
+        for doc_idx in doc_indices:
+            for chunk_idx, chunk in enumerate(self.chunks[doc_idx]):
+                candidates.append({
+                    'title': self.names[doc_idx],
+                    'content': chunk,
+                    'source': self.names[doc_idx],
+                    'chunk_index': chunk_idx,
+                    'score': 0
+                })
+        results = (reranker or LexicalReranker()).rerank(query, candidates, top_k)
+        doc_by_name = {self.names[doc_idx]: doc_idx for doc_idx in doc_indices}
+        for result in results:
+            result['score'] = result['rerank_score']
+            result['location'] = self.location(doc_by_name[result['source']], result['chunk_index'])
+        return results
+
+
+class TwoStageRetriever:
+    """문서 선택 → 청크 검색 두 단계 검색기 (두 단계 합산 지연 시간 예산 적용)"""
+
+    def __init__(self, index: DocumentSummaryIndex, search_engine=None,
+                 top_documents: int = 5, budget_ms: float = 1500):
+        """
+        두 단계 검색기 초기화
+
+        Args:
+            index: 문서 요약 인덱스
+            search_engine: Azure AI Search 엔진 (없으면 로컬 청크 검색)
+            top_documents: 1단계에서 선택할 문서 수
+            budget_ms: 두 단계 전체 지연 시간 예산 (밀리초)
+        """
+        self.index = index
+        self.search_engine = search_engine
+        self.top_documents = top_documents
+        self.budget_ms = budget_ms
+        self.reranker = LexicalReranker()
+        self.last_stats = {}
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        두 단계 검색 실행
+
+        Azure 검색이 남은 예산 안에 끝나지 않거나 결과가 없으면
+        선택된 문서의 로컬 청크 검색 결과를 반환
+
+        Args:
+            query: 검색 질의
+            top_k: 반환할 결과 수
+
+        Returns:
+            List[Dict]: 검색 결과 리스트
+        """
+        started = time.perf_counter()
+        selected = self.index.select_documents(query, self.top_documents)
+        stage1_ms = (time.perf_counter() - started) * 1000
+        doc_indices = [doc_idx for doc_idx, _ in selected]
+        sources = [self.index.names[doc_idx] for doc_idx in doc_indices]
+
+        results = []
+        mode = 'local'
+        if self.search_engine and sources:
+            remaining = max(self.budget_ms - stage1_ms, 0) / 1000
+            future = _stage_executor.submit(self.search_engine.hybrid_search, query, top_k, sources)
+            try:
+                results = future.result(timeout=remaining)
+                mode = 'azure'
+            except FutureTimeoutError:
+                print(f"2단계 검색 예산 초과 ({self.budget_ms:.0f}ms), 로컬 청크 검색으로 대체")
+                mode = 'timeout'
+            except Exception as e:
+                print(f"2단계 검색 실패, 로컬 청크 검색으로 대체: {str(e)}")
+                mode = 'error'
+
+        if not results and doc_indices:
+            results = self.index.search_chunks(query, doc_indices, top_k, self.reranker)
+            if mode == 'azure':
+                mode = 'local'
+
+        self.last_stats = {
+            'documents': sources,
+            'stage1_ms': stage1_ms,
+            'total_ms': (time.perf_counter() - started) * 1000,
+            'mode': mode
+        }
+        return results
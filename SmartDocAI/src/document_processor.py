@@ -5,14 +5,21 @@ PDF, Word, 텍스트, Excel, PowerPoint 파일에서 내용을 추출하는 기
 
 import io
 import os
-from typing import Union, List, Dict
-import PyPDF2
+from typing import Union, List, Dict, Iterator, Tuple, Callable, Optional
 import docx
-import pandas as pd
 from pptx import Presentation
-import olefile
 import nbformat
 from streamlit.runtime.uploaded_file_manager import UploadedFile
+from pdf_extraction import iter_pdf_pages, select_pdf_backend
+from excel_extraction import write_workbook
+from hwp_extraction import write_hwp
+from ooxml_extraction import write_docx, write_pptx
+from notebook_extraction import load_notebook_cells, write_notebook_cells
+from table_format import get_table_format, markdown_table
+from config import env_flag, env_int
+from tabular_query import get_table_store
+from segments import (SegmentBuilder, SegmentTable, single_segment, KIND_PAGE, KIND_SLIDE,
+                      KIND_PARAGRAPH, KIND_TABLE)
 try:
     import hwp5
     HWP5_AVAILABLE = True
@@ -24,95 +31,160 @@ class DocumentProcessor:
     
     def __init__(self):
         self.supported_formats = ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.ppt', '.pptx', '.hwp', '.ipynb']
+        # PDF 텍스트 백엔드 (SMARTDOC_PDF_BACKEND 또는 벤치마크 결과로 선택, 첫 PDF 처리 시 결정)
+        self.pdf_backend = None
+        # Excel 시트당 행/셀 제한과 셀 값 최대 문자 수 (0이면 제한 없음)
+        self.excel_max_rows = env_int("SMARTDOC_EXCEL_MAX_ROWS", 200000)
+        self.excel_max_cells = env_int("SMARTDOC_EXCEL_MAX_CELLS", 5000000)
+        self.excel_max_cell_chars = env_int("SMARTDOC_EXCEL_MAX_CELL_CHARS", 1000)
+        # 표 직렬화 형식 (markdown: 헤더를 한 번만 쓰는 표, legacy: 행마다 'col: value')
+        self.table_format = get_table_format()
+        self.table_block_chars = env_int("SMARTDOC_TABLE_BLOCK_CHARS", 1000)
+        # Excel 시트를 컬럼형 파일로도 저장 (표 질의 엔진이 집계형 질문을 LLM 없이 계산)
+        self.table_store = get_table_store() if env_flag("SMARTDOC_TABLE_QUERIES", True) else None
+        # DOCX/PPTX를 XML 스트리밍으로 직접 파싱 (실패하면 python-docx/python-pptx 객체 모델 사용)
+        self.ooxml_streaming = env_flag("SMARTDOC_OOXML_STREAMING", True)
+        # notebook 셀 출력 하나의 최대 글자 수 (0이면 제한 없음)
+        self.notebook_max_output_chars = env_int("SMARTDOC_NOTEBOOK_MAX_OUTPUT_CHARS", 4000)
     
-    def extract_content(self, file: UploadedFile) -> str:
+    def extract_content(self, file: UploadedFile,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        with_segments: bool = False) -> Union[str, Tuple[str, SegmentTable]]:
         """
         업로드된 파일에서 텍스트 내용 추출
         
         Args:
             file: Streamlit UploadedFile 객체
+            progress_callback: 페이지 진행 콜백 (현재 페이지, 전체 페이지), PDF에서만 호출
+            with_segments: True이면 페이지/슬라이드/시트 경계를 담은 세그먼트 테이블도 반환
             
         Returns:
-            str: 추출된 텍스트 내용
+            str: 추출된 텍스트 내용 (with_segments이면 (텍스트, SegmentTable))
         """
         file_extension = os.path.splitext(file.name)[1].lower()
         
         try:
             if file_extension == '.pdf':
-                return self._extract_from_pdf(file)
+                content, segments = self._extract_from_pdf(file, progress_callback)
             elif file_extension in ['.docx', '.doc']:
-                return self._extract_from_word(file)
+                content, segments = self._extract_from_word(file)
             elif file_extension == '.txt':
-                return self._extract_from_text(file)
+                content, segments = self._extract_from_text(file)
             elif file_extension == '.xlsx':
-                return self._extract_from_excel(file)
+                content, segments = self._extract_from_excel(file)
             elif file_extension in ['.ppt', '.pptx']:
-                return self._extract_from_powerpoint(file)
+                content, segments = self._extract_from_powerpoint(file)
             elif file_extension == '.hwp':
-                return self._extract_from_hwp(file)
+                content, segments = self._extract_from_hwp(file)
             elif file_extension == '.ipynb':
-                return self._extract_from_notebook(file)
+                content, segments = self._extract_from_notebook(file)
             else:
                 raise ValueError(f"지원하지 않는 파일 형식: {file_extension}")
                 
         except Exception as e:
             raise Exception(f"문서 처리 중 오류 발생: {str(e)}")
+        
+        return (content, segments) if with_segments else content
     
-    def _extract_from_pdf(self, file: UploadedFile) -> str:
-        """PDF 파일에서 텍스트 추출"""
-        try:
-            # 파일을 바이트로 읽기
-            file_bytes = file.read()
+    def iter_pdf_pages(self, file: UploadedFile) -> Iterator[Tuple[int, int, str]]:
+        """
+        PDF 페이지를 추출되는 대로 순서대로 반환 (큰 PDF는 프로세스 풀에서 병렬 추출)
+        
+        Args:
+            file: Streamlit UploadedFile 객체
             
-            # PDF 리더 생성
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+        Yields:
+            Tuple[int, int, str]: (페이지 번호, 전체 페이지 수, 텍스트)
+        """
+        if self.pdf_backend is None:
+            self.pdf_backend = select_pdf_backend()
+        yield from iter_pdf_pages(file.read(), self.pdf_backend)
+    
+    def _extract_from_pdf(self, file: UploadedFile,
+                          progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[str, SegmentTable]:
+        """PDF 파일에서 텍스트 추출 (페이지 단위 세그먼트)"""
+        try:
+            builder = SegmentBuilder()
             
-            text_content = ""
+            # 페이지별로 추출하며 진행 상황 알림
+            for page_no, total_pages, text in self.iter_pdf_pages(file):
+                if page_no > 1:
+                    builder.write("\n")
+                builder.add(text, KIND_PAGE, page_no)
+                if progress_callback:
+                    progress_callback(page_no, total_pages)
             
-            # 모든 페이지에서 텍스트 추출
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text_content += page.extract_text() + "\n"
+            text_content, segments = builder.build()
             
-            if not text_content.strip():
+            if not text_content:
                 raise Exception("PDF에서 텍스트를 추출할 수 없습니다.")
             
-            return text_content.strip()
+            return text_content, segments
             
         except Exception as e:
             raise Exception(f"PDF 처리 실패: {str(e)}")
     
-    def _extract_from_word(self, file: UploadedFile) -> str:
-        """Word 파일에서 텍스트 추출"""
+    def _extract_from_word(self, file: UploadedFile) -> Tuple[str, SegmentTable]:
+        """Word 파일에서 텍스트 추출 (문단/표 단위 세그먼트, XML 스트리밍 우선)"""
+        # 파일을 바이트로 읽기
+        file_bytes = file.read()
+        
+        if self.ooxml_streaming:
+            try:
+                builder = SegmentBuilder()
+                write_docx(builder, file_bytes, self.table_format)
+                text_content, segments = builder.build()
+                if text_content:
+                    return text_content, segments
+            except Exception as e:
+                print(f"DOCX 스트리밍 파싱 실패, python-docx로 재시도: {str(e)}")
+        
+        return self._extract_from_word_with_docx(file_bytes)
+    
+    def _extract_from_word_with_docx(self, file_bytes: bytes) -> Tuple[str, SegmentTable]:
+        """python-docx 객체 모델을 사용한 Word 텍스트 추출 (fallback, 문단 다음에 표 기록)"""
         try:
-            # 파일을 바이트로 읽기
-            file_bytes = file.read()
-            
             # Word 문서 열기
             doc = docx.Document(io.BytesIO(file_bytes))
             
-            text_content = ""
+            builder = SegmentBuilder()
             
             # 모든 단락에서 텍스트 추출
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
+            for paragraph_num, paragraph in enumerate(doc.paragraphs, 1):
+                builder.add(paragraph.text, KIND_PARAGRAPH, paragraph_num)
+                builder.write("\n")
             
             # 표에서 텍스트 추출
-            for table in doc.tables:
+            for table_num, table in enumerate(doc.tables, 1):
+                if self.table_format == 'markdown':
+                    lines = markdown_table([[cell.text for cell in row.cells] for row in table.rows])
+                    if not lines:
+                        continue
+                    # 표가 커서 여러 청크로 나뉘면 뒤쪽 청크 앞에 헤더를 반복
+                    header = (builder.length, builder.length + len(lines[0]))
+                    builder.begin(KIND_TABLE, table_num, header)
+                    builder.write(lines[0] + "".join(line + "\n" for line in lines[1:]))
+                    builder.end()
+                    builder.write("\n")
+                    continue
+                builder.begin(KIND_TABLE, table_num)
                 for row in table.rows:
                     for cell in row.cells:
-                        text_content += cell.text + " "
-                    text_content += "\n"
+                        builder.write(cell.text + " ")
+                    builder.write("\n")
+                builder.end()
             
-            if not text_content.strip():
+            text_content, segments = builder.build()
+            
+            if not text_content:
                 raise Exception("Word 문서에서 텍스트를 추출할 수 없습니다.")
             
-            return text_content.strip()
+            return text_content, segments
             
         except Exception as e:
             raise Exception(f"Word 문서 처리 실패: {str(e)}")
     
-    def _extract_from_text(self, file: UploadedFile) -> str:
+    def _extract_from_text(self, file: UploadedFile) -> Tuple[str, SegmentTable]:
         """텍스트 파일에서 내용 읽기"""
         try:
             # 파일을 문자열로 디코딩
@@ -133,72 +205,79 @@ class DocumentProcessor:
             if not text_content.strip():
                 raise Exception("텍스트 파일이 비어있습니다.")
             
-            return text_content.strip()
+            return single_segment(text_content.strip())
             
         except Exception as e:
             raise Exception(f"텍스트 파일 처리 실패: {str(e)}")
     
-    def _extract_from_excel(self, file: UploadedFile) -> str:
-        """Excel 파일에서 텍스트 추출"""
+    def _extract_from_excel(self, file: UploadedFile) -> Tuple[str, SegmentTable]:
+        """Excel 파일에서 텍스트 추출 (읽기 전용 스트리밍, 시트 단위 세그먼트, 표 저장소에도 기록)"""
         try:
             # 파일을 바이트로 읽기
             file_bytes = file.read()
             
-            # Excel 파일 읽기
-            df_dict = pd.read_excel(io.BytesIO(file_bytes), sheet_name=None)
+            builder = SegmentBuilder()
+            tables = self.table_store.writer(file.name, file_bytes) if self.table_store else None
             
-            text_content = ""
+            # 시트를 행 묶음 단위로 읽어 묶음마다 열 단위로 행 텍스트 생성 (같은 묶음을 표 저장소에도 전달)
+            write_workbook(builder, file_bytes, self.table_format, max_rows=self.excel_max_rows,
+                           max_cells=self.excel_max_cells, max_cell_chars=self.excel_max_cell_chars,
+                           block_chars=self.table_block_chars, on_batch=tables.add if tables else None)
+            if tables:
+                tables.close()
             
-            # 모든 시트에서 데이터 추출
-            for sheet_name, df in df_dict.items():
-                text_content += f"\n=== {sheet_name} ===\n"
-                
-                # 컬럼명 추가
-                if not df.empty:
-                    text_content += "컬럼: " + ", ".join(df.columns.astype(str)) + "\n\n"
-                    
-                    # 각 행의 데이터를 텍스트로 변환
-                    for index, row in df.iterrows():
-                        row_text = []
-                        for col, value in row.items():
-                            if pd.notna(value):  # NaN이 아닌 값만 포함
-                                row_text.append(f"{col}: {str(value)}")
-                        
-                        if row_text:  # 빈 행이 아닌 경우만 추가
-                            text_content += " | ".join(row_text) + "\n"
-                    
-                    text_content += "\n"
+            text_content, segments = builder.build()
             
-            if not text_content.strip():
+            if not text_content:
                 raise Exception("Excel 파일에서 텍스트를 추출할 수 없습니다.")
             
-            return text_content.strip()
+            return text_content, segments
             
         except Exception as e:
             raise Exception(f"Excel 파일 처리 실패: {str(e)}")
     
-    def _extract_from_powerpoint(self, file: UploadedFile) -> str:
-        """PowerPoint 파일에서 텍스트 추출"""
+    def _extract_from_powerpoint(self, file: UploadedFile) -> Tuple[str, SegmentTable]:
+        """PowerPoint 파일에서 텍스트 추출 (슬라이드 단위 세그먼트, XML 스트리밍 우선)"""
+        # 파일을 바이트로 읽기
+        file_bytes = file.read()
+        
+        if self.ooxml_streaming:
+            try:
+                builder = SegmentBuilder()
+                write_pptx(builder, file_bytes, self.table_format)
+                text_content, segments = builder.build()
+                if text_content:
+                    return text_content, segments
+            except Exception as e:
+                print(f"PPTX 스트리밍 파싱 실패, python-pptx로 재시도: {str(e)}")
+        
+        return self._extract_from_powerpoint_with_pptx(file_bytes)
+    
+    def _extract_from_powerpoint_with_pptx(self, file_bytes: bytes) -> Tuple[str, SegmentTable]:
+        """python-pptx 객체 모델을 사용한 PowerPoint 텍스트 추출 (fallback)"""
         try:
-            # 파일을 바이트로 읽기
-            file_bytes = file.read()
-            
             # PowerPoint 파일 열기
             prs = Presentation(io.BytesIO(file_bytes))
             
-            text_content = ""
+            builder = SegmentBuilder()
             
             # 모든 슬라이드에서 텍스트 추출
             for slide_num, slide in enumerate(prs.slides, 1):
-                text_content += f"\n=== 슬라이드 {slide_num} ===\n"
+                builder.write("\n")
+                builder.begin(KIND_SLIDE, slide_num)
+                builder.write(f"=== 슬라이드 {slide_num} ===\n")
                 
                 # 슬라이드의 모든 shape에서 텍스트 추출
                 for shape in slide.shapes:
                     if hasattr(shape, "text") and shape.text.strip():
-                        text_content += shape.text.strip() + "\n"
+                        builder.write(shape.text.strip() + "\n")
                     
                     # 표가 있는 경우 표 내용도 추출
-                    if shape.has_table:
+                    if shape.has_table and self.table_format == 'markdown':
+                        lines = markdown_table([[cell.text.strip() for cell in row.cells] for row in shape.table.rows])
+                        if lines:
+                            builder.write(lines[0] + "".join(line + "\n" for line in lines[1:]))
+                    elif shape.has_table:
                         table = shape.table
                         for row in table.rows:
                             row_text = []
@@ -206,35 +285,47 @@ class DocumentProcessor:
                                 if cell.text.strip():
                                     row_text.append(cell.text.strip())
                             if row_text:
-                                text_content += " | ".join(row_text) + "\n"
+                                builder.write(" | ".join(row_text) + "\n")
                 
-                text_content += "\n"
+                builder.end()
+                builder.write("\n")
             
-            if not text_content.strip():
+            text_content, segments = builder.build()
+            
+            if not text_content:
                 raise Exception("PowerPoint 파일에서 텍스트를 추출할 수 없습니다.")
             
-            return text_content.strip()
+            return text_content, segments
             
         except Exception as e:
             raise Exception(f"PowerPoint 파일 처리 실패: {str(e)}")
     
-    def _extract_from_hwp(self, file: UploadedFile) -> str:
-        """한글 파일에서 텍스트 추출"""
+    def _extract_from_hwp(self, file: UploadedFile) -> Tuple[str, SegmentTable]:
+        """한글 파일에서 텍스트 추출 (HWP 5 레코드 직접 파싱, 문단/표 단위 세그먼트)"""
         try:
             # 파일을 바이트로 읽기
             file_bytes = file.read()
             
-            # hwp5 라이브러리가 사용 가능한 경우 우선 사용
-            if HWP5_AVAILABLE:
+            try:
+                # 메모리에서 구역 스트림을 한 번씩만 읽어 레코드 단위로 파싱
+                builder = SegmentBuilder()
+                write_hwp(builder, file_bytes, self.table_format)
+                text_content, segments = builder.build()
+                if not text_content:
+                    raise Exception("한글 파일에서 텍스트를 추출할 수 없습니다.")
+                return text_content, segments
+            except Exception as e:
+                # hwp5 라이브러리가 있으면 대체 방법으로 사용
+                if not HWP5_AVAILABLE:
+                    raise
+                print(f"HWP 레코드 파싱 실패, hwp5 라이브러리로 재시도: {str(e)}")
                 return self._extract_from_hwp_with_hwp5(file_bytes)
-            else:
-                return self._extract_from_hwp_with_olefile(file_bytes)
                 
         except Exception as e:
             raise Exception(f"한글 파일 처리 실패: {str(e)}")
     
-    def _extract_from_hwp_with_hwp5(self, file_bytes: bytes) -> str:
-        """hwp5 라이브러리를 사용한 한글 파일 텍스트 추출"""
+    def _extract_from_hwp_with_hwp5(self, file_bytes: bytes) -> Tuple[str, SegmentTable]:
+        """hwp5 라이브러리를 사용한 한글 파일 텍스트 추출 (문단/표 단위 세그먼트)"""
         try:
             import tempfile
             import io
@@ -248,121 +339,44 @@ class DocumentProcessor:
                 # hwp5로 파일 열기
                 hwp_file = hwp5.Hwp5File(temp_file_path)
                 
-                text_content = ""
+                builder = SegmentBuilder()
+                paragraph_num = 0
                 
                 # 문서의 모든 섹션에서 텍스트 추출
                 for section in hwp_file.bodytext.sections:
                     for paragraph in section.paragraphs:
+                        paragraph_num += 1
+                        builder.begin(KIND_PARAGRAPH, paragraph_num)
                         for char in paragraph.chars:
                             if hasattr(char, 'text') and char.text:
-                                text_content += char.text
-                        text_content += "\n"
+                                builder.write(char.text)
+                        builder.end()
+                        builder.write("\n")
                 
                 # 표에서 텍스트 추출
+                table_num = 0
                 for section in hwp_file.bodytext.sections:
                     for table in section.tables:
+                        table_num += 1
+                        builder.begin(KIND_TABLE, table_num)
                         for row in table.rows:
                             for cell in row.cells:
                                 for paragraph in cell.paragraphs:
                                     for char in paragraph.chars:
                                         if hasattr(char, 'text') and char.text:
-                                            text_content += char.text
-                                    text_content += " "
-                            text_content += "\n"
+                                            builder.write(char.text)
+                                    builder.write(" ")
+                            builder.write("\n")
+                        builder.end()
                 
                 hwp_file.close()
                 
-                if not text_content.strip():
-                    raise Exception("한글 파일에서 텍스트를 추출할 수 없습니다.")
-                
-                return text_content.strip()
-                
-            finally:
-                # 임시 파일 삭제
-                try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
-                    
-        except Exception as e:
-            # hwp5 실패 시 olefile 방법으로 fallback
-            return self._extract_from_hwp_with_olefile(file_bytes)
-    
-    def _extract_from_hwp_with_olefile(self, file_bytes: bytes) -> str:
-        """olefile 라이브러리를 사용한 한글 파일 텍스트 추출 (fallback)"""
-        try:
-            import tempfile
-            
-            # 임시 파일로 저장 (olefile은 파일 경로가 필요함)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.hwp') as temp_file:
-                temp_file.write(file_bytes)
-                temp_file_path = temp_file.name
-            
-            try:
-                # HWP 파일이 OLE 파일인지 확인
-                if not olefile.isOleFile(temp_file_path):
-                    raise Exception("유효하지 않은 HWP 파일입니다.")
-                
-                # OLE 파일 열기
-                ole = olefile.OleFileIO(temp_file_path)
-                
-                text_content = ""
-                
-                # HWP 파일의 텍스트 스트림 찾기
-                # HWP 5.0 이상의 경우 'BodyText' 디렉토리에서 섹션별로 텍스트 추출
-                if ole._olestream_size:
-                    try:
-                        # BodyText 디렉토리 내의 섹션들을 찾아서 텍스트 추출
-                        for stream_name in ole.listdir():
-                            if isinstance(stream_name, list) and len(stream_name) > 0:
-                                if stream_name[0] == 'BodyText':
-                                    # BodyText 하위의 Section 스트림들 처리
-                                    for section_stream in ole.listdir():
-                                        if (isinstance(section_stream, list) and 
-                                            len(section_stream) >= 2 and 
-                                            section_stream[0] == 'BodyText' and 
-                                            section_stream[1].startswith('Section')):
-                                            
-                                            try:
-                                                # 섹션 스트림 읽기
-                                                stream_data = ole._olestream(section_stream)
-                                                
-                                                # 간단한 텍스트 추출 (완전하지 않지만 기본적인 텍스트는 추출 가능)
-                                                # HWP의 복잡한 구조로 인해 완벽한 텍스트 추출은 어려움
-                                                decoded_text = self._extract_text_from_hwp_stream(stream_data)
-                                                if decoded_text:
-                                                    text_content += decoded_text + "\n"
-                                                    
-                                            except Exception as stream_error:
-                                                # 개별 스트림 처리 실패는 무시하고 계속 진행
-                                                continue
-                                
-                        # 만약 BodyText에서 추출이 안 되면 다른 방법 시도
-                        if not text_content.strip():
-                            # PrvText 스트림에서 텍스트 추출 시도
-                            try:
-                                if ole.exists('PrvText'):
-                                    stream_data = ole._olestream(['PrvText'])
-                                    decoded_text = self._extract_text_from_hwp_stream(stream_data)
-                                    if decoded_text:
-                                        text_content = decoded_text
-                            except:
-                                pass
-                                
-                    except Exception as extract_error:
-                        # 텍스트 추출 실패 시 기본 메시지
-                        text_content = f"한글 파일에서 텍스트를 추출하는 중 오류가 발생했습니다: {str(extract_error)}\n"
-                        text_content += "한글 파일의 복잡한 구조로 인해 완전한 텍스트 추출이 어려울 수 있습니다."
+                text_content, segments = builder.build()
                 
-                ole.close()
-                
-                if not text_content.strip():
-                    # 대안적 방법: 바이너리 데이터에서 한글 텍스트 패턴 찾기
-                    text_content = self._extract_korean_text_from_binary(file_bytes)
-                    if not text_content.strip():
-                        raise Exception("한글 파일에서 텍스트를 추출할 수 없습니다. 파일이 손상되었거나 지원되지 않는 형식일 수 있습니다.")
+                if not text_content:
+                    raise Exception("한글 파일에서 텍스트를 추출할 수 없습니다.")
                 
-                return text_content.strip()
+                return text_content, segments
                 
             finally:
                 # 임시 파일 삭제
@@ -372,70 +386,10 @@ class DocumentProcessor:
                     pass
                     
         except Exception as e:
-            raise Exception(f"olefile을 사용한 한글 파일 처리 실패: {str(e)}")
-    
-    def _extract_text_from_hwp_stream(self, stream_data: bytes) -> str:
-        """HWP 스트림에서 텍스트 추출"""
-        try:
-            # HWP 파일의 텍스트는 UTF-16LE로 인코딩되어 있을 수 있음
-            # 여러 인코딩 방식 시도
-            encodings = ['utf-16le', 'utf-8', 'cp949', 'euc-kr']
-            
-            for encoding in encodings:
-                try:
-                    # 바이너리 데이터에서 텍스트 부분만 추출
-                    text = stream_data.decode(encoding, errors='ignore')
-                    # 제어 문자 및 불필요한 문자 제거
-                    cleaned_text = ''.join(char for char in text if char.isprintable() or char.isspace())
-                    # 한글이 포함된 경우만 반환
-                    if any('\uac00' <= char <= '\ud7af' for char in cleaned_text):
-                        return cleaned_text
-                except:
-                    continue
-            
-            return ""
-            
-        except Exception:
-            return ""
-    
-    def _extract_korean_text_from_binary(self, file_bytes: bytes) -> str:
-        """바이너리 데이터에서 한글 텍스트 패턴 추출"""
-        try:
-            # UTF-16LE로 디코딩 시도
-            try:
-                text = file_bytes.decode('utf-16le', errors='ignore')
-                # 한글 문자만 추출
-                korean_chars = []
-                for char in text:
-                    if '\uac00' <= char <= '\ud7af' or char.isspace() or char in '.,!?;:()[]{}':
-                        korean_chars.append(char)
-                
-                korean_text = ''.join(korean_chars)
-                # 연속된 공백 제거
-                import re
-                korean_text = re.sub(r'\s+', ' ', korean_text).strip()
-                
-                if len(korean_text) > 10:  # 최소 길이 확인
-                    return korean_text
-                    
-            except:
-                pass
-            
-            # CP949로 디코딩 시도
-            try:
-                text = file_bytes.decode('cp949', errors='ignore')
-                # 한글이 포함된 텍스트 추출
-                if any('\uac00' <= char <= '\ud7af' for char in text):
-                    return text
-            except:
-                pass
-            
-            return ""
-            
-        except Exception:
-            return ""
+            raise Exception(f"hwp5를 사용한 한글 파일 처리 실패: {str(e)}")
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200,
+                   segments: Optional[SegmentTable] = None) -> List[str]:
         """
         텍스트를 청크로 분할
         
@@ -443,6 +397,7 @@ class DocumentProcessor:
             text: 분할할 텍스트
             chunk_size: 청크 크기 (문자 수)
             overlap: 청크 간 겹치는 부분 (문자 수)
+            segments: extract_content의 세그먼트 테이블 (있으면 페이지/슬라이드 경계에서 우선 분할)
             
         Returns:
             List[str]: 분할된 텍스트 청크 리스트
@@ -458,6 +413,15 @@ class DocumentProcessor:
             
             # 문장 경계에서 분할 시도
             if end < len(text):
+                # 세그먼트 경계가 청크 후반부에 있으면 그 위치에서 분할 (겹침 없이 다음 세그먼트부터 시작)
+                boundary = segments.last_boundary(start + chunk_size // 2, end) if segments else -1
+                if boundary > 0:
+                    chunk = text[start:boundary].strip()
+                    if chunk:
+                        chunks.append(segments.header_for(text, start) + chunk)
+                    start = boundary
+                    continue
+                
                 # 마지막 문장 끝 찾기
                 last_period = text.rfind('.', start, end)
                 last_newline = text.rfind('\n', start, end)
@@ -469,7 +433,8 @@ class DocumentProcessor:
             
             chunk = text[start:end].strip()
             if chunk:
-                chunks.append(chunk)
+                # 표 행 묶음 중간에서 시작하는 청크에는 표 헤더를 붙임
+                chunks.append((segments.header_for(text, start) if segments else "") + chunk)
             
             start = end - overlap
             if start >= len(text):
@@ -526,46 +491,29 @@ class DocumentProcessor:
             'supported': self.is_supported_format(file.name)
         }
     
-    def _extract_from_notebook(self, file: UploadedFile) -> str:
+    def _extract_from_notebook(self, file: UploadedFile) -> Tuple[str, SegmentTable]:
         """
-        Jupyter Notebook에서 텍스트 내용 추출
+        Jupyter Notebook에서 텍스트 내용 추출 (JSON 직접 파싱 우선, 형식이 맞지 않으면 nbformat 사용)
         
         Args:
             file: Streamlit UploadedFile 객체
             
         Returns:
-            str: 추출된 텍스트 내용
+            Tuple[str, SegmentTable]: 추출된 텍스트 내용과 셀 단위 세그먼트
         """
         try:
-            # 파일 내용을 문자열로 읽기
-            content = file.read().decode('utf-8')
-            
-            # JSON 형태의 notebook 파싱
-            notebook = nbformat.reads(content, as_version=4)
-            
-            extracted_text = []
-            
-            # 각 셀에서 내용 추출
-            for cell in notebook.cells:
-                if cell.cell_type == 'markdown':
-                    # 마크다운 셀의 텍스트 추출
-                    extracted_text.append(f"[Markdown Cell]\n{cell.source}\n")
-                elif cell.cell_type == 'code':
-                    # 코드 셀의 소스 코드 추출
-                    extracted_text.append(f"[Code Cell]\n{cell.source}\n")
-                    
-                    # 코드 실행 결과가 있다면 추출
-                    if hasattr(cell, 'outputs') and cell.outputs:
-                        for output in cell.outputs:
-                            if hasattr(output, 'text'):
-                                extracted_text.append(f"[Output]\n{output.text}\n")
-                            elif hasattr(output, 'data') and 'text/plain' in output.data:
-                                extracted_text.append(f"[Output]\n{output.data['text/plain']}\n")
-                elif cell.cell_type == 'raw':
-                    # Raw 셀의 텍스트 추출
-                    extracted_text.append(f"[Raw Cell]\n{cell.source}\n")
-            
-            return '\n'.join(extracted_text)
+            file_bytes = file.read()
+            
+            try:
+                cells = load_notebook_cells(file_bytes)
+            except ValueError as e:
+                # 손상되었거나 오래된 형식(nbformat 3 등)은 nbformat으로 변환/검증
+                print(f"notebook JSON 직접 파싱 실패, nbformat 사용: {str(e)}")
+                cells = nbformat.reads(file_bytes.decode('utf-8'), as_version=4).cells
+            
+            builder = SegmentBuilder()
+            write_notebook_cells(builder, cells, self.notebook_max_output_chars)
+            return builder.build(strip=False)
             
         except Exception as e:
             raise Exception(f"Jupyter Notebook 처리 중 오류: {str(e)}")
@@ -0,0 +1,221 @@
+"""
+Excel 추출 모듈
+openpyxl 읽기 전용 모드로 시트를 행 묶음 단위로 스트리밍하고,
+묶음마다 열 단위 문자열 연산으로 행 텍스트를 만드는 기능 제공 (전체 통합 문서를 메모리에 올리지 않음)
+"""
+
+import io
+from typing import Callable, Iterator, List, Optional, Sequence
+import pandas as pd
+from openpyxl import load_workbook
+from segments import SegmentBuilder, KIND_SHEET
+from table_format import format_rows, markdown_header, markdown_rows
+
+
+def column_names(header: Sequence) -> List[str]:
+    """
+    헤더 행을 pandas.read_excel과 같은 규칙의 컬럼 이름으로 변환
+    (빈 칸은 'Unnamed: i', 중복 이름은 '이름.1', '이름.2' ...)
+
+    Args:
+        header: 헤더 행 값
+
+    Returns:
+        List[str]: 컬럼 이름 리스트
+    """
+    names = []
+    seen = {}
+    for index, value in enumerate(header):
+        name = f"Unnamed: {index}" if value is None or str(value).strip() == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class SheetStream:
+    """시트 하나의 헤더와 행 묶음 스트림"""
+
+    def __init__(self, number: int, name: str, columns: List[str], rows: Iterator[tuple],
+                 batch_rows: int, max_rows: int):
+        """
+        Args:
+            number: 시트 번호 (1부터)
+            name: 시트 이름
+            columns: 컬럼 이름 리스트 (헤더 행 기준)
+            rows: 헤더 다음 행 반복자 (values_only 튜플)
+            batch_rows: 묶음당 행 수
+            max_rows: 시트당 최대 행 수 (0이면 제한 없음)
+        """
+        self.number = number
+        self.name = name
+        self.columns = columns
+        self.rows_read = 0
+        self.truncated = False
+        self._rows = rows
+        self._batch_rows = batch_rows
+        self._max_rows = max_rows
+
+    def batches(self) -> Iterator[pd.DataFrame]:
+        """
+        행 묶음을 DataFrame으로 반환 (빈 행 제외, 헤더보다 긴 행은 'Unnamed: i' 컬럼 추가)
+
+        Yields:
+            pd.DataFrame: 최대 batch_rows 행의 묶음
+        """
+        batch = []
+        for row in self._rows:
+            if self._max_rows and self.rows_read >= self._max_rows:
+                self.truncated = True
+                break
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            self.rows_read += 1
+            if len(batch) >= self._batch_rows:
+                yield self._frame(batch)
+                batch = []
+        if batch:
+            yield self._frame(batch)
+
+    def _frame(self, batch: List[tuple]) -> pd.DataFrame:
+        """행 튜플 묶음을 컬럼 수에 맞춰 DataFrame으로 변환"""
+        width = len(self.columns)
+        longest = max(len(row) for row in batch)
+        if longest > width:
+            # 헤더 범위 밖에 값이 있는 경우에만 컬럼을 늘림
+            extra = max((index for row in batch for index in range(width, len(row)) if row[index] is not None),
+                        default=width - 1) + 1
+            if extra > width:
+                self.columns = self.columns + [f"Unnamed: {index}" for index in range(width, extra)]
+                width = extra
+        records = [row[:width] if len(row) >= width else row + (None,) * (width - len(row)) for row in batch]
+        # object 자료형 유지 (정수 열에 빈 칸이 있어도 '3.0'처럼 바뀌지 않도록)
+        return pd.DataFrame(records, columns=self.columns, dtype=object)
+
+
+def iter_sheets(file_bytes: bytes, batch_rows: int = 2000, max_rows: int = 0,
+                max_cells: int = 0) -> Iterator[SheetStream]:
+    """
+    통합 문서를 읽기 전용 모드로 열어 시트를 순서대로 반환
+
+    각 SheetStream의 batches()는 다음 시트로 넘어가기 전에 소비해야 함 (같은 파일 스트림을 공유)
+
+    Args:
+        file_bytes: xlsx 파일 바이트
+        batch_rows: 묶음당 행 수
+        max_rows: 시트당 최대 데이터 행 수 (0이면 제한 없음)
+        max_cells: 시트당 최대 셀 수 (컬럼 수로 나눈 행 수와 max_rows 중 작은 값 적용, 0이면 제한 없음)
+
+    Yields:
+        SheetStream: 시트 스트림
+    """
+    workbook = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        for number, worksheet in enumerate(workbook.worksheets, 1):
+            rows = worksheet.iter_rows(values_only=True)
+            header = None
+            for row in rows:
+                if any(value is not None for value in row):
+                    header = row
+                    break
+
+            if header is None:
+                yield SheetStream(number, worksheet.title, [], iter(()), batch_rows, max_rows)
+                continue
+
+            # 헤더 끝의 빈 칸 제거
+            last = max(index for index, value in enumerate(header) if value is not None)
+            columns = column_names(header[:last + 1])
+            sheet_max_rows = max_rows
+            if max_cells:
+                cell_rows = max(max_cells // max(len(columns), 1), 1)
+                sheet_max_rows = min(sheet_max_rows, cell_rows) if sheet_max_rows else cell_rows
+            yield SheetStream(number, worksheet.title, columns, rows, batch_rows, sheet_max_rows)
+    finally:
+        workbook.close()
+
+
+def write_workbook(builder: SegmentBuilder, file_bytes: bytes, table_format: str = 'markdown',
+                   max_rows: int = 0, max_cells: int = 0, max_cell_chars: int = 0, block_chars: int = 1000,
+                   on_batch: Optional[Callable[[SheetStream, pd.DataFrame], None]] = None):
+    """
+    통합 문서의 모든 시트를 텍스트로 기록 (시트 단위 세그먼트)
+
+    markdown 형식은 시트마다 헤더를 한 번만 쓰고 행을 block_chars 크기의 묶음 세그먼트로 나누며,
+    각 묶음은 헤더 범위를 가리키므로 청크 분할 시 청크 시작에만 헤더가 반복됨
+
+    Args:
+        builder: 텍스트/세그먼트 기록 대상
+        file_bytes: xlsx 파일 바이트
+        table_format: 'markdown' 또는 'legacy' ('col: value | ...' 행 형식)
+        max_rows: 시트당 최대 데이터 행 수 (0이면 제한 없음)
+        max_cells: 시트당 최대 셀 수 (0이면 제한 없음)
+        max_cell_chars: 셀 값 최대 문자 수 (0이면 제한 없음)
+        block_chars: markdown 형식의 행 묶음 세그먼트 크기 (문자 수)
+        on_batch: 행 묶음마다 (시트, 묶음)으로 호출할 함수 (같은 스트리밍으로 표 저장소도 채울 때 사용)
+    """
+    for sheet in iter_sheets(file_bytes, max_rows=max_rows, max_cells=max_cells):
+        builder.write("\n")
+        builder.begin(KIND_SHEET, sheet.number)
+        builder.write(f"=== {sheet.name} ===\n")
+
+        batches = _observed_batches(sheet, on_batch) if on_batch else sheet.batches()
+        if table_format == 'legacy':
+            rows_written = _write_legacy_rows(builder, sheet, batches, max_cell_chars)
+        else:
+            rows_written = _write_markdown_rows(builder, sheet, batches, max_cell_chars, block_chars)
+
+        if sheet.truncated:
+            builder.write(f"... (시트당 최대 {sheet.rows_read}행까지만 추출)\n")
+        if rows_written:
+            builder.write("\n")
+        builder.end()
+
+
+def _observed_batches(sheet: SheetStream, on_batch: Callable[[SheetStream, pd.DataFrame], None]) -> Iterator[pd.DataFrame]:
+    """행 묶음을 on_batch에 먼저 전달한 뒤 반환"""
+    for batch in sheet.batches():
+        on_batch(sheet, batch)
+        yield batch
+
+
+def _write_legacy_rows(builder: SegmentBuilder, sheet: SheetStream, batches: Iterator[pd.DataFrame],
+                       max_cell_chars: int) -> bool:
+    """행마다 'col: value | ...' 형식으로 기록 (컬럼 목록은 시트 앞에 한 번)"""
+    header_written = False
+    for batch in batches:
+        rows = format_rows(batch, max_cell_chars)
+        if not rows:
+            continue
+        # 컬럼명 추가 (헤더 범위 밖 값으로 늘어난 컬럼 포함)
+        if not header_written:
+            builder.write("컬럼: " + ", ".join(sheet.columns) + "\n\n")
+            header_written = True
+        builder.write("\n".join(rows) + "\n")
+    return header_written
+
+
+def _write_markdown_rows(builder: SegmentBuilder, sheet: SheetStream, batches: Iterator[pd.DataFrame],
+                         max_cell_chars: int, block_chars: int) -> bool:
+    """헤더를 한 번 쓰고 행을 마크다운 표로 기록 (block_chars마다 헤더를 가리키는 새 세그먼트 시작)"""
+    header = None
+    header_columns = None
+    block_length = 0
+    for batch in batches:
+        # 처음이거나 헤더 범위 밖 값으로 컬럼이 늘어난 경우에만 헤더 기록
+        if header_columns != sheet.columns:
+            header_start = builder.length
+            builder.write(markdown_header(sheet.columns))
+            header = (header_start, builder.length)
+            header_columns = list(sheet.columns)
+        for row in markdown_rows(batch, max_cell_chars):
+            if block_length >= block_chars:
+                builder.begin(KIND_SHEET, sheet.number, header)
+                block_length = 0
+            builder.write(row + "\n")
+            block_length += len(row) + 1
+    return header is not None
@@ -0,0 +1,289 @@
+"""
+HWP 추출 모듈
+HWP 5 OLE 컨테이너를 메모리에서 열어 FileHeader 압축 플래그를 확인하고, BodyText 구역 스트림을 zlib 해제한 뒤
+레코드 헤더를 한 번만 훑어 문단 텍스트(HWPTAG_PARA_TEXT, 표 셀 포함)를 읽는 순서대로 추출하는 기능 제공
+(임시 파일 없음, 스트림 크기에 선형 시간, 구역이 많으면 프로세스 풀에서 병렬 파싱)
+"""
+
+import atexit
+import io
+import multiprocessing
+import re
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+import olefile
+from config import env_int
+from segments import SegmentBuilder, KIND_PARAGRAPH, KIND_TABLE
+from table_format import markdown_table
+from text_normalizer import remove_control_chars, remove_control_chars_batch
+
+# 레코드 태그 (HWPTAG_BEGIN = 0x10)
+HWPTAG_PARA_HEADER = 0x10 + 50
+HWPTAG_PARA_TEXT = 0x10 + 51
+HWPTAG_CTRL_HEADER = 0x10 + 55
+HWPTAG_LIST_HEADER = 0x10 + 56
+
+# 표 컨트롤 ID ('tbl '를 리틀 엔디언 UINT32로 저장한 바이트)
+_TABLE_CTRL_ID = b' lbt'
+
+# FileHeader 속성 비트
+_FLAG_COMPRESSED = 0x1
+_FLAG_PASSWORD = 0x2
+_FLAG_DISTRIBUTION = 0x4
+
+# 문단 텍스트의 제어 문자: 1 WCHAR 문자 컨트롤과 8 WCHAR(코드 + 파라미터 + 코드) 인라인/확장 컨트롤
+_CONTROL_PATTERN = re.compile('[\x01-\x09\x0b\x0c\x0e-\x17].{7}|[\x00\x0d\x18-\x1f]', re.DOTALL)
+_CONTROL_REPLACEMENTS = {'\t': '\t', '\x18': '-', '\x1e': ' ', '\x1f': ' '}
+
+
+def _replace_control(match) -> str:
+    """제어 문자 치환 (탭/하이픈/공백만 남기고 나머지 컨트롤은 제거)"""
+    return _CONTROL_REPLACEMENTS.get(match.group(0)[0], '')
+
+
+def para_text(payload: bytes) -> str:
+    """
+    HWPTAG_PARA_TEXT 레코드의 UTF-16LE 텍스트 디코딩 (제어 문자 제거)
+
+    Args:
+        payload: 레코드 본문
+
+    Returns:
+        str: 문단 텍스트
+    """
+    return remove_control_chars(_decode_para_text(payload))
+
+
+def _decode_para_text(payload: bytes) -> str:
+    """문단 텍스트 디코딩 후 HWP 컨트롤 치환 (남은 짝 없는 서로게이트/제어 문자는 호출한 쪽에서 제거)"""
+    # 컨트롤 파라미터가 서로게이트로 해석돼도 WCHAR 단위 위치가 유지되도록 surrogatepass 사용
+    text = payload.decode('utf-16le', errors='surrogatepass')
+    return _CONTROL_PATTERN.sub(_replace_control, text)
+
+
+def iter_records(data: bytes) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    레코드 헤더를 순서대로 읽어 (태그, 레벨, 본문 시작, 본문 끝) 반환 (본문은 복사하지 않음)
+
+    Args:
+        data: 압축 해제된 구역 스트림
+
+    Yields:
+        Tuple[int, int, int, int]: (태그 ID, 레벨, 본문 시작 오프셋, 본문 끝 오프셋)
+    """
+    offset = 0
+    length = len(data)
+    while offset + 4 <= length:
+        header, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        size = header >> 20
+        if size == 0xFFF:
+            # 4095바이트 이상인 레코드는 크기를 다음 4바이트에 기록
+            if offset + 4 > length:
+                break
+            size, = struct.unpack_from('<I', data, offset)
+            offset += 4
+        yield header & 0x3FF, (header >> 10) & 0x3FF, offset, min(offset + size, length)
+        offset += size
+
+
+def parse_section(stream: bytes, compressed: bool) -> List[Tuple[str, object]]:
+    """
+    구역 스트림 하나를 문단/표 블록으로 변환 (프로세스 풀 작업으로도 사용)
+
+    표 컨트롤 아래 레코드는 셀(LIST_HEADER)별로 모아 행 번호 순으로 정리하며,
+    표 안의 중첩 표 텍스트는 바깥 표의 셀 텍스트에 포함됨
+
+    Args:
+        stream: BodyText/Section 스트림 바이트
+        compressed: FileHeader의 압축 여부
+
+    Returns:
+        List[Tuple[str, object]]: ('paragraph', 텍스트) 또는 ('table', 행별 셀 텍스트 리스트)
+    """
+    data = zlib.decompress(stream, -15) if compressed else stream
+    # 문단 텍스트는 구역 끝에서 한 번에 제어 문자를 제거하므로 블록에는 texts의 위치만 기록
+    texts = []
+    blocks = []
+    table_level = -1
+    cells = []
+
+    def close_table():
+        rows = {}
+        for row, parts in cells:
+            rows.setdefault(row, []).append(parts)
+        blocks.append(('table', [rows[row] for row in sorted(rows)]))
+
+    for tag, level, start, end in iter_records(data):
+        if table_level >= 0 and level <= table_level:
+            close_table()
+            table_level = -1
+
+        if tag == HWPTAG_PARA_TEXT:
+            if table_level >= 0:
+                if cells:
+                    cells[-1][1].append(len(texts))
+                    texts.append(_decode_para_text(data[start:end]))
+            else:
+                blocks.append(('paragraph', len(texts)))
+                texts.append(_decode_para_text(data[start:end]))
+        elif tag == HWPTAG_CTRL_HEADER and table_level < 0 and data[start:start + 4] == _TABLE_CTRL_ID:
+            table_level = level
+            cells = []
+        elif tag == HWPTAG_LIST_HEADER and table_level >= 0 and level == table_level + 1:
+            # 셀 속성: 문단 수(2) + 속성(6) 다음의 열 주소(2), 행 주소(2)
+            row = struct.unpack_from('<H', data, start + 10)[0] if end - start >= 12 else len(cells)
+            cells.append((row, []))
+
+    if table_level >= 0:
+        close_table()
+
+    cleaned = [text.strip() for text in remove_control_chars_batch(texts)]
+    resolved = []
+    for kind, value in blocks:
+        if kind == 'paragraph':
+            if cleaned[value]:
+                resolved.append(('paragraph', cleaned[value]))
+        else:
+            resolved.append(('table', [[" ".join(cleaned[index] for index in parts if cleaned[index])
+                                        for parts in row] for row in value]))
+    return resolved
+
+
+def read_file_header(ole: 'olefile.OleFileIO') -> int:
+    """
+    FileHeader 스트림의 속성 비트 (압축/암호/배포용 여부)
+
+    Args:
+        ole: 열린 OLE 컨테이너
+
+    Returns:
+        int: 속성 값
+    """
+    header = ole.openstream('FileHeader').read()
+    if len(header) < 40 or not header.startswith(b'HWP Document File'):
+        raise ValueError("HWP 5 문서가 아닙니다.")
+    return struct.unpack_from('<I', header, 36)[0]
+
+
+def _section_streams(ole: 'olefile.OleFileIO') -> List[str]:
+    """BodyText 구역 스트림 경로를 구역 번호 순으로 반환 (디렉토리 목록은 한 번만 조회)"""
+    sections = []
+    for path in ole.listdir(streams=True, storages=False):
+        if len(path) == 2 and path[0] == 'BodyText' and path[1].startswith('Section'):
+            suffix = path[1][len('Section'):]
+            sections.append((int(suffix) if suffix.isdigit() else len(sections), '/'.join(path)))
+    return [path for _, path in sorted(sections)]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hwp_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    HWP 구역 파싱용 공유 프로세스 풀 반환 (SMARTDOC_HWP_WORKERS가 1 이하이면 None)
+
+    PDF 풀과 같이 여러 스레드로 동작하는 Streamlit 서버에서 안전하도록 spawn으로 작업 프로세스를 시작함
+
+    Returns:
+        Optional[ProcessPoolExecutor]: 프로세스 풀
+    """
+    global _pool
+    workers = env_int("SMARTDOC_HWP_WORKERS", 1)
+    if workers <= 1:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(_pool.shutdown, wait=False)
+    return _pool
+
+
+def iter_hwp_blocks(file_bytes: bytes, min_sections_for_pool: int = 4) -> Iterator[Tuple[str, object]]:
+    """
+    HWP 5 문서의 문단/표 블록을 구역 순서대로 반환
+
+    배포용 문서(본문 암호화)는 미리보기 텍스트(PrvText)만 반환함
+
+    Args:
+        file_bytes: HWP 파일 바이트
+        min_sections_for_pool: 프로세스 풀을 사용할 최소 구역 수
+
+    Yields:
+        Tuple[str, object]: ('paragraph', 텍스트) 또는 ('table', 행별 셀 텍스트 리스트)
+    """
+    if file_bytes[:8] != olefile.MAGIC:
+        raise ValueError("유효하지 않은 HWP 파일입니다.")
+
+    ole = olefile.OleFileIO(io.BytesIO(file_bytes))
+    try:
+        flags = read_file_header(ole)
+        if flags & _FLAG_PASSWORD:
+            raise ValueError("암호가 설정된 한글 파일은 지원하지 않습니다.")
+
+        sections = _section_streams(ole)
+        if flags & _FLAG_DISTRIBUTION or not sections:
+            if ole.exists('PrvText'):
+                print("배포용 한글 문서: 본문 대신 미리보기 텍스트만 추출")
+                preview = remove_control_chars(ole.openstream('PrvText').read().decode('utf-16le', errors='ignore')).strip()
+                if preview:
+                    yield 'paragraph', preview
+            return
+
+        compressed = bool(flags & _FLAG_COMPRESSED)
+        pool = get_hwp_process_pool() if len(sections) >= min_sections_for_pool else None
+        if pool is None:
+            for path in sections:
+                yield from parse_section(ole.openstream(path).read(), compressed)
+            return
+
+        futures = [pool.submit(parse_section, ole.openstream(path).read(), compressed) for path in sections]
+        try:
+            # 제출 순서대로 기다려 구역 순서를 유지
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    finally:
+        ole.close()
+
+
+def write_hwp(builder: SegmentBuilder, file_bytes: bytes, table_format: str = 'markdown'):
+    """
+    HWP 문서 본문을 텍스트로 기록 (문단/표 단위 세그먼트, 읽는 순서 유지)
+
+    Args:
+        builder: 텍스트/세그먼트 기록 대상
+        file_bytes: HWP 파일 바이트
+        table_format: 'markdown' 또는 'legacy' (셀을 공백으로 이어 쓰는 형식)
+    """
+    paragraph_num = 0
+    table_num = 0
+    for kind, value in iter_hwp_blocks(file_bytes):
+        if kind == 'paragraph':
+            paragraph_num += 1
+            builder.add(value, KIND_PARAGRAPH, paragraph_num)
+            builder.write("\n")
+            continue
+
+        table_num += 1
+        if table_format == 'markdown':
+            lines = markdown_table(value)
+            if not lines:
+                continue
+            # 표가 커서 여러 청크로 나뉘면 뒤쪽 청크 앞에 헤더를 반복
+            header = (builder.length, builder.length + len(lines[0]))
+            builder.begin(KIND_TABLE, table_num, header)
+            builder.write(lines[0] + "".join(line + "\n" for line in lines[1:]))
+        else:
+            builder.begin(KIND_TABLE, table_num)
+            for row in value:
+                builder.write(" ".join(row) + "\n")
+        builder.end()
+        builder.write("\n")
@@ -0,0 +1,272 @@
+"""
+인사이트 캐시 모듈
+문서별 요약/분류/키워드 결과를 내용 해시와 프롬프트 버전 기준으로 저장하고,
+업로드 직후 백그라운드에서 미리 계산하는 기능 제공
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+from config import env_int
+
+# 인사이트 상태
+STATUS_READY = 'ready'
+STATUS_PENDING = 'pending'
+STATUS_DEFERRED = 'deferred'
+STATUS_FAILED = 'failed'
+
+
+def content_hash(content: str) -> str:
+    """
+    문서 내용 해시 (인사이트 캐시 키)
+
+    Args:
+        content: 문서 내용
+
+    Returns:
+        str: SHA-256 해시 앞 16자리
+    """
+    return hashlib.sha256((content or '').encode('utf-8')).hexdigest()[:16]
+
+
+class InsightStore:
+    """문서 인사이트 영구 저장소 (JSON 파일)"""
+
+    def __init__(self, filepath: str):
+        """
+        저장소 초기화
+
+        Args:
+            filepath: 저장 파일 경로
+        """
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> Dict:
+        """저장 파일 로드"""
+        try:
+            if os.path.exists(self.filepath):
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"인사이트 캐시 로드 실패: {str(e)}")
+        return {}
+
+    def _save(self):
+        """저장 파일 기록 (임시 파일 교체 방식, 잠금 상태에서 호출)"""
+        try:
+            temp_path = f"{self.filepath}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.filepath)
+        except Exception as e:
+            print(f"인사이트 캐시 저장 실패: {str(e)}")
+
+    @staticmethod
+    def make_key(document: Dict, prompt_version: str) -> str:
+        """내용 해시 + 프롬프트 버전 캐시 키"""
+        digest = document.get('content_hash') or content_hash(document.get('content', ''))
+        return f"{digest}:{prompt_version}"
+
+    def get(self, document: Dict, prompt_version: str) -> Optional[Dict]:
+        """
+        저장된 인사이트 조회
+
+        Args:
+            document: 문서 딕셔너리
+            prompt_version: 인사이트 프롬프트 버전
+
+        Returns:
+            Optional[Dict]: 인사이트 (없으면 None)
+        """
+        with self._lock:
+            entry = self._entries.get(self.make_key(document, prompt_version))
+            return dict(entry) if entry else None
+
+    def put(self, document: Dict, prompt_version: str, insights: Dict):
+        """
+        인사이트 저장
+
+        Args:
+            document: 문서 딕셔너리
+            prompt_version: 인사이트 프롬프트 버전
+            insights: 저장할 인사이트
+        """
+        entry = dict(insights)
+        entry['document'] = document.get('name', '')
+        entry['computed_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._entries[self.make_key(document, prompt_version)] = entry
+            self._save()
+
+
+class InsightBudget:
+    """백그라운드 인사이트 계산의 시간당 토큰 예산"""
+
+    def __init__(self, tokens_per_hour: int):
+        """
+        예산 초기화
+
+        Args:
+            tokens_per_hour: 최근 1시간 동안 백그라운드에서 사용할 수 있는 최대 토큰 수 (0이면 무제한)
+        """
+        self.tokens_per_hour = tokens_per_hour
+        self._spent = deque()
+        self._lock = threading.Lock()
+
+    def try_spend(self, tokens: int) -> bool:
+        """
+        예산 안이면 토큰을 차감하고 True 반환
+
+        Args:
+            tokens: 예상 사용 토큰 수
+
+        Returns:
+            bool: 사용 허용 여부
+        """
+        if self.tokens_per_hour <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            while self._spent and now - self._spent[0][0] > 3600:
+                self._spent.popleft()
+            used = sum(amount for _, amount in self._spent)
+            if used + tokens > self.tokens_per_hour:
+                return False
+            self._spent.append((now, tokens))
+            return True
+
+    def remaining(self) -> int:
+        """남은 시간당 토큰 예산 (무제한이면 -1)"""
+        if self.tokens_per_hour <= 0:
+            return -1
+        with self._lock:
+            now = time.monotonic()
+            used = sum(amount for spent_at, amount in self._spent if now - spent_at <= 3600)
+            return max(self.tokens_per_hour - used, 0)
+
+
+class InsightPrecomputer:
+    """업로드된 문서의 인사이트를 백그라운드에서 미리 계산"""
+
+    def __init__(self, store: InsightStore, budget: InsightBudget, max_workers: int = 2):
+        """
+        사전 계산기 초기화
+
+        Args:
+            store: 인사이트 저장소
+            budget: 백그라운드 토큰 예산
+            max_workers: 동시에 계산할 문서 수
+        """
+        self.store = store
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="insights")
+        self._status: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def status(self, document: Dict, prompt_version: str) -> Optional[str]:
+        """
+        문서 인사이트 상태 조회
+
+        Returns:
+            Optional[str]: ready/pending/deferred/failed 또는 None(요청된 적 없음)
+        """
+        if self.store.get(document, prompt_version):
+            return STATUS_READY
+        with self._lock:
+            return self._status.get(InsightStore.make_key(document, prompt_version))
+
+    def submit(self, document: Dict, assistant, session_id: str = "background") -> str:
+        """
+        인사이트 계산 예약 (이미 저장되어 있거나 계산 중이면 무시)
+
+        Args:
+            document: 문서 딕셔너리
+            assistant: 인사이트를 계산할 AIAssistant
+            session_id: 공정 분배 스케줄러에 전달할 세션 ID
+
+        Returns:
+            str: 예약 후 상태
+        """
+        prompt_version = assistant.INSIGHT_PROMPT_VERSION
+        if self.store.get(document, prompt_version):
+            return STATUS_READY
+
+        key = InsightStore.make_key(document, prompt_version)
+        with self._lock:
+            if self._status.get(key) == STATUS_PENDING:
+                return STATUS_PENDING
+
+            if not self.budget.try_spend(assistant.estimate_insight_tokens(document)):
+                self._status[key] = STATUS_DEFERRED
+                return STATUS_DEFERRED
+
+            self._status[key] = STATUS_PENDING
+
+        self._executor.submit(self._compute, document, assistant, session_id, key)
+        return STATUS_PENDING
+
+    def _compute(self, document: Dict, assistant, session_id: str, key: str):
+        """백그라운드 계산 작업"""
+        from admission_control import get_scheduler, PRIORITY_BACKGROUND
+
+        try:
+            with get_scheduler().slot(session_id, PRIORITY_BACKGROUND):
+                # get_document_insights가 성공한 결과를 저장소에 기록함
+                assistant.get_document_insights(document)
+            status = STATUS_READY if self.store.get(document, assistant.INSIGHT_PROMPT_VERSION) else STATUS_FAILED
+        except Exception as e:
+            print(f"인사이트 백그라운드 계산 실패 ({document.get('name', '')}): {str(e)}")
+            status = STATUS_FAILED
+
+        with self._lock:
+            self._status[key] = status
+
+
+_store = None
+_precomputer = None
+_singleton_lock = threading.Lock()
+
+
+def get_insight_store() -> InsightStore:
+    """
+    공유 인사이트 저장소 반환 (documents/insights_cache.json)
+
+    Returns:
+        InsightStore: 공유 저장소
+    """
+    global _store
+    if _store is None:
+        with _singleton_lock:
+            if _store is None:
+                docs_dir = "documents"
+                os.makedirs(docs_dir, exist_ok=True)
+                _store = InsightStore(os.path.join(docs_dir, "insights_cache.json"))
+    return _store
+
+
+def get_insight_precomputer() -> InsightPrecomputer:
+    """
+    공유 인사이트 사전 계산기 반환
+
+    Returns:
+        InsightPrecomputer: 공유 사전 계산기
+    """
+    global _precomputer
+    if _precomputer is None:
+        store = get_insight_store()
+        with _singleton_lock:
+            if _precomputer is None:
+                _precomputer = InsightPrecomputer(
+                    store,
+                    InsightBudget(env_int("SMARTDOC_INSIGHT_TOKENS_PER_HOUR", 200000)),
+                    max_workers=env_int("SMARTDOC_INSIGHT_WORKERS", 2)
+                )
+    return _precomputer
@@ -0,0 +1,397 @@
+"""
+로컬 인사이트 모듈
+LLM 호출 없이 문서 키워드를 추출(TF-IDF + TextRank)하고
+LLM이 분류한 문서로 학습한 중심 벡터 분류기로 문서를 분류하는 기능 제공
+"""
+
+import math
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from text_analysis import tokenize, char_ngrams
+
+# classify_document 프롬프트의 고정 카테고리
+CATEGORIES = ['학술/연구', '비즈니스', '기술', '법률/정책', '교육', '일반']
+
+# 로컬 분석에 사용할 최대 문자 수 (긴 문서의 처리 시간 제한)
+MAX_ANALYZED_CHARS = 50000
+
+# 분류기 특징 벡터 차원 (단어 + 문자 2-gram 해싱)
+_FEATURE_DIM = 1 << 16
+
+
+def normalize_category(text: str) -> Optional[str]:
+    """
+    LLM 분류 응답을 고정 카테고리로 변환
+
+    Args:
+        text: LLM 응답 (예: "기술", "분류: 법률/정책")
+
+    Returns:
+        Optional[str]: 카테고리 (찾지 못하면 None)
+    """
+    if not text:
+        return None
+    for category in CATEGORIES:
+        if category in text:
+            return category
+    # "학술", "법률"처럼 일부만 답한 경우
+    for category in CATEGORIES:
+        if any(part in text for part in category.split('/')):
+            return category
+    return None
+
+
+def _is_keyword_candidate(token: str) -> bool:
+    """키워드 후보 토큰 여부 (숫자와 한 글자 토큰 제외)"""
+    return len(token) >= 2 and not token[0].isdigit()
+
+
+@lru_cache(maxsize=131072)
+def _feature_index(feature: str) -> int:
+    """특징 문자열의 해시 인덱스 (프로세스 간에도 동일한 crc32 사용)"""
+    return zlib.crc32(feature.encode('utf-8')) % _FEATURE_DIM
+
+
+class CorpusStats:
+    """문서 저장소 기준 단어/문자 2-gram 문서 빈도"""
+
+    def __init__(self):
+        self.num_docs = 0
+        self.word_df = Counter()
+        self.bigram_df = Counter()
+
+    @classmethod
+    def from_documents(cls, documents: List[Dict]) -> 'CorpusStats':
+        """
+        문서 리스트로 통계 생성
+
+        Args:
+            documents: 문서 리스트 (content 포함)
+
+        Returns:
+            CorpusStats: 코퍼스 통계
+        """
+        stats = cls()
+        for doc in documents:
+            content = (doc.get('content') or '')[:MAX_ANALYZED_CHARS]
+            if not content:
+                continue
+            stats.num_docs += 1
+            words = set(tokenize(content))
+            stats.word_df.update(words)
+            stats.bigram_df.update({gram for word in words for gram in char_ngrams(word, 2)})
+        return stats
+
+    def _idf(self, df: int) -> float:
+        return math.log((self.num_docs + 1) / (df + 1)) + 1.0
+
+    def word_idf(self, word: str) -> float:
+        """
+        단어 IDF (코퍼스에 없는 단어는 문자 2-gram IDF 평균으로 근사)
+
+        Args:
+            word: 정규화된 토큰
+
+        Returns:
+            float: IDF 값
+        """
+        df = self.word_df.get(word)
+        if df:
+            return self._idf(df)
+        grams = char_ngrams(word, 2)
+        if not grams:
+            return self._idf(0)
+        return sum(self._idf(self.bigram_df.get(gram, 0)) for gram in grams) / len(grams)
+
+    def bigram_idf(self, gram: str) -> float:
+        """문자 2-gram IDF"""
+        return self._idf(self.bigram_df.get(gram, 0))
+
+
+class KeywordExtractor:
+    """TF-IDF와 TextRank 결합 키워드 추출기"""
+
+    def __init__(self, corpus: Optional[CorpusStats] = None, window: int = 4,
+                 max_candidates: int = 300, textrank_weight: float = 0.5):
+        """
+        키워드 추출기 초기화
+
+        Args:
+            corpus: 코퍼스 통계 (없으면 빈 통계)
+            window: TextRank 동시 출현 윈도우 크기 (토큰 수)
+            max_candidates: TextRank 그래프에 포함할 최대 후보 수 (빈도 상위)
+            textrank_weight: 최종 점수에서 TextRank 비중 (나머지는 TF-IDF)
+        """
+        self.corpus = corpus or CorpusStats()
+        self.window = window
+        self.max_candidates = max_candidates
+        self.textrank_weight = textrank_weight
+
+    def extract(self, text: str, num_keywords: int = 10) -> List[Tuple[str, float]]:
+        """
+        키워드 추출
+
+        Args:
+            text: 문서 내용
+            num_keywords: 추출할 키워드 수
+
+        Returns:
+            List[Tuple[str, float]]: (키워드, 점수) 리스트 (점수 내림차순)
+        """
+        tokens = [token for token in tokenize(text[:MAX_ANALYZED_CHARS]) if _is_keyword_candidate(token)]
+        if not tokens:
+            return []
+
+        counts = Counter(tokens)
+        candidates = [term for term, _ in counts.most_common(self.max_candidates)]
+        index = {term: i for i, term in enumerate(candidates)}
+
+        # TF-IDF (빈도는 로그 스케일)
+        tfidf = np.array([(1 + math.log(counts[term])) * self.corpus.word_idf(term) for term in candidates])
+
+        # TextRank: 윈도우 내 동시 출현 그래프에서 PageRank
+        size = len(candidates)
+        graph = np.zeros((size, size), dtype=np.float64)
+        positions = [index.get(token, -1) for token in tokens]
+        for i, left in enumerate(positions):
+            if left < 0:
+                continue
+            for right in positions[i + 1:i + self.window]:
+                if right >= 0 and right != left:
+                    graph[left, right] += 1
+                    graph[right, left] += 1
+
+        out_degree = graph.sum(axis=1)
+        out_degree[out_degree == 0] = 1
+        transition = graph / out_degree[:, None]
+        rank = np.full(size, 1.0 / size)
+        for _ in range(30):
+            updated = 0.15 / size + 0.85 * transition.T @ rank
+            if np.abs(updated - rank).sum() < 1e-6:
+                rank = updated
+                break
+            rank = updated
+
+        scores = (1 - self.textrank_weight) * _scale(tfidf) + self.textrank_weight * _scale(rank)
+        order = np.argsort(-scores, kind='stable')[:num_keywords]
+        return [(candidates[i], float(scores[i])) for i in order]
+
+
+class CentroidClassifier:
+    """해싱 TF-IDF 특징의 카테고리별 중심 벡터 분류기"""
+
+    def __init__(self, corpus: Optional[CorpusStats] = None):
+        """
+        분류기 초기화
+
+        Args:
+            corpus: IDF 가중치용 코퍼스 통계
+        """
+        self.corpus = corpus or CorpusStats()
+        self.categories: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.num_examples = 0
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """
+        문서를 L2 정규화된 해싱 특징 벡터로 변환 (단어 + 문자 2-gram)
+
+        Args:
+            text: 문서 내용
+
+        Returns:
+            np.ndarray: 특징 벡터
+        """
+        words = Counter(tokenize(text[:MAX_ANALYZED_CHARS]))
+        grams = Counter(gram for word, count in words.items()
+                        for gram in char_ngrams(word, 2) for _ in range(count))
+
+        indices = []
+        weights = []
+        for word, count in words.items():
+            indices.append(_feature_index('w:' + word))
+            weights.append((1 + math.log(count)) * self.corpus.word_idf(word))
+        for gram, count in grams.items():
+            indices.append(_feature_index('c:' + gram))
+            # 문자 2-gram은 보조 특징이므로 절반 가중치
+            weights.append(0.5 * (1 + math.log(count)) * self.corpus.bigram_idf(gram))
+
+        vector = np.bincount(np.asarray(indices, dtype=np.int64), weights=weights,
+                             minlength=_FEATURE_DIM) if indices else np.zeros(_FEATURE_DIM)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def fit(self, texts: List[str], labels: List[str]):
+        """
+        라벨된 문서로 카테고리별 중심 벡터 계산
+
+        Args:
+            texts: 문서 내용 리스트
+            labels: 카테고리 리스트 (CATEGORIES 중 하나)
+        """
+        sums: Dict[str, np.ndarray] = {}
+        for text, label in zip(texts, labels):
+            vector = self.vectorize(text)
+            if label in sums:
+                sums[label] += vector
+            else:
+                sums[label] = vector.copy()
+
+        self.categories = [category for category in CATEGORIES if category in sums]
+        self.num_examples = len(labels)
+        if not self.categories:
+            self.centroids = None
+            return
+        centroids = np.vstack([sums[category] for category in self.categories])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.centroids = centroids / norms
+
+    def predict(self, text: str) -> Optional[Tuple[str, float, float]]:
+        """
+        카테고리 예측
+
+        Args:
+            text: 문서 내용
+
+        Returns:
+            Optional[Tuple[str, float, float]]: (카테고리, 유사도, 2위와의 유사도 차이) 또는 None(미학습)
+        """
+        if self.centroids is None:
+            return None
+        similarities = self.centroids @ self.vectorize(text)
+        order = np.argsort(-similarities)
+        best = float(similarities[order[0]])
+        # 학습된 카테고리가 하나뿐이면 비교 대상이 없으므로 차이 0
+        margin = best - float(similarities[order[1]]) if len(order) > 1 else 0.0
+        return self.categories[int(order[0])], best, margin
+
+
+class LocalInsightEngine:
+    """키워드 추출/문서 분류의 로컬 우선 처리기 (신뢰도가 낮으면 LLM에 맡김)"""
+
+    def __init__(self, min_keyword_tokens: int = 50, min_similarity: float = 0.15,
+                 min_margin: float = 0.05, min_training_examples: int = 6):
+        """
+        로컬 인사이트 엔진 초기화
+
+        Args:
+            min_keyword_tokens: 로컬 키워드 추출에 필요한 최소 토큰 수
+            min_similarity: 로컬 분류를 채택할 최소 중심 벡터 유사도
+            min_margin: 로컬 분류를 채택할 1, 2위 유사도 최소 차이
+            min_training_examples: 분류기를 사용하기 위한 최소 학습 문서 수
+        """
+        self.min_keyword_tokens = min_keyword_tokens
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.min_training_examples = min_training_examples
+
+        self.keyword_extractor = KeywordExtractor()
+        self.classifier = CentroidClassifier()
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def fit(self, documents: List[Dict], labels: Dict[str, str]):
+        """
+        문서 저장소로 코퍼스 통계를 만들고 LLM 분류 결과로 분류기 학습
+
+        Args:
+            documents: 전체 문서 리스트
+            labels: 문서 이름 → LLM이 분류한 카테고리
+        """
+        corpus = CorpusStats.from_documents(documents)
+        keyword_extractor = KeywordExtractor(corpus)
+        classifier = CentroidClassifier(corpus)
+
+        texts = []
+        categories = []
+        for doc in documents:
+            category = normalize_category(labels.get(doc.get('name', ''), ''))
+            if category and doc.get('content'):
+                texts.append(doc['content'])
+                categories.append(category)
+        classifier.fit(texts, categories)
+
+        # 학습이 끝난 뒤 한 번에 교체 (다른 스레드의 추출/분류와 겹쳐도 안전)
+        self.keyword_extractor = keyword_extractor
+        self.classifier = classifier
+        print(f"로컬 인사이트 학습: 문서 {corpus.num_docs}개, 분류 학습 {len(texts)}개")
+
+    def extract_keywords(self, document: Dict, num_keywords: int = 10) -> Optional[List[str]]:
+        """
+        로컬 키워드 추출 (문서가 너무 짧으면 None)
+
+        Args:
+            document: 문서 딕셔너리
+            num_keywords: 추출할 키워드 수
+
+        Returns:
+            Optional[List[str]]: 키워드 리스트 또는 None(LLM 필요)
+        """
+        content = document.get('content') or ''
+        if len(tokenize(content[:MAX_ANALYZED_CHARS])) < self.min_keyword_tokens:
+            self._record('keywords_llm')
+            return None
+        keywords = [keyword for keyword, _ in self.keyword_extractor.extract(content, num_keywords)]
+        if len(keywords) < num_keywords:
+            self._record('keywords_llm')
+            return None
+        self._record('keywords_local')
+        return keywords
+
+    def classify(self, document: Dict) -> Optional[Tuple[str, float]]:
+        """
+        로컬 문서 분류 (신뢰도가 낮으면 None)
+
+        Args:
+            document: 문서 딕셔너리
+
+        Returns:
+            Optional[Tuple[str, float]]: (카테고리, 유사도) 또는 None(LLM 필요)
+        """
+        classifier = self.classifier
+        prediction = None
+        if classifier.num_examples >= self.min_training_examples and len(classifier.categories) >= 2:
+            prediction = classifier.predict(document.get('content') or '')
+
+        if (prediction is None or prediction[1] < self.min_similarity
+                or prediction[2] < self.min_margin):
+            self._record('classify_llm')
+            return None
+
+        self._record('classify_local')
+        return prediction[0], prediction[1]
+
+    def _record(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        로컬 처리 통계
+
+        Returns:
+            Dict: 작업별 로컬/LLM 처리 수와 LLM 호출 절감 비율
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        local = counts.get('keywords_local', 0) + counts.get('classify_local', 0)
+        total = local + counts.get('keywords_llm', 0) + counts.get('classify_llm', 0)
+        return {
+            'keywords_local': counts.get('keywords_local', 0),
+            'keywords_llm': counts.get('keywords_llm', 0),
+            'classify_local': counts.get('classify_local', 0),
+            'classify_llm': counts.get('classify_llm', 0),
+            'trained_examples': self.classifier.num_examples,
+            'avoided_ratio': local / total if total else 0.0
+        }
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    """최댓값 기준 0~1 정규화"""
+    high = values.max() if values.size else 0
+    return values / high if high > 0 else values
@@ -0,0 +1,107 @@
+"""
+Jupyter Notebook 추출 모듈
+.ipynb JSON을 표준 json 파서(C 구현)로 한 번에 읽어 nbformat 스키마 검증과 NotebookNode 변환 없이
+셀을 순서대로 기록하는 기능 제공 (이미지/HTML 등 text/plain이 아닌 출력은 건너뛰고,
+긴 텍스트 출력은 설정한 글자 수에서 잘라 색인이 커지지 않도록 함)
+"""
+
+import json
+from typing import Iterable, List, Union
+from segments import SegmentBuilder, KIND_CELL
+
+_CELL_LABELS = {'markdown': "[Markdown Cell]", 'code': "[Code Cell]", 'raw': "[Raw Cell]"}
+
+
+def _join(value: Union[str, List[str], None]) -> str:
+    """notebook의 멀티라인 문자열 (문자열 또는 줄 리스트) 합치기"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "".join(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def truncate_output(text: str, max_chars: int) -> str:
+    """
+    긴 출력 텍스트 자르기 (데이터프레임 repr 등)
+
+    Args:
+        text: 출력 텍스트
+        max_chars: 최대 글자 수 (0이면 제한 없음)
+
+    Returns:
+        str: 잘린 텍스트 (잘랐으면 생략한 글자 수 표시)
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars].rstrip()}\n... (출력 {len(text) - max_chars}자 생략)"
+
+
+def output_text(output: dict) -> str:
+    """
+    셀 출력 하나의 텍스트 (stream 출력과 text/plain 결과만 사용, 이미지/HTML 등 다른 MIME은 건너뜀)
+
+    Args:
+        output: 셀 출력 (nbformat v4 구조)
+
+    Returns:
+        str: 출력 텍스트 (없으면 빈 문자열)
+    """
+    if 'text' in output:
+        return _join(output.get('text'))
+    data = output.get('data')
+    if isinstance(data, dict) and 'text/plain' in data:
+        return _join(data['text/plain'])
+    return ""
+
+
+def load_notebook_cells(file_bytes: bytes) -> list:
+    """
+    nbformat 4 notebook의 셀 목록 (스키마 검증 없음)
+
+    Args:
+        file_bytes: .ipynb 파일 바이트
+
+    Returns:
+        list: 셀 dict 리스트
+
+    Raises:
+        ValueError: JSON이 아니거나 nbformat 4 구조가 아닌 경우 (nbformat으로 다시 처리)
+    """
+    notebook = json.loads(file_bytes)
+    if not isinstance(notebook, dict) or notebook.get('nbformat') != 4:
+        raise ValueError("nbformat 4 notebook이 아닙니다.")
+    cells = notebook.get('cells')
+    if not isinstance(cells, list) or not all(isinstance(cell, dict) for cell in cells):
+        raise ValueError("notebook 셀 구조가 올바르지 않습니다.")
+    return cells
+
+
+def write_notebook_cells(builder: SegmentBuilder, cells: Iterable[dict], max_output_chars: int = 0):
+    """
+    notebook 셀을 순서대로 기록 (셀 단위 세그먼트, 조각 사이는 줄바꿈으로 연결)
+
+    Args:
+        builder: 텍스트/세그먼트 기록 대상
+        cells: 셀 dict 리스트 (json 결과 또는 nbformat NotebookNode)
+        max_output_chars: 출력 하나의 최대 글자 수 (0이면 제한 없음)
+    """
+    written = False
+    for cell_num, cell in enumerate(cells, 1):
+        builder.begin(KIND_CELL, cell_num)
+        label = _CELL_LABELS.get(cell.get('cell_type'))
+        if label:
+            parts = [f"{label}\n{_join(cell.get('source'))}\n"]
+            if cell.get('cell_type') == 'code':
+                for output in cell.get('outputs') or ():
+                    if not isinstance(output, dict):
+                        continue
+                    text = output_text(output)
+                    if text:
+                        parts.append(f"[Output]\n{truncate_output(text, max_output_chars)}\n")
+            for part in parts:
+                if written:
+                    builder.write('\n')
+                builder.write(part)
+                written = True
+        builder.end()
@@ -0,0 +1,287 @@
+"""
+OOXML 추출 모듈
+DOCX/PPTX 압축 파일에서 word/document.xml과 ppt/slides/slide*.xml을 iterparse로 스트리밍 파싱하여
+문단/표 셀 텍스트를 문서 순서대로 기록하는 기능 제공 (python-docx/python-pptx 객체 모델을 만들지 않고,
+처리한 요소는 바로 트리에서 제거하여 메모리 사용량을 요소 깊이 수준으로 유지)
+"""
+
+import io
+import posixpath
+import re
+import zipfile
+from typing import Iterator, List, Optional, Tuple
+from lxml import etree
+from segments import SegmentBuilder, KIND_PARAGRAPH, KIND_SLIDE, KIND_TABLE
+from table_format import markdown_table
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# 호환용 대체 콘텐츠 (AlternateContent의 Choice와 같은 내용을 반복하므로 건너뜀)
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# 스트리밍 파싱에서 이벤트를 받을 태그 (나머지 서식 요소는 lxml에서 건너뜀)
+_DOCX_TAGS = tuple(_W + name for name in ('p', 't', 'tab', 'br', 'cr', 'tbl', 'tr', 'tc', 'gridSpan', 'vMerge')) + (_MC_FALLBACK,)
+_PPTX_TAGS = (tuple(_A + name for name in ('p', 't', 'br', 'tbl', 'tr', 'tc', 'txBody'))
+              + (_P + 'txBody', _MC_FALLBACK))
+
+_SLIDE_NAME = re.compile(r'ppt/slides/slide(\d+)\.xml$')
+
+
+def _iterparse(stream, tags: Tuple[str, ...]) -> Iterator[Tuple[str, etree._Element]]:
+    """
+    XML 스트림에서 지정한 태그의 ('start' | 'end', 요소) 이벤트만 반환 (태그 선별은 lxml에서 처리)
+
+    end 이벤트를 처리한 뒤 요소 내용과 앞쪽 형제 요소를 지워 트리가 쌓이지 않도록 함
+
+    Yields:
+        Tuple[str, etree._Element]: (이벤트, 요소)
+    """
+    for event, element in etree.iterparse(stream, events=('start', 'end'), tag=tags,
+                                          huge_tree=True, resolve_entities=False):
+        yield event, element
+        if event == 'end':
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+
+class _TableCollector:
+    """표 행/셀 텍스트 수집 (중첩 표의 텍스트는 바깥 셀에 포함)"""
+
+    def __init__(self):
+        self.rows: List[List[str]] = []
+        self.cell: Optional[List[str]] = None
+        self.span = 1
+
+    def start_row(self):
+        self.rows.append([])
+
+    def start_cell(self):
+        self.cell = []
+        self.span = 1
+
+    def end_cell(self, merged: bool = False):
+        if self.cell is None:
+            return
+        text = "" if merged else " ".join(part for part in self.cell if part)
+        if not self.rows:
+            self.rows.append([])
+        # 가로 병합 셀은 한 번만 쓰고 나머지 열은 빈 칸으로 채움 (객체 모델처럼 같은 텍스트를 반복하지 않음)
+        self.rows[-1].extend([text] + [""] * (self.span - 1))
+        self.cell = None
+
+
+def _write_table(builder: SegmentBuilder, rows: List[List[str]], table_num: int, table_format: str):
+    """표 하나를 세그먼트로 기록 (markdown은 헤더 범위 포함, legacy는 셀을 공백으로 연결)"""
+    if table_format == 'markdown':
+        lines = markdown_table(rows)
+        if not lines:
+            return
+        # 표가 커서 여러 청크로 나뉘면 뒤쪽 청크 앞에 헤더를 반복
+        header = (builder.length, builder.length + len(lines[0]))
+        builder.begin(KIND_TABLE, table_num, header)
+        builder.write(lines[0] + "".join(line + "\n" for line in lines[1:]))
+    else:
+        builder.begin(KIND_TABLE, table_num)
+        for row in rows:
+            cells = [cell for cell in row if cell]
+            if cells:
+                builder.write(" ".join(cells) + "\n")
+    builder.end()
+
+
+def write_docx(builder: SegmentBuilder, file_bytes: bytes, table_format: str = 'markdown'):
+    """
+    DOCX 본문을 문서 순서대로 기록 (본문 문단은 문단 세그먼트, 표는 표 세그먼트)
+
+    Args:
+        builder: 텍스트/세그먼트 기록 대상
+        file_bytes: docx 파일 바이트
+        table_format: 'markdown' 또는 'legacy' (셀을 공백으로 이어 쓰는 형식)
+    """
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        with archive.open('word/document.xml') as stream:
+            paragraph_num = 0
+            table_num = 0
+            # 열린 문단별 텍스트 조각 (글상자처럼 문단 안의 문단은 바깥 문단에 이어 붙임)
+            paragraphs: List[List[str]] = []
+            table_depth = 0
+            table = None
+            merged = False
+            skip_depth = 0
+
+            for event, element in _iterparse(stream, _DOCX_TAGS):
+                tag = element.tag
+                if tag == _MC_FALLBACK:
+                    skip_depth += 1 if event == 'start' else -1
+                    continue
+                if skip_depth:
+                    continue
+
+                if event == 'start':
+                    if tag == _W + 'p':
+                        paragraphs.append([])
+                    elif tag == _W + 'tbl':
+                        table_depth += 1
+                        if table_depth == 1:
+                            table = _TableCollector()
+                    elif table_depth == 1 and tag == _W + 'tr':
+                        table.start_row()
+                    elif table_depth == 1 and tag == _W + 'tc':
+                        table.start_cell()
+                        merged = False
+                    continue
+
+                if tag == _W + 't':
+                    if paragraphs and element.text:
+                        paragraphs[-1].append(element.text)
+                elif tag == _W + 'tab':
+                    # 탭 정지 정의(w:tabs 안의 w:tab)가 아닌 본문 탭만 반영
+                    if paragraphs and element.getparent().tag == _W + 'r':
+                        paragraphs[-1].append("\t")
+                elif tag in (_W + 'br', _W + 'cr'):
+                    if paragraphs:
+                        paragraphs[-1].append("\n")
+                elif tag == _W + 'p':
+                    text = "".join(paragraphs.pop()).strip()
+                    if paragraphs:
+                        if text:
+                            paragraphs[-1].append(" " + text)
+                    elif table_depth:
+                        if table.cell is not None:
+                            table.cell.append(text)
+                    else:
+                        paragraph_num += 1
+                        if text:
+                            builder.add(text, KIND_PARAGRAPH, paragraph_num)
+                            builder.write("\n")
+                elif table_depth == 1 and tag == _W + 'gridSpan':
+                    table.span = max(int(element.get(_W + 'val', '1') or 1), 1)
+                elif table_depth == 1 and tag == _W + 'vMerge':
+                    # 세로 병합의 이어지는 셀 (restart가 아닌 경우)
+                    merged = element.get(_W + 'val', 'continue') != 'restart'
+                elif table_depth == 1 and tag == _W + 'tc':
+                    table.end_cell(merged)
+                elif tag == _W + 'tbl':
+                    table_depth -= 1
+                    if table_depth == 0:
+                        table_num += 1
+                        _write_table(builder, table.rows, table_num, table_format)
+                        builder.write("\n")
+                        table = None
+
+
+def _slide_paths(archive: zipfile.ZipFile) -> List[str]:
+    """presentation.xml의 슬라이드 목록 순서로 슬라이드 XML 경로 반환 (읽을 수 없으면 파일 번호 순)"""
+    names = set(archive.namelist())
+    try:
+        presentation = etree.fromstring(archive.read('ppt/presentation.xml'))
+        relations = etree.fromstring(archive.read('ppt/_rels/presentation.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in relations.iter(_PKG_REL + 'Relationship')}
+        paths = []
+        for slide_id in presentation.iter(_P + 'sldId'):
+            target = targets.get(slide_id.get(_R + 'id'))
+            if not target:
+                continue
+            path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('ppt', target))
+            if path in names:
+                paths.append(path)
+        if paths:
+            return paths
+    except (KeyError, etree.XMLSyntaxError):
+        pass
+    numbered = [(int(match.group(1)), name) for name in names for match in [_SLIDE_NAME.match(name)] if match]
+    return [name for _, name in sorted(numbered)]
+
+
+def write_pptx(builder: SegmentBuilder, file_bytes: bytes, table_format: str = 'markdown'):
+    """
+    PPTX 슬라이드를 순서대로 기록 (슬라이드 세그먼트, 도형 텍스트와 표를 슬라이드 안의 순서대로)
+
+    Args:
+        builder: 텍스트/세그먼트 기록 대상
+        file_bytes: pptx 파일 바이트
+        table_format: 'markdown' 또는 'legacy' ('셀 | 셀' 형식)
+    """
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+        for slide_num, path in enumerate(_slide_paths(archive), 1):
+            builder.write("\n")
+            builder.begin(KIND_SLIDE, slide_num)
+            builder.write(f"=== 슬라이드 {slide_num} ===\n")
+            with archive.open(path) as stream:
+                _write_slide(builder, stream, table_format)
+            builder.end()
+            builder.write("\n")
+
+
+def _write_slide(builder: SegmentBuilder, stream, table_format: str):
+    """슬라이드 XML 하나를 기록 (표 행은 같은 슬라이드 세그먼트 안에 기록)"""
+    body: List[str] = []
+    paragraph: Optional[List[str]] = None
+    table_depth = 0
+    table = None
+    skip_depth = 0
+
+    for event, element in _iterparse(stream, _PPTX_TAGS):
+        tag = element.tag
+        if tag == _MC_FALLBACK:
+            skip_depth += 1 if event == 'start' else -1
+            continue
+        if skip_depth:
+            continue
+
+        if event == 'start':
+            if tag == _A + 'p':
+                paragraph = []
+            elif tag == _A + 'tbl':
+                table_depth += 1
+                if table_depth == 1:
+                    table = _TableCollector()
+            elif table_depth == 1 and tag == _A + 'tr':
+                table.start_row()
+            elif table_depth == 1 and tag == _A + 'tc':
+                table.start_cell()
+            continue
+
+        if tag == _A + 't':
+            if paragraph is not None and element.text:
+                paragraph.append(element.text)
+        elif tag == _A + 'br':
+            if paragraph is not None:
+                paragraph.append("\n")
+        elif tag == _A + 'p':
+            text = "".join(paragraph or []).strip()
+            paragraph = None
+            if table_depth:
+                if table.cell is not None:
+                    table.cell.append(text)
+            else:
+                body.append(text)
+        elif tag in (_P + 'txBody', _A + 'txBody') and not table_depth:
+            # 도형 하나의 텍스트
+            text = "\n".join(body).strip()
+            body = []
+            if text:
+                builder.write(text + "\n")
+        elif table_depth == 1 and tag == _A + 'tc':
+            # hMerge/vMerge 셀은 병합된 앞 셀의 연속이므로 빈 칸으로 기록
+            merged = element.get('hMerge') in ('1', 'true') or element.get('vMerge') in ('1', 'true')
+            table.end_cell(merged)
+        elif tag == _A + 'tbl':
+            table_depth -= 1
+            if table_depth == 0:
+                if table_format == 'markdown':
+                    lines = markdown_table(table.rows)
+                    if lines:
+                        builder.write(lines[0] + "".join(line + "\n" for line in lines[1:]))
+                else:
+                    for row in table.rows:
+                        cells = [cell for cell in row if cell]
+                        if cells:
+                            builder.write(" | ".join(cells) + "\n")
+                table = None
@@ -0,0 +1,101 @@
+"""
+Azure OpenAI 클라이언트 모듈
+프로세스 전체에서 재사용하는 지연 생성 클라이언트와 HTTP 연결 풀 설정 제공
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from config import env_flag, env_float, env_int
+
+_client = None
+_client_lock = threading.Lock()
+
+# 비동기 클라이언트의 연결 풀은 이벤트 루프에 묶이므로 루프별로 보관
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _client_settings() -> dict:
+    """환경 변수에서 Azure OpenAI 접속 정보 읽기"""
+    return {
+        'api_key': os.getenv("AZURE_OPENAI_API_KEY"),
+        'api_version': os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+        'azure_endpoint': os.getenv("AZURE_OPENAI_ENDPOINT"),
+        # 재시도는 공유 제한기와 함께 AIAssistant에서 직접 처리
+        'max_retries': 0
+    }
+
+
+def _http2_available() -> bool:
+    """HTTP/2 사용 가능 여부 (h2 패키지 필요)"""
+    if not env_flag("AZURE_OPENAI_HTTP2", True):
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _http_options() -> dict:
+    """httpx 연결 풀 설정"""
+    import httpx
+
+    return {
+        'limits': httpx.Limits(
+            max_connections=env_int("AZURE_OPENAI_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=env_int("AZURE_OPENAI_MAX_KEEPALIVE", 10),
+            keepalive_expiry=env_float("AZURE_OPENAI_KEEPALIVE_EXPIRY", 30.0)
+        ),
+        'timeout': httpx.Timeout(
+            env_float("AZURE_OPENAI_TIMEOUT", 60.0),
+            connect=env_float("AZURE_OPENAI_CONNECT_TIMEOUT", 10.0)
+        ),
+        'http2': _http2_available()
+    }
+
+
+def get_openai_client():
+    """
+    공유 동기 Azure OpenAI 클라이언트 반환 (첫 호출 시 생성)
+
+    Returns:
+        AzureOpenAI: 공유 클라이언트
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import AzureOpenAI
+
+                _client = AzureOpenAI(
+                    http_client=httpx.Client(**_http_options()),
+                    **_client_settings()
+                )
+    return _client
+
+
+def get_async_openai_client():
+    """
+    현재 이벤트 루프용 공유 비동기 Azure OpenAI 클라이언트 반환 (첫 호출 시 생성)
+
+    Returns:
+        AsyncAzureOpenAI: 공유 비동기 클라이언트
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _client_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                import httpx
+                from openai import AsyncAzureOpenAI
+
+                client = AsyncAzureOpenAI(
+                    http_client=httpx.AsyncClient(**_http_options()),
+                    **_client_settings()
+                )
+                _async_clients[loop] = client
+    return client
@@ -0,0 +1,374 @@
+"""
+PDF 추출 모듈
+교체 가능한 PDF 텍스트 백엔드(PyPDF2, pypdf, pdfminer.six, pypdfium2), 페이지 단위 스트리밍 추출,
+큰 PDF의 프로세스 풀 병렬 추출, 백엔드 벤치마크 기능 제공
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import env_int, env_str
+
+# 벤치마크 결과가 없을 때의 백엔드 우선순위
+# (requirements의 PyPDF2를 먼저 사용해 다른 라이브러리가 함께 설치되어도 추출 텍스트와 내용 해시가 바뀌지 않도록 함,
+#  나머지는 일반적으로 빠른 순)
+DEFAULT_BACKEND_ORDER = ['pypdf2', 'pypdfium2', 'pypdf', 'pdfminer']
+
+# 'auto' 선택 시 참고하는 벤치마크 결과 파일
+BENCHMARK_FILE = os.path.join("documents", "pdf_backend_benchmark.json")
+
+
+class PDFBackend:
+    """PDF 텍스트 추출 백엔드 인터페이스 (파일 경로 기반, 프로세스 풀에서도 사용 가능)"""
+
+    name = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        """백엔드 라이브러리 설치 여부"""
+        raise NotImplementedError
+
+    def page_count(self, filepath: str) -> int:
+        """전체 페이지 수"""
+        raise NotImplementedError
+
+    def iter_pages(self, filepath: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        """
+        페이지 구간 텍스트를 한 페이지씩 추출 (파일은 한 번만 열어 둠)
+
+        Args:
+            filepath: PDF 파일 경로
+            start: 시작 페이지 번호 (0부터)
+            end: 끝 페이지 번호 (포함하지 않음)
+
+        Yields:
+            Tuple[int, str]: (페이지 번호(1부터), 텍스트)
+        """
+        raise NotImplementedError
+
+    def extract_pages(self, filepath: str, start: int, end: int) -> List[Tuple[int, str]]:
+        """페이지 구간 텍스트 추출 (프로세스 풀 작업용)"""
+        return list(self.iter_pages(filepath, start, end))
+
+
+class PyPDF2Backend(PDFBackend):
+    """PyPDF2 백엔드 (기존 기본값)"""
+
+    name = 'pypdf2'
+
+    @classmethod
+    def available(cls) -> bool:
+        return _importable('PyPDF2')
+
+    def page_count(self, filepath: str) -> int:
+        import PyPDF2
+        with open(filepath, 'rb') as f:
+            return len(PyPDF2.PdfReader(f).pages)
+
+    def iter_pages(self, filepath: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        import PyPDF2
+        with open(filepath, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for page_num in range(start, end):
+                yield page_num + 1, reader.pages[page_num].extract_text() or ""
+
+
+class PypdfBackend(PDFBackend):
+    """pypdf 백엔드 (PyPDF2의 후속 프로젝트)"""
+
+    name = 'pypdf'
+
+    @classmethod
+    def available(cls) -> bool:
+        return _importable('pypdf')
+
+    def page_count(self, filepath: str) -> int:
+        import pypdf
+        with open(filepath, 'rb') as f:
+            return len(pypdf.PdfReader(f).pages)
+
+    def iter_pages(self, filepath: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        import pypdf
+        with open(filepath, 'rb') as f:
+            reader = pypdf.PdfReader(f)
+            for page_num in range(start, end):
+                yield page_num + 1, reader.pages[page_num].extract_text() or ""
+
+
+class PdfminerBackend(PDFBackend):
+    """pdfminer.six 백엔드 (레이아웃 분석 기반, 느리지만 글자 순서가 안정적)"""
+
+    name = 'pdfminer'
+
+    @classmethod
+    def available(cls) -> bool:
+        return _importable('pdfminer')
+
+    def page_count(self, filepath: str) -> int:
+        from pdfminer.pdfpage import PDFPage
+        with open(filepath, 'rb') as f:
+            return sum(1 for _ in PDFPage.get_pages(f))
+
+    def iter_pages(self, filepath: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        for offset, layout in enumerate(extract_pages(filepath, page_numbers=range(start, end))):
+            text = ''.join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+            yield start + offset + 1, text
+
+
+class PdfiumBackend(PDFBackend):
+    """pypdfium2 백엔드 (PDFium 바인딩, 가장 빠름)"""
+
+    name = 'pypdfium2'
+
+    @classmethod
+    def available(cls) -> bool:
+        return _importable('pypdfium2')
+
+    def page_count(self, filepath: str) -> int:
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(filepath)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages(self, filepath: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(filepath)
+        try:
+            for page_num in range(start, end):
+                page = pdf[page_num]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                yield page_num + 1, text
+        finally:
+            pdf.close()
+
+
+PDF_BACKENDS = {backend.name: backend for backend in
+                [PyPDF2Backend, PypdfBackend, PdfminerBackend, PdfiumBackend]}
+
+
+def _importable(module_name: str) -> bool:
+    """모듈 설치 여부 확인"""
+    try:
+        __import__(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends() -> List[str]:
+    """
+    설치된 백엔드 이름 리스트 (기본 우선순위 순)
+
+    Returns:
+        List[str]: 백엔드 이름 리스트
+    """
+    return [name for name in DEFAULT_BACKEND_ORDER if PDF_BACKENDS[name].available()]
+
+
+def select_pdf_backend() -> str:
+    """
+    사용할 백엔드 이름 선택
+
+    SMARTDOC_PDF_BACKEND가 설치된 백엔드 이름이면 그대로 사용하고,
+    'auto'(기본값)이면 벤치마크 결과의 선택을, 결과가 없으면 기본 우선순위를 따름
+
+    Returns:
+        str: 백엔드 이름
+    """
+    installed = available_backends()
+    if not installed:
+        raise Exception("사용 가능한 PDF 라이브러리가 없습니다. pypdf2, pypdf, pdfminer.six, pypdfium2 중 하나를 설치해주세요.")
+
+    configured = (env_str("SMARTDOC_PDF_BACKEND", "auto") or "auto").lower()
+    if configured in installed:
+        return configured
+    if configured != 'auto':
+        print(f"PDF 백엔드 '{configured}'를 사용할 수 없어 자동 선택합니다.")
+
+    try:
+        if os.path.exists(BENCHMARK_FILE):
+            with open(BENCHMARK_FILE, 'r', encoding='utf-8') as f:
+                selected = json.load(f).get('selected')
+            if selected in installed:
+                return selected
+    except Exception as e:
+        print(f"PDF 백엔드 벤치마크 결과 로드 실패: {str(e)}")
+
+    return installed[0]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    PDF 추출용 공유 프로세스 풀 반환 (SMARTDOC_PDF_WORKERS가 1 이하이면 None, 기본값 1)
+
+    Streamlit 서버는 여러 스레드로 동작하므로 fork 대신 spawn으로 작업 프로세스를 시작함
+    (스레드가 잡고 있던 잠금이 복사되어 자식 프로세스가 멈추는 문제 방지)
+
+    Returns:
+        Optional[ProcessPoolExecutor]: 프로세스 풀
+    """
+    global _pool
+    workers = env_int("SMARTDOC_PDF_WORKERS", 1)
+    if workers <= 1:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(_pool.shutdown, wait=False)
+    return _pool
+
+
+def _extract_page_range(backend_name: str, filepath: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """프로세스 풀 작업: 파일 경로와 백엔드 이름만 전달받아 페이지 구간 추출"""
+    return PDF_BACKENDS[backend_name]().extract_pages(filepath, start, end)
+
+
+def iter_pdf_pages(file_bytes: bytes, backend_name: Optional[str] = None, min_pages_for_pool: int = 40,
+                   pages_per_task: int = 20) -> Iterator[Tuple[int, int, str]]:
+    """
+    PDF 페이지를 순서대로 하나씩 추출하여 반환 (큰 PDF는 프로세스 풀로 병렬 추출)
+
+    병렬 모드에서도 앞 구간이 끝나는 대로 바로 반환하므로 페이지 진행률을 추출 순서대로 표시할 수 있음.
+    선택된 백엔드가 파일을 열지 못하면 설치된 다른 백엔드로 다시 시도함
+
+    Args:
+        file_bytes: PDF 파일 바이트
+        backend_name: 백엔드 이름 (None이면 select_pdf_backend())
+        min_pages_for_pool: 프로세스 풀을 사용할 최소 페이지 수
+        pages_per_task: 작업 하나가 맡을 페이지 수
+
+    Yields:
+        Tuple[int, int, str]: (페이지 번호(1부터), 전체 페이지 수, 텍스트)
+    """
+    # 모든 백엔드와 작업 프로세스에 임시 파일 경로만 전달
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+        temp_file.write(file_bytes)
+        temp_path = temp_file.name
+
+    futures = []
+    try:
+        primary = backend_name or select_pdf_backend()
+        candidates = [primary] + [name for name in available_backends() if name != primary]
+
+        backend = None
+        total_pages = 0
+        for name in candidates:
+            try:
+                backend = PDF_BACKENDS[name]()
+                total_pages = backend.page_count(temp_path)
+                break
+            except Exception as e:
+                print(f"PDF 백엔드 {name} 실패, 다음 백엔드 시도: {str(e)}")
+                backend = None
+        if backend is None:
+            raise Exception("PDF 파일을 열 수 없습니다.")
+
+        pool = get_pdf_process_pool() if total_pages >= min_pages_for_pool else None
+        if pool is None:
+            for page_no, text in backend.iter_pages(temp_path, 0, total_pages):
+                yield page_no, total_pages, text
+            return
+
+        futures = [
+            pool.submit(_extract_page_range, backend.name, temp_path, start, min(start + pages_per_task, total_pages))
+            for start in range(0, total_pages, pages_per_task)
+        ]
+        # 제출 순서대로 기다려 페이지 순서를 유지
+        for future in futures:
+            for page_no, text in future.result():
+                yield page_no, total_pages, text
+    finally:
+        # 소비자가 중간에 멈추면 남은 작업 취소
+        for future in futures:
+            future.cancel()
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+
+def benchmark_backends(filepaths: List[str], backends: Optional[List[str]] = None) -> List[Dict]:
+    """
+    PDF 파일들로 백엔드별 처리량과 추출 품질 측정 (순차 실행)
+
+    Args:
+        filepaths: PDF 파일 경로 리스트
+        backends: 측정할 백엔드 이름 리스트 (None이면 설치된 전체)
+
+    Returns:
+        List[Dict]: 백엔드별 files, pages, seconds, pages_per_second, chars, chars_per_page, success_rate
+    """
+    results = []
+    for name in backends or available_backends():
+        backend = PDF_BACKENDS[name]()
+        pages = chars = succeeded = 0
+        elapsed = 0.0
+        for filepath in filepaths:
+            started = time.perf_counter()
+            try:
+                count = backend.page_count(filepath)
+                texts = backend.extract_pages(filepath, 0, count)
+            except Exception as e:
+                print(f"{name}: {os.path.basename(filepath)} 추출 실패: {str(e)}")
+                elapsed += time.perf_counter() - started
+                continue
+            elapsed += time.perf_counter() - started
+            text_chars = sum(len(text.strip()) for _, text in texts)
+            pages += count
+            chars += text_chars
+            if text_chars > 0:
+                succeeded += 1
+
+        results.append({
+            'backend': name,
+            'files': len(filepaths),
+            'pages': pages,
+            'seconds': elapsed,
+            'pages_per_second': pages / elapsed if elapsed > 0 else 0.0,
+            'chars': chars,
+            'chars_per_page': chars / pages if pages else 0.0,
+            'success_rate': succeeded / len(filepaths) if filepaths else 0.0
+        })
+    return results
+
+
+def choose_backend(results: List[Dict], min_yield_ratio: float = 0.9) -> Optional[str]:
+    """
+    벤치마크 결과에서 백엔드 선택
+
+    성공률이 최고치이고 추출 글자 수가 최고치의 min_yield_ratio 이상인 백엔드 중
+    초당 페이지 수가 가장 높은 것을 선택
+
+    Args:
+        results: benchmark_backends 결과
+        min_yield_ratio: 최고 추출 글자 수 대비 최소 비율
+
+    Returns:
+        Optional[str]: 선택된 백엔드 이름
+    """
+    if not results:
+        return None
+    best_success = max(result['success_rate'] for result in results)
+    best_chars = max(result['chars'] for result in results)
+    eligible = [result for result in results
+                if result['success_rate'] >= best_success and result['chars'] >= best_chars * min_yield_ratio]
+    return max(eligible, key=lambda result: result['pages_per_second'])['backend'] if eligible else None
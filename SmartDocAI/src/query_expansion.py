@@ -0,0 +1,279 @@
+"""
+질의 확장 모듈
+질문을 여러 변형 질의로 확장하고 병렬 검색 결과를 순위 기반으로 융합하는 기능 제공
+(LLM 확장은 로컬 변형 질의 검색과 동시에 실행)
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+from text_analysis import tokenize
+from text_normalizer import collapse_whitespace
+
+# 자주 쓰이는 외래어 용어의 한글/영문 표기 대응표
+_TRANSLITERATIONS = {
+    'azure': '애저',
+    'openai': '오픈에이아이',
+    'microsoft': '마이크로소프트',
+    'cloud': '클라우드',
+    'search': '서치',
+    'index': '인덱스',
+    'vector': '벡터',
+    'embedding': '임베딩',
+    'chatbot': '챗봇',
+    'python': '파이썬',
+    'data': '데이터',
+    'database': '데이터베이스',
+    'server': '서버',
+    'api': '에이피아이',
+    'ai': '인공지능',
+    'gpt': '지피티',
+    'llm': '거대언어모델',
+    'rag': '검색증강생성',
+    'excel': '엑셀',
+    'powerpoint': '파워포인트',
+    'word': '워드',
+    'pdf': '피디에프',
+    'streamlit': '스트림릿',
+    'langchain': '랭체인',
+    'kubernetes': '쿠버네티스',
+    'docker': '도커',
+    'devops': '데브옵스',
+    'project': '프로젝트',
+    'report': '리포트',
+    'dashboard': '대시보드',
+}
+_REVERSE_TRANSLITERATIONS = {korean: latin for latin, korean in _TRANSLITERATIONS.items()}
+
+# 어떤 질문에도 공통으로 나타나 검색을 흐리는 의문/요청 표현
+_QUESTION_NOISE = re.compile(r'(알려\s*줘|알려\s*주세요|설명해\s*줘|설명해\s*주세요|무엇인가요|뭔가요|인가요|있나요|인지|\?)')
+
+
+class QueryExpander:
+    """로컬 규칙(핵심어 추출, 음역) 및 선택적 LLM 기반 질의 확장기"""
+
+    def __init__(self, max_variants: int = 4, llm_rewriter: Optional[Callable[[str], List[str]]] = None):
+        """
+        질의 확장기 초기화
+
+        Args:
+            max_variants: 원본 질문을 포함한 최대 질의 수
+            llm_rewriter: 질문을 받아 변형 질의 리스트를 돌려주는 함수 (선택사항)
+        """
+        self.max_variants = max(max_variants, 1)
+        self.llm_rewriter = llm_rewriter
+
+    def expand(self, question: str) -> List[str]:
+        """
+        질문을 변형 질의 리스트로 확장 (LLM 확장이 있으면 응답을 기다림)
+
+        Args:
+            question: 사용자 질문
+
+        Returns:
+            List[str]: 원본 질문을 첫 번째로 하는 중복 없는 질의 리스트
+        """
+        variants = self.local_variants(question)
+        if self.wants_llm_variants(variants):
+            variants = self.merge_variants(variants, self.llm_variants(question))
+        return variants
+
+    def local_variants(self, question: str) -> List[str]:
+        """
+        로컬 규칙(핵심어, 음역)만으로 만든 변형 질의 리스트 (LLM 호출 없음)
+
+        Args:
+            question: 사용자 질문
+
+        Returns:
+            List[str]: 원본 질문을 첫 번째로 하는 중복 없는 질의 리스트
+        """
+        variants = [question]
+
+        keywords = self.extract_keywords(question)
+        if keywords:
+            variants.append(" ".join(keywords))
+
+            transliterated = self.transliterate(keywords)
+            if transliterated != keywords:
+                variants.append(" ".join(transliterated))
+
+        return self.merge_variants([], variants)
+
+    def wants_llm_variants(self, variants: List[str]) -> bool:
+        """LLM 확장이 설정되어 있고 질의를 더 추가할 자리가 남았는지 여부"""
+        return self.llm_rewriter is not None and len(variants) < self.max_variants
+
+    def llm_variants(self, question: str) -> List[str]:
+        """
+        LLM으로 만든 변형 질의 (실패하면 빈 리스트)
+
+        Args:
+            question: 사용자 질문
+
+        Returns:
+            List[str]: 변형 질의 리스트
+        """
+        try:
+            return list(self.llm_rewriter(question))
+        except Exception as e:
+            print(f"LLM 질의 확장 실패: {str(e)}")
+            return []
+
+    def merge_variants(self, variants: List[str], extra: List[str]) -> List[str]:
+        """
+        질의 리스트에 새 질의를 공백 정리/대소문자 무시 기준으로 중복 없이 추가 (max_variants까지)
+
+        Args:
+            variants: 기존 질의 리스트
+            extra: 추가할 질의 리스트
+
+        Returns:
+            List[str]: 합친 질의 리스트
+        """
+        unique = []
+        seen = set()
+        for variant in list(variants) + list(extra):
+            normalized = collapse_whitespace(variant)
+            if normalized and normalized.lower() not in seen:
+                seen.add(normalized.lower())
+                unique.append(normalized)
+        return unique[:self.max_variants]
+
+    def extract_keywords(self, question: str) -> List[str]:
+        """
+        질문에서 조사/의문 표현을 제거한 핵심어 추출
+
+        Args:
+            question: 사용자 질문
+
+        Returns:
+            List[str]: 핵심어 리스트 (순서 유지)
+        """
+        cleaned = _QUESTION_NOISE.sub(' ', question)
+        keywords = []
+        for token in tokenize(cleaned):
+            if len(token) > 1 and token not in keywords:
+                keywords.append(token)
+        return keywords
+
+    def transliterate(self, keywords: List[str]) -> List[str]:
+        """
+        핵심어의 한글/영문 표기를 서로 바꾼 리스트 반환 (예: azure ↔ 애저)
+
+        Args:
+            keywords: 핵심어 리스트
+
+        Returns:
+            List[str]: 음역된 핵심어 리스트
+        """
+        return [
+            _TRANSLITERATIONS.get(keyword, _REVERSE_TRANSLITERATIONS.get(keyword, keyword))
+            for keyword in keywords
+        ]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60,
+                           key: Callable[[Dict], str] = None) -> List[Dict]:
+    """
+    여러 검색 결과 리스트를 역순위 융합(RRF)으로 통합
+
+    Args:
+        result_lists: 질의별 검색 결과 리스트
+        k: RRF 상수 (클수록 하위 순위의 영향이 커짐)
+        key: 결과 동일성 판단 키 함수 (기본값: source + content)
+
+    Returns:
+        List[Dict]: fused_score 기준으로 정렬된 결과 리스트
+    """
+    if key is None:
+        key = lambda result: f"{result.get('source', '')}\x00{result.get('content', '')}"
+
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            result_key = key(result)
+            if result_key not in fused:
+                fused[result_key] = {'result': result, 'score': 0.0}
+            fused[result_key]['score'] += 1.0 / (k + rank + 1)
+
+    ranked = sorted(fused.values(), key=lambda item: item['score'], reverse=True)
+    fused_results = []
+    for item in ranked:
+        result = item['result'].copy()
+        result['fused_score'] = item['score']
+        fused_results.append(result)
+    return fused_results
+
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="multi-query")
+
+
+def multi_query_search(search_fn: Callable[[str], List[Dict]], queries: List[str]) -> List[Dict]:
+    """
+    여러 질의를 동시에 검색하고 결과를 융합
+
+    Args:
+        search_fn: 질의 하나를 받아 검색 결과 리스트를 반환하는 함수
+        queries: 질의 리스트
+
+    Returns:
+        List[Dict]: 융합된 검색 결과 리스트
+    """
+    if len(queries) == 1:
+        return reciprocal_rank_fusion([search_fn(queries[0])])
+
+    def run(query: str) -> List[Dict]:
+        try:
+            return search_fn(query)
+        except Exception as e:
+            print(f"질의 검색 실패 ({query}): {str(e)}")
+            return []
+
+    # 질의 수만큼 병렬로 실행하여 전체 소요 시간을 단일 질의 수준으로 유지
+    result_lists = list(_executor.map(run, queries))
+    return reciprocal_rank_fusion(result_lists)
+
+
+def expanded_search(expander: QueryExpander, search_fn: Callable[[str], List[Dict]], question: str,
+                    llm_wait_seconds: Optional[float] = None) -> Tuple[List[Dict], List[str]]:
+    """
+    질의 확장과 검색을 겹쳐 실행 (로컬 변형 질의를 먼저 검색하는 동안 LLM 확장을 기다리고,
+    LLM 변형 질의는 도착하는 대로 검색하여 함께 융합)
+
+    Args:
+        expander: 질의 확장기
+        search_fn: 질의 하나를 받아 검색 결과 리스트를 반환하는 함수
+        question: 사용자 질문
+        llm_wait_seconds: 로컬 검색이 끝난 뒤 LLM 확장을 더 기다릴 최대 시간(초), None이면 끝까지 기다림
+
+    Returns:
+        Tuple[List[Dict], List[str]]: (융합된 검색 결과 리스트, 사용한 질의 리스트)
+    """
+    queries = expander.local_variants(question)
+    llm_future = _executor.submit(expander.llm_variants, question) if expander.wants_llm_variants(queries) else None
+
+    def run(query: str) -> List[Dict]:
+        try:
+            return search_fn(query)
+        except Exception as e:
+            print(f"질의 검색 실패 ({query}): {str(e)}")
+            return []
+
+    searches = [_executor.submit(run, query) for query in queries]
+
+    if llm_future is not None:
+        # 로컬 질의 검색이 끝날 때까지는 LLM 응답을 따로 기다리지 않음
+        for future in searches:
+            future.result()
+        try:
+            extra = llm_future.result(timeout=llm_wait_seconds)
+        except FuturesTimeoutError:
+            print("LLM 질의 확장 대기 시간 초과, 로컬 질의 결과만 사용")
+            extra = []
+        merged = expander.merge_variants(queries, extra)
+        added = merged[len(queries):]
+        searches.extend(_executor.submit(run, query) for query in added)
+        queries = merged
+
+    return reciprocal_rank_fusion([future.result() for future in searches]), queries
@@ -0,0 +1,296 @@
+"""
+요청 제한 모듈
+Azure OpenAI 배포의 RPM/TPM 할당량을 프로세스 전체에서 공유하는 토큰 버킷 제한기와
+429/5xx 응답에 대한 재시도 헬퍼 제공
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from config import env_float, env_int
+
+
+class RateLimitTimeout(Exception):
+    """제한기 대기 시간 초과"""
+
+
+class Reservation:
+    """제한기에서 확보한 요청/토큰 예약 정보"""
+
+    def __init__(self, tokens: int, wait_time: float):
+        self.tokens = tokens
+        self.wait_time = wait_time
+        self.reconciled = False
+
+
+class TokenBucketRateLimiter:
+    """분당 요청 수(RPM)와 분당 토큰 수(TPM)를 함께 제한하는 공정한 토큰 버킷"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        제한기 초기화
+
+        Args:
+            requests_per_minute: 분당 최대 요청 수
+            tokens_per_minute: 분당 최대 토큰 수 (프롬프트 + 완성)
+        """
+        self.requests_per_minute = max(requests_per_minute, 1)
+        self.tokens_per_minute = max(tokens_per_minute, 1)
+
+        self._condition = threading.Condition()
+        self._available_requests = float(self.requests_per_minute)
+        self._available_tokens = float(self.tokens_per_minute)
+        self._last_refill = time.monotonic()
+
+        # 선착순 공정성을 위한 대기열 (티켓 번호)
+        self._queue = deque()
+        self._next_ticket = 0
+
+        # 통계
+        self._total_acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_reconciled_delta = 0
+
+    def _refill(self, now: float):
+        """경과 시간만큼 버킷 채우기 (잠금 상태에서 호출)"""
+        elapsed = now - self._last_refill
+        if elapsed <= 0:
+            return
+        self._available_requests = min(
+            float(self.requests_per_minute),
+            self._available_requests + elapsed * self.requests_per_minute / 60.0
+        )
+        self._available_tokens = min(
+            float(self.tokens_per_minute),
+            self._available_tokens + elapsed * self.tokens_per_minute / 60.0
+        )
+        self._last_refill = now
+
+    def _try_take(self, ticket: int, tokens: int) -> float:
+        """
+        대기열 맨 앞이고 버킷에 여유가 있으면 예약 (잠금 상태에서 호출)
+
+        Returns:
+            float: 0이면 예약 성공, 아니면 다시 시도하기까지 대기할 시간(초)
+        """
+        self._refill(time.monotonic())
+
+        if self._queue[0] != ticket:
+            return 0.05
+
+        request_deficit = 1 - self._available_requests
+        token_deficit = tokens - self._available_tokens
+        if request_deficit <= 0 and token_deficit <= 0:
+            self._available_requests -= 1
+            self._available_tokens -= tokens
+            self._queue.popleft()
+            return 0.0
+
+        wait_for_requests = max(request_deficit, 0) * 60.0 / self.requests_per_minute
+        wait_for_tokens = max(token_deficit, 0) * 60.0 / self.tokens_per_minute
+        return max(wait_for_requests, wait_for_tokens, 0.01)
+
+    def _enqueue(self, tokens: int) -> tuple:
+        """대기열에 티켓 등록 (잠금 상태에서 호출)"""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._queue.append(ticket)
+        # 버킷 용량보다 큰 요청은 용량으로 제한하여 영원히 대기하지 않도록 함
+        return ticket, min(tokens, self.tokens_per_minute)
+
+    def _record_acquire(self, tokens: int, started: float) -> Reservation:
+        """예약 통계 기록 (잠금 상태에서 호출)"""
+        wait_time = time.monotonic() - started
+        self._total_acquired += 1
+        self._total_wait += wait_time
+        self._max_wait = max(self._max_wait, wait_time)
+        return Reservation(tokens, wait_time)
+
+    def _abandon(self, ticket: int):
+        """시간 초과 등으로 대기열에서 티켓 제거 (잠금 상태에서 호출)"""
+        try:
+            self._queue.remove(ticket)
+        except ValueError:
+            pass
+        self._condition.notify_all()
+
+    def acquire(self, tokens: int, timeout: Optional[float] = None) -> Reservation:
+        """
+        요청 1건과 토큰을 예약 (동기, 필요시 대기)
+
+        Args:
+            tokens: 예상 토큰 수 (프롬프트 추정치 + max_tokens)
+            timeout: 최대 대기 시간(초), None이면 무제한
+
+        Returns:
+            Reservation: 예약 정보
+        """
+        started = time.monotonic()
+        with self._condition:
+            ticket, tokens = self._enqueue(tokens)
+            while True:
+                wait = self._try_take(ticket, tokens)
+                if wait == 0.0:
+                    self._condition.notify_all()
+                    return self._record_acquire(tokens, started)
+
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._abandon(ticket)
+                        raise RateLimitTimeout("요청 제한기 대기 시간이 초과되었습니다.")
+                    wait = min(wait, remaining)
+                self._condition.wait(wait)
+
+    async def acquire_async(self, tokens: int, timeout: Optional[float] = None) -> Reservation:
+        """
+        요청 1건과 토큰을 예약 (비동기, 이벤트 루프를 막지 않고 대기)
+
+        Args:
+            tokens: 예상 토큰 수 (프롬프트 추정치 + max_tokens)
+            timeout: 최대 대기 시간(초), None이면 무제한
+
+        Returns:
+            Reservation: 예약 정보
+        """
+        started = time.monotonic()
+        with self._condition:
+            ticket, tokens = self._enqueue(tokens)
+
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_take(ticket, tokens)
+                    if wait == 0.0:
+                        self._condition.notify_all()
+                        return self._record_acquire(tokens, started)
+
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise RateLimitTimeout("요청 제한기 대기 시간이 초과되었습니다.")
+                    wait = min(wait, remaining)
+                await asyncio.sleep(wait)
+        except BaseException:
+            with self._condition:
+                self._abandon(ticket)
+            raise
+
+    def reconcile(self, reservation: Reservation, actual_tokens: int):
+        """
+        실제 사용량(usage)으로 예약 토큰 보정
+
+        Args:
+            reservation: acquire에서 받은 예약 정보
+            actual_tokens: 응답의 실제 총 토큰 수
+        """
+        if reservation.reconciled:
+            return
+        reservation.reconciled = True
+        delta = actual_tokens - reservation.tokens
+        with self._condition:
+            # 예상보다 적게 쓰면 반환, 많이 쓰면 추가 차감 (음수 잔량 허용)
+            self._available_tokens = min(float(self.tokens_per_minute), self._available_tokens - delta)
+            self._total_reconciled_delta += delta
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict:
+        """
+        제한기 상태 통계 반환
+
+        Returns:
+            Dict: 대기열 길이, 평균/최대 대기 시간, 잔여 용량 등
+        """
+        with self._condition:
+            self._refill(time.monotonic())
+            return {
+                'queue_depth': len(self._queue),
+                'total_acquired': self._total_acquired,
+                'avg_wait_seconds': self._total_wait / self._total_acquired if self._total_acquired else 0.0,
+                'max_wait_seconds': self._max_wait,
+                'available_requests': round(self._available_requests, 2),
+                'available_tokens': int(self._available_tokens),
+                'requests_per_minute': self.requests_per_minute,
+                'tokens_per_minute': self.tokens_per_minute,
+                'reconciled_token_delta': self._total_reconciled_delta
+            }
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucketRateLimiter:
+    """
+    프로세스 전체에서 공유하는 Azure OpenAI 제한기 반환
+
+    Returns:
+        TokenBucketRateLimiter: 공유 제한기
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucketRateLimiter(
+                    requests_per_minute=env_int("AZURE_OPENAI_RPM_LIMIT", 60),
+                    tokens_per_minute=env_int("AZURE_OPENAI_TPM_LIMIT", 60000)
+                )
+    return _rate_limiter
+
+
+def get_retry_status(error: Exception) -> Optional[int]:
+    """
+    재시도 가능한 오류의 HTTP 상태 코드 반환
+
+    Args:
+        error: API 호출 중 발생한 예외
+
+    Returns:
+        Optional[int]: 429/5xx 상태 코드, 연결 오류는 0, 재시도 불가 오류는 None
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+
+    if status is not None:
+        return status if status == 429 or status >= 500 else None
+
+    # 연결 오류/타임아웃은 상태 코드 없이 재시도
+    if type(error).__name__ in ('APIConnectionError', 'APITimeoutError'):
+        return 0
+    return None
+
+
+def get_backoff_delay(attempt: int, error: Exception = None) -> float:
+    """
+    지터가 적용된 지수 백오프 대기 시간 계산
+
+    Args:
+        attempt: 재시도 횟수 (0부터 시작)
+        error: 발생한 예외 (retry-after 헤더가 있으면 우선 사용)
+
+    Returns:
+        float: 대기 시간(초)
+    """
+    base = env_float("AZURE_OPENAI_RETRY_BASE_SECONDS", 1.0)
+    cap = env_float("AZURE_OPENAI_RETRY_MAX_SECONDS", 30.0)
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = headers.get('retry-after-ms') or headers.get('retry-after')
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+            if 'retry-after-ms' in headers:
+                seconds /= 1000.0
+            return min(seconds + random.uniform(0, base), cap)
+        except ValueError:
+            pass
+
+    # Full jitter: [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,236 @@
+"""
+재순위 모듈
+검색 서비스가 반환한 넓은 후보 집합을 BM25, 질의어 근접도, 서비스 점수로 로컬에서 재정렬하는 기능 제공
+"""
+
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from text_analysis import tokenize
+
+
+class LexicalReranker:
+    """NumPy 기반 경량 어휘 재순위기"""
+
+    def __init__(self, bm25_weight: float = 0.6, proximity_weight: float = 0.2,
+                 service_weight: float = 0.2, k1: float = 1.2, b: float = 0.75):
+        """
+        재순위기 초기화
+
+        Args:
+            bm25_weight: 후보 집합 내 BM25 점수 가중치
+            proximity_weight: 질의어 근접도 점수 가중치
+            service_weight: 검색 서비스 점수 가중치
+            k1: BM25 단어 빈도 포화 계수
+            b: BM25 문서 길이 정규화 계수
+        """
+        self.bm25_weight = bm25_weight
+        self.proximity_weight = proximity_weight
+        self.service_weight = service_weight
+        self.k1 = k1
+        self.b = b
+        self.last_stats = {'candidates': 0, 'elapsed_ms': 0.0}
+
+    def rerank(self, query: str, candidates: List[Dict], top_n: int = 3,
+               score_key: str = 'score') -> List[Dict]:
+        """
+        후보 결과 재정렬
+
+        Args:
+            query: 검색 질의
+            candidates: 검색 결과 후보 리스트 (content 포함)
+            top_n: 반환할 결과 수
+            score_key: 검색 서비스 점수 필드 이름
+
+        Returns:
+            List[Dict]: rerank_score가 추가된 상위 결과 리스트
+        """
+        started = time.perf_counter()
+        if not candidates:
+            return []
+
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        contents = [candidate.get('content', '') for candidate in candidates]
+
+        scores = self.score(query_terms, contents,
+                            [candidate.get(score_key, 0) or 0 for candidate in candidates])
+
+        # 동점이면 원래 순서 유지 (stable sort)
+        order = np.argsort(-scores, kind='stable')[:top_n]
+        reranked = []
+        for idx in order:
+            result = candidates[int(idx)].copy()
+            result['rerank_score'] = float(scores[idx])
+            reranked.append(result)
+
+        self.last_stats = {
+            'candidates': len(candidates),
+            'elapsed_ms': (time.perf_counter() - started) * 1000
+        }
+        return reranked
+
+    def score(self, query_terms: List[str], contents: List[str],
+              service_scores: Sequence[float]) -> np.ndarray:
+        """
+        후보별 결합 점수 계산
+
+        후보 전체를 토큰화하지 않고 질의어만 정규식으로 찾아 빈도와 위치를 구함
+        (질의어는 어간이므로 단어 시작 위치에서의 접두 일치로 조사가 붙은 형태도 포함)
+
+        Args:
+            query_terms: 중복 없는 질의어 리스트
+            contents: 후보별 본문
+            service_scores: 후보별 검색 서비스 점수
+
+        Returns:
+            np.ndarray: 후보별 결합 점수
+        """
+        num_docs = len(contents)
+        service = _min_max(np.asarray(service_scores, dtype=np.float64))
+        if not query_terms:
+            return service
+
+        term_index = {term: i for i, term in enumerate(query_terms)}
+        pattern = re.compile(
+            r'(?<![0-9a-z가-힣])(' +
+            '|'.join(re.escape(term) for term in sorted(query_terms, key=len, reverse=True)) + ')'
+        )
+
+        # 질의어 빈도 행렬 (후보 수 × 질의어 수)과 후보 길이(단어 수)
+        tf = np.zeros((num_docs, len(query_terms)), dtype=np.float64)
+        doc_lengths = np.zeros(num_docs, dtype=np.float64)
+        proximity = np.zeros(num_docs, dtype=np.float64)
+
+        for doc_idx, content in enumerate(contents):
+            lowered = content.lower()
+            num_words = len(lowered.split())
+            doc_lengths[doc_idx] = num_words
+
+            positions = [(match.start(), term_index[match.group(1)]) for match in pattern.finditer(lowered)]
+            if not positions:
+                continue
+            terms, counts = np.unique(np.fromiter((term for _, term in positions), dtype=np.int64), return_counts=True)
+            tf[doc_idx, terms] = counts
+
+            chars_per_word = len(lowered) / max(num_words, 1)
+            proximity[doc_idx] = _proximity_score(positions, len(query_terms), chars_per_word)
+
+        avg_length = doc_lengths.mean() if doc_lengths.sum() > 0 else 1.0
+
+        # 후보 집합을 코퍼스로 보는 BM25
+        df = (tf > 0).sum(axis=0)
+        idf = np.log1p((num_docs - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths / avg_length)
+        bm25 = (tf * (self.k1 + 1) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+        return (self.bm25_weight * _min_max(bm25)
+                + self.proximity_weight * proximity
+                + self.service_weight * service)
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    """0~1 범위로 정규화 (모두 같으면 0)"""
+    if values.size == 0:
+        return values
+    low, high = values.min(), values.max()
+    if high - low <= 0:
+        return np.zeros_like(values)
+    return (values - low) / (high - low)
+
+
+def _proximity_score(positions: List[tuple], num_terms: int, chars_per_word: float) -> float:
+    """
+    서로 다른 질의어를 모두 포함하는 최소 구간 기반 근접도 점수 (0~1)
+
+    Args:
+        positions: 등장 순서대로 정렬된 (문자 위치, 질의어 번호) 리스트
+        num_terms: 전체 질의어 수
+        chars_per_word: 단어당 평균 문자 수 (문자 구간을 단어 구간으로 환산)
+    """
+    if num_terms == 1:
+        return 1.0
+
+    # 슬라이딩 윈도우로 등장한 질의어를 모두 포함하는 최소 구간 탐색
+    distinct_total = len({term for _, term in positions})
+    coverage = distinct_total / num_terms
+    if distinct_total == 1:
+        return 0.5 * coverage
+
+    window_counts = Counter()
+    best_span = None
+    left = 0
+    for right in range(len(positions)):
+        window_counts[positions[right][1]] += 1
+        while len(window_counts) == distinct_total:
+            span = positions[right][0] - positions[left][0]
+            if best_span is None or span < best_span:
+                best_span = span
+            left_term = positions[left][1]
+            window_counts[left_term] -= 1
+            if window_counts[left_term] == 0:
+                del window_counts[left_term]
+            left += 1
+
+    span_words = best_span / max(chars_per_word, 1.0) + 1
+    return coverage * min(distinct_total / span_words, 1.0)
+
+
+def recall_at_n(results: List[Dict], relevant_sources: Sequence[str], n: int) -> float:
+    """
+    상위 N개 결과의 재현율 계산
+
+    Args:
+        results: 검색 결과 리스트 (source 포함)
+        relevant_sources: 정답 문서 이름 리스트
+        n: 평가할 상위 결과 수
+
+    Returns:
+        float: 재현율 (0.0 ~ 1.0)
+    """
+    relevant = set(relevant_sources)
+    if not relevant:
+        return 0.0
+    retrieved = {result.get('source', result.get('name', '')) for result in results[:n]}
+    return len(relevant & retrieved) / len(relevant)
+
+
+def evaluate_reranking(search_fn, questions: List[Dict], candidates: int = 30, top_n: int = 3,
+                       reranker: Optional[LexicalReranker] = None) -> Dict:
+    """
+    1단계 검색(top_n)과 2단계 재순위(candidates → top_n)의 recall@N 비교
+
+    Args:
+        search_fn: (질의, top_k)를 받아 검색 결과를 반환하는 함수
+        questions: {'question': str, 'relevant': [문서 이름, ...]} 리스트
+        candidates: 2단계 검색의 후보 수
+        top_n: 평가할 상위 결과 수
+        reranker: 재순위기 (기본값: LexicalReranker())
+
+    Returns:
+        Dict: 1단계/2단계 평균 recall@N과 평균 재순위 시간
+    """
+    reranker = reranker or LexicalReranker()
+    baseline_recalls = []
+    reranked_recalls = []
+    rerank_times = []
+
+    for item in questions:
+        baseline = search_fn(item['question'], top_n)
+        baseline_recalls.append(recall_at_n(baseline, item['relevant'], top_n))
+
+        wide = search_fn(item['question'], candidates)
+        reranked = reranker.rerank(item['question'], wide, top_n)
+        rerank_times.append(reranker.last_stats['elapsed_ms'])
+        reranked_recalls.append(recall_at_n(reranked, item['relevant'], top_n))
+
+    count = max(len(questions), 1)
+    return {
+        'questions': len(questions),
+        'top_n': top_n,
+        'candidates': candidates,
+        'baseline_recall': sum(baseline_recalls) / count,
+        'reranked_recall': sum(reranked_recalls) / count,
+        'avg_rerank_ms': sum(rerank_times) / max(len(rerank_times), 1)
+    }
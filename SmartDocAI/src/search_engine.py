@@ -7,7 +7,8 @@ import os
 import json
 import re
 import base64
-from typing import List, Dict, Optional
+from array import array
+from typing import List, Dict, Optional, Tuple
 from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
@@ -27,6 +28,7 @@ from azure.search.documents.indexes.models import (
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.models import VectorizedQuery
 import tiktoken
+from segments import SegmentTable, segment_chunk_spans
 
 class SearchEngine:
     """Azure AI Search 기반 검색 엔진"""
@@ -71,6 +73,9 @@ class SearchEngine:
             # 토크나이저 초기화
             self.encoding = tiktoken.get_encoding("cl100k_base")
             
+            # 문서별 (세그먼트 테이블, 청크 시작 오프셋, 청크 끝 오프셋) - 검색 결과 출처 위치 표시용
+            self.chunk_locations: Dict[str, Tuple[SegmentTable, array, array]] = {}
+            
             # 인덱스 생성 확인
             self._ensure_index_exists()
             
@@ -148,7 +153,8 @@ class SearchEngine:
                     SimpleField(name="id", type=SearchFieldDataType.String, key=True),
                     SearchableField(name="title", type=SearchFieldDataType.String),
                     SearchableField(name="content", type=SearchFieldDataType.String),
-                    SimpleField(name="source", type=SearchFieldDataType.String),
+                    # 두 단계 검색에서 선택된 문서로 범위를 좁히기 위해 필터 가능
+                    SimpleField(name="source", type=SearchFieldDataType.String, filterable=True),
                     SimpleField(name="chunk_index", type=SearchFieldDataType.Int32),
                     SearchField(
                         name="content_vector",
@@ -195,8 +201,17 @@ class SearchEngine:
             search_documents = []
             
             for doc_idx, document in enumerate(documents):
-                # 문서를 청크로 분할
-                chunks = self._chunk_document(document['content'])
+                # 문서를 청크로 분할 (세그먼트 테이블이 있으면 페이지/슬라이드/시트 경계에 맞춤)
+                segments = document.get('segments')
+                if segments:
+                    spans = self._chunk_segments(document['content'], segments)
+                    chunks = [chunk for chunk, _, _ in spans]
+                    self.chunk_locations[document['name']] = (
+                        segments, array('q', (start for _, start, _ in spans)), array('q', (end for _, _, end in spans))
+                    )
+                else:
+                    chunks = self._chunk_document(document['content'])
+                    self.chunk_locations.pop(document['name'], None)
                 
                 # 파일명을 Azure Search 키 규칙에 맞게 변환
                 sanitized_name = self._sanitize_document_key(document['name'])
@@ -264,7 +279,76 @@ class SearchEngine:
         
         return chunks
     
-    def search(self, query: str, top_k: int = 5, include_vector: bool = False) -> List[Dict]:
+    def _chunk_segments(self, content: str, segments: SegmentTable, chunk_size: int = 1000,
+                        overlap: int = 200) -> List[Tuple[str, int, int]]:
+        """
+        연속된 세그먼트를 토큰 예산 안에서 묶어 청크 생성 (청크가 페이지/슬라이드/시트 중간에서 끊기지 않음)
+        
+        예산보다 큰 세그먼트만 _chunk_document로 토큰 단위 분할하며, 이때 청크 범위는 해당 세그먼트 전체로 기록.
+        표 행 묶음 중간에서 시작하는 청크에는 표 헤더를 앞에 붙임 (헤더는 청크 시작에만 반복)
+        
+        Args:
+            content: 문서 내용
+            segments: extract_content의 세그먼트 테이블
+            chunk_size: 청크 크기 (토큰 수)
+            overlap: 큰 세그먼트를 나눌 때 겹치는 부분 (토큰 수)
+            
+        Returns:
+            List[Tuple[str, int, int]]: (청크 텍스트, 시작 오프셋, 끝 오프셋) 리스트
+        """
+        token_counts = [len(self.encoding.encode(segments.text_of(content, index))) for index in range(len(segments))]
+        # 청크 앞에 붙는 표 헤더만큼 예산을 남겨 둠
+        header_tokens = 0
+        seen_headers = set()
+        for index, header_start in enumerate(segments.header_starts):
+            if header_start >= 0 and header_start not in seen_headers:
+                seen_headers.add(header_start)
+                header_tokens = max(header_tokens, len(self.encoding.encode(segments.header_text(content, index))))
+        budget = max(chunk_size - header_tokens, chunk_size // 2)
+        chunks = []
+        for start, end, oversized in segment_chunk_spans(segments, token_counts.__getitem__, budget):
+            if oversized:
+                index = segments.locate(start)
+                header = segments.header_text(content, index)
+                header_inside = header and segments.header_ends[index] > start
+                for part_idx, chunk in enumerate(self._chunk_document(content[start:end], chunk_size, overlap)):
+                    if header and (part_idx > 0 or not header_inside):
+                        chunk = header + chunk
+                    chunks.append((chunk, start, end))
+            else:
+                chunk = content[start:end].strip()
+                if chunk:
+                    chunks.append((segments.header_for(content, start) + chunk, start, end))
+        return chunks
+    
+    def _chunk_location(self, source: str, chunk_index: int) -> str:
+        """청크의 출처 위치 표시 (예: '3페이지'), 위치 정보가 없으면 빈 문자열"""
+        location = self.chunk_locations.get(source)
+        if not location:
+            return ""
+        segments, starts, ends = location
+        if chunk_index >= len(starts):
+            return ""
+        return segments.label_range(starts[chunk_index], ends[chunk_index])
+    
+    @staticmethod
+    def _source_filter(sources: Optional[List[str]]) -> Optional[str]:
+        """
+        문서 이름 목록으로 source 필터 식 생성
+        
+        Args:
+            sources: 검색 대상 문서 이름 리스트 (None이면 전체)
+            
+        Returns:
+            Optional[str]: OData 필터 식
+        """
+        if not sources:
+            return None
+        # OData 문자열 리터럴에서는 작은따옴표를 두 번 써서 이스케이프
+        return ' or '.join("source eq '{}'".format(source.replace("'", "''")) for source in sources)
+    
+    def search(self, query: str, top_k: int = 5, include_vector: bool = False,
+               sources: Optional[List[str]] = None) -> List[Dict]:
         """
         검색 수행
         
@@ -272,6 +356,7 @@ class SearchEngine:
             query: 검색 쿼리
             top_k: 반환할 결과 수
             include_vector: 벡터 검색 포함 여부
+            sources: 검색 대상 문서 이름 리스트 (None이면 전체)
             
         Returns:
             List[Dict]: 검색 결과 리스트
@@ -287,6 +372,8 @@ class SearchEngine:
                 "query_type": "semantic",
                 "semantic_configuration_name": "my-semantic-config"
             }
+            if sources:
+                search_options["filter"] = self._source_filter(sources)
             
             # 벡터 검색 포함 (실제로는 embedding 생성 필요)
             if include_vector:
@@ -300,6 +387,8 @@ class SearchEngine:
                     'title': result.get('title', ''),
                     'content': result.get('content', ''),
                     'source': result.get('source', ''),
+                    'chunk_index': result.get('chunk_index', 0),
+                    'location': self._chunk_location(result.get('source', ''), result.get('chunk_index', 0)),
                     'score': result.get('@search.score', 0),
                     'reranker_score': result.get('@search.reranker_score', 0)
                 })
@@ -310,17 +399,38 @@ class SearchEngine:
             print(f"검색 실패: {str(e)}")
             return []
     
-    def semantic_search(self, query: str, top_k: int = 5) -> List[Dict]:
+    def semantic_search(self, query: str, top_k: int = 5, extractive: bool = False,
+                        sources: Optional[List[str]] = None) -> List[Dict]:
         """
         시맨틱 검색 수행
         
         Args:
             query: 검색 쿼리
             top_k: 반환할 결과 수
+            extractive: 서비스 측 추출형 캡션 요청 여부
+            sources: 검색 대상 문서 이름 리스트 (None이면 전체)
             
         Returns:
             List[Dict]: 검색 결과 리스트
         """
+        return self._semantic_query(query, top_k, extractive, sources)['results']
+    
+    def semantic_answers(self, query: str, top_k: int = 3) -> Dict:
+        """
+        시맨틱 검색과 함께 서비스 측 추출형 답변/캡션 요청
+        
+        Args:
+            query: 검색 쿼리
+            top_k: 반환할 결과 수
+            
+        Returns:
+            Dict: {'answers': [{'text', 'score', 'source'}], 'results': 검색 결과 리스트}
+        """
+        return self._semantic_query(query, top_k, extractive=True)
+    
+    def _semantic_query(self, query: str, top_k: int, extractive: bool,
+                        sources: Optional[List[str]] = None) -> Dict:
+        """시맨틱 검색 실행 (extractive이면 답변/캡션 포함)"""
         try:
             search_options = {
                 "search_text": query,
@@ -330,43 +440,67 @@ class SearchEngine:
                 "query_language": "ko-KR",
                 "speller": "lexicon"
             }
+            if sources:
+                search_options["filter"] = self._source_filter(sources)
+            
+            if extractive:
+                search_options.update({
+                    "query_answer": "extractive",
+                    "query_answer_count": 3,
+                    "query_caption": "extractive"
+                })
             
             results = self.search_client.search(**search_options)
             search_results = []
+            sources_by_id = {}
             
             for result in results:
+                sources_by_id[result.get('id', '')] = result.get('source', '')
+                captions = result.get('@search.captions') or []
                 search_results.append({
                     'title': result.get('title', ''),
                     'content': result.get('content', ''),
                     'source': result.get('source', ''),
+                    'chunk_index': result.get('chunk_index', 0),
+                    'location': self._chunk_location(result.get('source', ''), result.get('chunk_index', 0)),
                     'score': result.get('@search.score', 0),
                     'reranker_score': result.get('@search.reranker_score', 0),
-                    'captions': result.get('@search.captions', [])
+                    'captions': [caption.text for caption in captions if getattr(caption, 'text', None)]
                 })
             
-            return search_results
+            answers = []
+            if extractive:
+                for answer in results.get_answers() or []:
+                    answers.append({
+                        'text': answer.text,
+                        'score': answer.score or 0,
+                        'source': sources_by_id.get(answer.key, '')
+                    })
+            
+            return {'answers': answers, 'results': search_results}
             
         except Exception as e:
             print(f"시맨틱 검색 실패: {str(e)}")
-            return []
+            return {'answers': [], 'results': []}
     
-    def hybrid_search(self, query: str, top_k: int = 5) -> List[Dict]:
+    def hybrid_search(self, query: str, top_k: int = 5, sources: Optional[List[str]] = None) -> List[Dict]:
         """
         하이브리드 검색 (텍스트 + 벡터 + 시맨틱)
         
         Args:
             query: 검색 쿼리
             top_k: 반환할 결과 수
+            sources: 검색 대상 문서 이름 리스트 (None이면 전체)
             
         Returns:
             List[Dict]: 검색 결과 리스트
         """
         try:
             # 텍스트 검색 결과
-            text_results = self.search(query, top_k)
+            text_results = self.search(query, top_k, sources=sources)
             
             # 시맨틱 검색 결과
-            semantic_results = self.semantic_search(query, top_k)
+            semantic_results = self.semantic_search(query, top_k, sources=sources)
             
             # 결과 통합 및 중복 제거
             all_results = {}
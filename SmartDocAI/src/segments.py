@@ -0,0 +1,298 @@
+"""
+세그먼트 테이블 모듈
+추출된 문서 텍스트의 페이지/슬라이드/시트/문단 경계를 (시작, 끝, 종류, 번호) 배열로 보관하여
+경계에 맞춘 청크 분할과 출처 위치 표시를 텍스트 재파싱 없이 제공
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Optional, Tuple
+
+# 세그먼트 종류 코드
+KIND_PAGE = 0
+KIND_SLIDE = 1
+KIND_SHEET = 2
+KIND_SECTION = 3
+KIND_PARAGRAPH = 4
+KIND_TABLE = 5
+KIND_CELL = 6
+KIND_TEXT = 7
+
+KIND_NAMES = ('page', 'slide', 'sheet', 'section', 'paragraph', 'table', 'cell', 'text')
+
+# 위치 표시 형식 (번호 하나 / 번호 범위)
+_LABELS = {
+    KIND_PAGE: ("{}페이지", "{}~{}페이지"),
+    KIND_SLIDE: ("슬라이드 {}", "슬라이드 {}~{}"),
+    KIND_SHEET: ("시트 {}", "시트 {}~{}"),
+    KIND_SECTION: ("구역 {}", "구역 {}~{}"),
+    KIND_PARAGRAPH: ("문단 {}", "문단 {}~{}"),
+    KIND_TABLE: ("표 {}", "표 {}~{}"),
+    KIND_CELL: ("셀 {}", "셀 {}~{}"),
+}
+
+
+class SegmentTable:
+    """
+    문서 텍스트의 세그먼트 테이블
+
+    세그먼트는 시작 오프셋 순으로 겹치지 않게 저장되며, 텍스트 조각을 따로 보관하지 않고
+    하나의 문서 문자열에 대한 (시작, 끝) 범위로만 표현됨.
+    표 행 묶음 세그먼트는 앞쪽에 한 번만 쓰인 표 헤더의 범위를 함께 가리킬 수 있음
+    """
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.kinds = array('B')
+        self.numbers = array('l')
+        self.header_starts = array('q')
+        self.header_ends = array('q')
+
+    def __setstate__(self, state):
+        # 헤더 범위가 없던 버전에서 저장된 테이블 호환
+        self.__dict__.update(state)
+        if 'header_starts' not in state:
+            self.header_starts = array('q', [-1] * len(self.starts))
+            self.header_ends = array('q', [-1] * len(self.starts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int]]:
+        return zip(self.starts, self.ends, self.kinds, self.numbers)
+
+    def append(self, start: int, end: int, kind: int, number: int,
+               header: Optional[Tuple[int, int]] = None):
+        """
+        세그먼트 추가 (이전 세그먼트 뒤에 와야 함)
+
+        Args:
+            start: 시작 오프셋
+            end: 끝 오프셋 (포함하지 않음)
+            kind: 세그먼트 종류 코드 (KIND_*)
+            number: 페이지/슬라이드/시트/문단 번호 (1부터)
+            header: 이 세그먼트에 적용되는 표 헤더의 (시작, 끝) 오프셋
+        """
+        if end <= start:
+            return
+        if self.ends and start < self.ends[-1]:
+            raise ValueError("세그먼트는 시작 오프셋 순으로 겹치지 않게 추가해야 합니다.")
+        self.starts.append(start)
+        self.ends.append(end)
+        self.kinds.append(kind)
+        self.numbers.append(number)
+        self.header_starts.append(header[0] if header else -1)
+        self.header_ends.append(header[1] if header else -1)
+
+    def span(self, index: int) -> Tuple[int, int]:
+        """세그먼트의 (시작, 끝) 오프셋"""
+        return self.starts[index], self.ends[index]
+
+    def text_of(self, text: str, index: int) -> str:
+        """세그먼트 텍스트 (필요할 때만 문서 문자열에서 잘라냄)"""
+        return text[self.starts[index]:self.ends[index]]
+
+    def header_for(self, text: str, offset: int) -> str:
+        """
+        offset에서 시작하는 청크 앞에 붙일 표 헤더 (헤더가 청크 앞쪽에 있을 때만, 없으면 빈 문자열)
+
+        Args:
+            text: 문서 텍스트
+            offset: 청크 시작 오프셋
+
+        Returns:
+            str: 표 헤더 텍스트
+        """
+        index = self.locate(offset)
+        if index < 0 or self.header_ends[index] > offset:
+            return ""
+        return self.header_text(text, index)
+
+    def header_text(self, text: str, index: int) -> str:
+        """세그먼트에 적용되는 표 헤더 텍스트 (없으면 빈 문자열)"""
+        header_start = self.header_starts[index]
+        return text[header_start:self.header_ends[index]] if header_start >= 0 else ""
+
+    def locate(self, offset: int) -> int:
+        """
+        오프셋이 속한 세그먼트 번호 (세그먼트 사이 구분자라면 바로 앞 세그먼트)
+
+        Args:
+            offset: 문서 내 문자 오프셋
+
+        Returns:
+            int: 세그먼트 인덱스 (없으면 -1)
+        """
+        index = bisect_right(self.starts, offset) - 1
+        if index < 0:
+            return 0 if self.starts else -1
+        return index
+
+    def overlapping(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        [start, end) 범위와 겹치는 세그먼트 인덱스 범위
+
+        Returns:
+            Tuple[int, int]: (첫 인덱스, 마지막 인덱스 + 1)
+        """
+        return bisect_right(self.ends, start), bisect_left(self.starts, end)
+
+    def last_boundary(self, start: int, end: int) -> int:
+        """
+        (start, end] 안에서 가장 뒤에 있는 세그먼트 끝 오프셋
+
+        Returns:
+            int: 경계 오프셋 (없으면 -1)
+        """
+        index = bisect_right(self.ends, end) - 1
+        if index >= 0 and self.ends[index] > start:
+            return self.ends[index]
+        return -1
+
+    def label(self, index: int) -> str:
+        """세그먼트 위치 표시 (예: '3페이지', '슬라이드 2')"""
+        formats = _LABELS.get(self.kinds[index])
+        return formats[0].format(self.numbers[index]) if formats else ""
+
+    def label_range(self, start: int, end: int) -> str:
+        """
+        [start, end) 범위의 위치 표시 (예: '3~4페이지')
+
+        Args:
+            start: 시작 오프셋
+            end: 끝 오프셋
+
+        Returns:
+            str: 위치 표시 (세그먼트가 없으면 빈 문자열)
+        """
+        first, last = self.overlapping(start, end)
+        if first >= last:
+            index = self.locate(start)
+            return self.label(index) if index >= 0 else ""
+        formats = _LABELS.get(self.kinds[first])
+        if not formats:
+            return ""
+        low = self.numbers[first]
+        # 같은 종류의 세그먼트만 범위로 표시
+        high = low
+        for index in range(first, last):
+            if self.kinds[index] == self.kinds[first]:
+                high = max(high, self.numbers[index])
+        return formats[0].format(low) if high == low else formats[1].format(low, high)
+
+    def shifted(self, delta: int, length: int) -> 'SegmentTable':
+        """
+        오프셋을 delta만큼 옮기고 [0, length) 밖은 잘라낸 새 테이블 (앞뒤 공백 제거 반영용)
+        """
+        table = SegmentTable()
+        for index, (start, end, kind, number) in enumerate(self):
+            header = None
+            if self.header_starts[index] >= 0:
+                header = (max(self.header_starts[index] + delta, 0), min(self.header_ends[index] + delta, length))
+            table.append(max(start + delta, 0), min(end + delta, length), kind, number, header)
+        return table
+
+
+class SegmentBuilder:
+    """텍스트를 이어 붙이면서 세그먼트 테이블을 함께 만드는 도구"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._open: Optional[Tuple[int, int, int, Optional[Tuple[int, int]]]] = None
+        self.table = SegmentTable()
+
+    @property
+    def length(self) -> int:
+        """지금까지 쓴 텍스트 길이 (다음 write의 시작 오프셋)"""
+        return self._length
+
+    def write(self, text: str):
+        """세그먼트에 속하지 않는 텍스트(구분자 등) 또는 열린 세그먼트 본문 추가"""
+        if text:
+            self._parts.append(text)
+            self._length += len(text)
+
+    def begin(self, kind: int, number: int, header: Optional[Tuple[int, int]] = None):
+        """세그먼트 시작 (end() 전까지 write한 텍스트가 세그먼트가 됨)"""
+        self.end()
+        self._open = (self._length, kind, number, header)
+
+    def end(self):
+        """열린 세그먼트 종료"""
+        if self._open is not None:
+            start, kind, number, header = self._open
+            self.table.append(start, self._length, kind, number, header)
+            self._open = None
+
+    def add(self, text: str, kind: int, number: int, header: Optional[Tuple[int, int]] = None):
+        """텍스트 하나를 세그먼트로 추가"""
+        self.begin(kind, number, header)
+        self.write(text)
+        self.end()
+
+    def build(self, strip: bool = True) -> Tuple[str, SegmentTable]:
+        """
+        최종 텍스트와 세그먼트 테이블 반환
+
+        Args:
+            strip: 앞뒤 공백 제거 여부 (세그먼트 오프셋도 함께 조정)
+
+        Returns:
+            Tuple[str, SegmentTable]: (텍스트, 세그먼트 테이블)
+        """
+        self.end()
+        text = ''.join(self._parts)
+        if not strip:
+            return text, self.table
+        stripped = text.strip()
+        if len(stripped) == len(text):
+            return text, self.table
+        lead = len(text) - len(text.lstrip())
+        return stripped, self.table.shifted(-lead, len(stripped))
+
+
+def single_segment(text: str, kind: int = KIND_TEXT) -> Tuple[str, SegmentTable]:
+    """텍스트 전체를 세그먼트 하나로 표현 (구조 정보가 없는 형식용)"""
+    table = SegmentTable()
+    table.append(0, len(text), kind, 1)
+    return text, table
+
+
+def segment_chunk_spans(segments: SegmentTable, count_tokens, max_tokens: int) -> List[Tuple[int, int, bool]]:
+    """
+    연속된 세그먼트를 토큰 예산 안에서 묶어 청크 범위 생성
+
+    Args:
+        segments: 세그먼트 테이블
+        count_tokens: 세그먼트 인덱스를 받아 토큰 수를 반환하는 함수
+        max_tokens: 청크 최대 토큰 수
+
+    Returns:
+        List[Tuple[int, int, bool]]: (시작 오프셋, 끝 오프셋, 예산 초과 단일 세그먼트 여부) 리스트
+    """
+    spans = []
+    group_start = None
+    group_end = 0
+    group_tokens = 0
+    for index in range(len(segments)):
+        start, end = segments.span(index)
+        tokens = count_tokens(index)
+        if tokens > max_tokens:
+            # 한 세그먼트가 예산보다 크면 따로 분할하도록 표시
+            if group_start is not None:
+                spans.append((group_start, group_end, False))
+                group_start = None
+            spans.append((start, end, True))
+            continue
+        if group_start is not None and group_tokens + tokens > max_tokens:
+            spans.append((group_start, group_end, False))
+            group_start = None
+        if group_start is None:
+            group_start, group_tokens = start, 0
+        group_end = end
+        group_tokens += tokens
+    if group_start is not None:
+        spans.append((group_start, group_end, False))
+    return spans
@@ -0,0 +1,122 @@
+"""
+표 직렬화 모듈
+스프레드시트/슬라이드/문서 표를 텍스트로 바꾸는 형식 제공
+(legacy: 행마다 'col: value | ...', markdown: 헤더를 한 번만 쓰는 마크다운 표)
+"""
+
+from typing import List, Sequence
+import pandas as pd
+from config import env_str
+
+TABLE_FORMATS = ('markdown', 'legacy')
+
+
+def get_table_format() -> str:
+    """
+    설정된 표 직렬화 형식 (SMARTDOC_TABLE_FORMAT, 기본값 markdown)
+
+    Returns:
+        str: 'markdown' 또는 'legacy'
+    """
+    table_format = (env_str("SMARTDOC_TABLE_FORMAT", "markdown") or "markdown").lower()
+    if table_format not in TABLE_FORMATS:
+        print(f"알 수 없는 표 형식 '{table_format}', markdown 사용")
+        return 'markdown'
+    return table_format
+
+
+def escape_cell(value: str) -> str:
+    """마크다운 표 셀 이스케이프 (구분자와 줄바꿈 제거)"""
+    return value.replace('|', '\\|').replace('\r', ' ').replace('\n', ' ').strip()
+
+
+def markdown_header(columns: Sequence[str]) -> str:
+    """
+    마크다운 표 헤더 (컬럼 행 + 구분 행)
+
+    Args:
+        columns: 컬럼 이름 리스트
+
+    Returns:
+        str: 줄바꿈으로 끝나는 헤더 텍스트
+    """
+    names = [escape_cell(str(column)) for column in columns]
+    return "| " + " | ".join(names) + " |\n|" + "---|" * len(names) + "\n"
+
+
+def markdown_rows(frame: pd.DataFrame, max_cell_chars: int = 0) -> List[str]:
+    """
+    행 묶음을 마크다운 표 행으로 변환 (열 단위 벡터 연산, 빈 값은 빈 칸)
+
+    Args:
+        frame: 행 묶음
+        max_cell_chars: 셀 값 최대 문자 수 (0이면 제한 없음)
+
+    Returns:
+        List[str]: 행 텍스트 리스트
+    """
+    columns = []
+    for column in frame.columns:
+        values = frame[column]
+        text = values.astype(str)
+        if max_cell_chars:
+            text = text.str.slice(0, max_cell_chars)
+        text = (text.str.replace('|', '\\|', regex=False)
+                .str.replace('\r', ' ', regex=False)
+                .str.replace('\n', ' ', regex=False)
+                .str.strip())
+        text[values.isna()] = ""
+        columns.append(text.to_numpy(dtype=object))
+    return ["| " + " | ".join(cells) + " |" for cells in zip(*columns)]
+
+
+def format_rows(frame: pd.DataFrame, max_cell_chars: int = 0) -> List[str]:
+    """
+    행 묶음을 'col: value | col: value' 텍스트로 변환 (legacy 형식, 열 단위 벡터 연산, 빈 값 제외)
+
+    Args:
+        frame: 행 묶음
+        max_cell_chars: 셀 값 최대 문자 수 (0이면 제한 없음)
+
+    Returns:
+        List[str]: 빈 행을 제외한 행 텍스트 리스트
+    """
+    pieces = []
+    for column in frame.columns:
+        values = frame[column]
+        mask = values.notna().to_numpy()
+        if not mask.any():
+            continue
+        text = values.astype(str)
+        if max_cell_chars:
+            text = text.str.slice(0, max_cell_chars)
+        mask = mask & (text.str.len() > 0).to_numpy()
+        formatted = (f"{column}: " + text).to_numpy(dtype=object)
+        formatted[~mask] = None
+        pieces.append(formatted)
+
+    if not pieces:
+        return []
+    rows = (" | ".join(filter(None, cells)) for cells in zip(*pieces))
+    return [row for row in rows if row]
+
+
+def markdown_table(rows: List[List[str]]) -> List[str]:
+    """
+    셀 텍스트 행 리스트를 첫 행을 헤더로 하는 마크다운 표 줄로 변환 (Word/PowerPoint 표용)
+
+    Args:
+        rows: 행별 셀 텍스트 리스트
+
+    Returns:
+        List[str]: [헤더 텍스트, 행 텍스트...] (헤더 텍스트는 구분 행 포함)
+    """
+    rows = [row for row in rows if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    width = max(len(row) for row in rows)
+    lines = [markdown_header(list(rows[0]) + [""] * (width - len(rows[0])))]
+    for row in rows[1:]:
+        cells = [escape_cell(cell) for cell in row] + [""] * (width - len(row))
+        lines.append("| " + " | ".join(cells) + " |")
+    return lines
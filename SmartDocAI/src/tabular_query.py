@@ -0,0 +1,799 @@
+"""
+표 질의 모듈
+업로드된 스프레드시트를 시트별 컬럼형 파일(Parquet, pyarrow가 없으면 pickle)과 스키마 카탈로그로 저장하고,
+집계형 질문을 제한된 질의 계획(필터/그룹/집계/정렬)으로 바꿔 LLM 없이 로컬에서 정확하게 계산하는 기능 제공
+(LLM은 규칙으로 계획을 만들 수 없을 때 계획 생성에만 사용)
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from table_format import markdown_header, markdown_rows
+from text_analysis import tokenize
+from text_normalizer import compact_text
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 질의 계획에서 허용하는 필터 연산자와 집계 함수
+FILTER_OPS = ('==', '!=', '>', '>=', '<', '<=', 'contains', 'in')
+AGGREGATIONS = ('count', 'sum', 'mean', 'min', 'max', 'nunique')
+
+_AGGREGATION_LABELS = {
+    'count': '개수',
+    'sum': '합계',
+    'mean': '평균',
+    'min': '최소',
+    'max': '최대',
+    'nunique': '고유 개수',
+}
+
+# 집계형 질문 표현
+_TABLE_QUESTION_PATTERN = re.compile(
+    r'별\s|별$|몇\s*(개|건|명|곳|가지)|개수|건수|갯수|\S수는|\S수를|\s수는|합계|총합|총액|평균|최댓값|최솟값|'
+    r'가장\s*(많|적|큰|작|높|낮)|\b(count|sum|average|mean|max|min|how many)\b',
+    re.IGNORECASE
+)
+
+# 규칙 기반 집계 함수 판별 (앞쪽 항목이 우선)
+_OPERATION_PATTERNS = (
+    ('mean', re.compile(r'평균|average|mean', re.IGNORECASE)),
+    ('sum', re.compile(r'합계|총합|총액|합산|\bsum\b|\btotal\b', re.IGNORECASE)),
+    ('max', re.compile(r'최대|최댓값|최고|가장\s*(큰|높)|\bmax', re.IGNORECASE)),
+    ('min', re.compile(r'최소|최솟값|최저|가장\s*(작|낮)|\bmin', re.IGNORECASE)),
+    ('nunique', re.compile(r'종류|고유|몇\s*가지', re.IGNORECASE)),
+    ('count', re.compile(r'몇|개수|건수|갯수|수는|수를|수$|수\s|count|how many', re.IGNORECASE)),
+)
+
+# 규칙 기반 계획에서 의미가 없는 것으로 보는 단어 (남은 단어가 있으면 필터가 필요한 질문으로 판단)
+_FILLER_WORDS = (
+    "별 별로 마다 기준 각 각각 모든 전체 총 수 개수 건수 갯수 몇 개 건 명 곳 가지 종류 고유 "
+    "합계 총합 총액 합산 평균 최대 최고 최소 최저 가장 많은 적은 큰 작은 높은 낮은 "
+    "합계값 평균값 최대값 최댓값 최소값 최솟값 개인가요 개입니까 건인가요 명인가요 "
+    "알려줘 알려주세요 보여줘 보여주세요 정리 정리해줘 얼마 얼마나 인가요 입니까 인지 되나요 됩니까 있나요 "
+    "어떻게 무엇 뭐 표 시트 데이터 항목 행 목록 파일 문서 엑셀 값 "
+    "count sum total average mean max min how many by per of the in"
+)
+_FILLER_TOKENS = frozenset(tokenize(_FILLER_WORDS, remove_stopwords=False))
+
+
+def is_table_question(question: str) -> bool:
+    """
+    표 집계로 답할 수 있는 형태의 질문인지 판단 (개수/합계/평균/그룹별 등)
+
+    Args:
+        question: 사용자 질문
+
+    Returns:
+        bool: 집계형 질문 여부
+    """
+    return bool(_TABLE_QUESTION_PATTERN.search(question.strip()))
+
+
+def _compact(text) -> str:
+    """공백을 제거하고 소문자로 바꾼 비교용 문자열 (컬럼 이름이 숫자여도 사용 가능)"""
+    return compact_text(str(text))
+
+
+def _typed_column(values: pd.Series) -> Tuple[pd.Series, str]:
+    """
+    object 자료형 컬럼의 자료형 추론 (모든 값이 변환될 때만 숫자/날짜/불리언으로 변환)
+
+    Args:
+        values: 시트 컬럼 값
+
+    Returns:
+        Tuple[pd.Series, str]: (변환된 컬럼, 'int' | 'float' | 'datetime' | 'bool' | 'text')
+    """
+    present = values.dropna()
+    if present.empty:
+        return values.astype(object), 'text'
+
+    if present.map(lambda value: isinstance(value, bool)).all():
+        return values.astype('boolean'), 'bool'
+
+    if present.map(lambda value: isinstance(value, (int, float))).all():
+        numeric = pd.to_numeric(values, errors='coerce')
+        if (numeric.dropna() % 1 == 0).all():
+            return numeric.astype('Int64'), 'int'
+        return numeric.astype(float), 'float'
+
+    if present.map(lambda value: isinstance(value, (datetime.date, datetime.datetime))).all():
+        return pd.to_datetime(values, errors='coerce'), 'datetime'
+
+    # 숫자와 문자가 섞인 컬럼은 문자열로 통일 (빈 값 유지)
+    return values.where(values.isna(), values.astype(str)), 'text'
+
+
+class WorkbookTableWriter:
+    """통합 문서 추출 중 시트별 행 묶음을 받아 시트가 끝날 때마다 표 저장소에 기록하는 도구"""
+
+    def __init__(self, store: 'TableStore', document: str, digest: str):
+        """
+        Args:
+            store: 표 저장소
+            document: 문서 이름 (업로드 파일명)
+            digest: 문서 이름 + 파일 내용 해시
+        """
+        self.store = store
+        self.document = document
+        self.digest = digest
+        self._sheet = None
+        self._batches: List[pd.DataFrame] = []
+        self._entries: Dict[str, Dict] = {}
+        self._failed = False
+
+    def add(self, sheet, batch: pd.DataFrame):
+        """
+        행 묶음 추가 (excel_extraction.write_workbook의 on_batch 콜백)
+
+        시트는 순서대로 스트리밍되므로 다음 시트의 첫 묶음이 오면 이전 시트를 저장하고 묶음을 해제함
+        (메모리에는 현재 시트 하나만 유지)
+
+        Args:
+            sheet: SheetStream
+            batch: 행 묶음
+        """
+        if self._failed:
+            return
+        if self._sheet is not None and self._sheet.number != sheet.number:
+            self._flush()
+        self._sheet = sheet
+        self._batches.append(batch)
+
+    def _flush(self):
+        """현재 시트를 컬럼형 파일로 저장 (실패하면 이 문서의 표 저장을 중단)"""
+        sheet, batches = self._sheet, self._batches
+        self._sheet, self._batches = None, []
+        if sheet is None or not batches:
+            return
+        try:
+            table_id, entry = self.store.write_table(self.document, self.digest, sheet,
+                                                     pd.concat(batches, ignore_index=True))
+            self._entries[table_id] = entry
+        except Exception as e:
+            print(f"표 저장 실패 ({self.document}, {sheet.name}): {str(e)}")
+            self._failed = True
+
+    def close(self) -> int:
+        """
+        마지막 시트를 저장하고 카탈로그 갱신 (실패해도 문서 추출은 계속되도록 예외를 삼킴)
+
+        Returns:
+            int: 저장된 표 수
+        """
+        try:
+            self._flush()
+            if self._failed:
+                self.store.discard_tables(self._entries)
+                return 0
+            return self.store.commit_tables(self.document, self._entries)
+        except Exception as e:
+            print(f"표 저장 실패 ({self.document}): {str(e)}")
+            return 0
+        finally:
+            self._entries = {}
+
+
+class TableStore:
+    """시트별 컬럼형 파일과 스키마 카탈로그(catalog.json) 저장소"""
+
+    def __init__(self, directory: str, sample_values: int = 5, cache_tables: int = 8):
+        """
+        저장소 초기화
+
+        Args:
+            directory: 저장 디렉토리
+            sample_values: 카탈로그에 기록할 컬럼별 예시 값 수 (LLM 계획 프롬프트용)
+            cache_tables: 메모리에 유지할 표 수
+        """
+        self.directory = directory
+        self.catalog_path = os.path.join(directory, "catalog.json")
+        self.sample_values = sample_values
+        self.cache_tables = cache_tables
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[str, pd.DataFrame]' = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._catalog = self._load_catalog()
+
+    def _load_catalog(self) -> Dict:
+        """카탈로그 파일 로드"""
+        try:
+            if os.path.exists(self.catalog_path):
+                with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"표 카탈로그 로드 실패: {str(e)}")
+        return {}
+
+    def _save_catalog(self):
+        """카탈로그 파일 기록 (임시 파일 교체 방식, 잠금 상태에서 호출)"""
+        try:
+            temp_path = f"{self.catalog_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._catalog, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.catalog_path)
+        except Exception as e:
+            print(f"표 카탈로그 저장 실패: {str(e)}")
+
+    def writer(self, document: str, file_bytes: bytes) -> WorkbookTableWriter:
+        """
+        통합 문서 하나의 표 기록 도구 생성
+
+        Args:
+            document: 문서 이름 (업로드 파일명)
+            file_bytes: xlsx 파일 바이트 (문서 이름과 함께 표 ID 해시 계산)
+
+        Returns:
+            WorkbookTableWriter: 기록 도구
+        """
+        digest = hashlib.sha256(document.encode('utf-8') + b'\0' + file_bytes).hexdigest()[:16]
+        return WorkbookTableWriter(self, document, digest)
+
+    def write_table(self, document: str, digest: str, sheet, frame: pd.DataFrame) -> Tuple[str, Dict]:
+        """
+        시트 하나를 컬럼형 파일로 저장 (카탈로그는 commit_tables에서 갱신)
+
+        Args:
+            document: 문서 이름
+            digest: 문서 이름 + 파일 내용 해시
+            sheet: SheetStream
+            frame: 시트 행 DataFrame
+
+        Returns:
+            Tuple[str, Dict]: (표 ID, 카탈로그 항목)
+        """
+        frame, dtypes = self._typed_frame(frame)
+        table_id = f"{digest}_{sheet.number}"
+        extension = 'parquet' if PARQUET_AVAILABLE else 'pkl'
+        filename = f"{table_id}.{extension}"
+        path = os.path.join(self.directory, filename)
+        if PARQUET_AVAILABLE:
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_pickle(path)
+        return table_id, {
+            'document': document,
+            'sheet': sheet.name,
+            'sheet_number': sheet.number,
+            'file': filename,
+            'rows': len(frame),
+            'truncated': sheet.truncated,
+            'columns': [
+                {
+                    'name': column,
+                    'dtype': dtypes[column],
+                    'samples': [str(value) for value in frame[column].dropna().unique()[:self.sample_values]]
+                }
+                for column in frame.columns
+            ]
+        }
+
+    def commit_tables(self, document: str, entries: Dict[str, Dict]) -> int:
+        """
+        저장한 시트 표를 카탈로그에 등록하고 같은 문서의 이전 표를 교체
+
+        Args:
+            document: 문서 이름
+            entries: 표 ID별 카탈로그 항목 (write_table 결과)
+
+        Returns:
+            int: 등록된 표 수
+        """
+        with self._lock:
+            stale = [table_id for table_id, entry in self._catalog.items()
+                     if entry['document'] == document and table_id not in entries]
+            for table_id in stale:
+                entry = self._catalog.pop(table_id)
+                self._cache.pop(table_id, None)
+                try:
+                    os.remove(os.path.join(self.directory, entry['file']))
+                except OSError:
+                    pass
+            for table_id in entries:
+                self._cache.pop(table_id, None)
+            self._catalog.update(entries)
+            self._save_catalog()
+
+        print(f"표 {len(entries)}개 저장 완료 ({document})")
+        return len(entries)
+
+    def discard_tables(self, entries: Dict[str, Dict]):
+        """카탈로그에 등록하지 않은 표 파일 삭제 (저장 도중 실패한 문서 정리, 기존 등록 파일은 유지)"""
+        with self._lock:
+            registered = {entry['file'] for entry in self._catalog.values()}
+        for entry in entries.values():
+            if entry['file'] in registered:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except OSError:
+                pass
+
+    def _typed_frame(self, frame: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """행 묶음 DataFrame의 컬럼별 자료형 추론"""
+        typed = {}
+        dtypes = {}
+        for column in frame.columns:
+            typed[str(column)], dtypes[str(column)] = _typed_column(frame[column])
+        return pd.DataFrame(typed), dtypes
+
+    def tables_for(self, documents: List[str]) -> List[Tuple[str, Dict]]:
+        """
+        현재 문서 목록에 속한 표 카탈로그 항목
+
+        Args:
+            documents: 문서 이름 리스트
+
+        Returns:
+            List[Tuple[str, Dict]]: (표 ID, 카탈로그 항목) 리스트
+        """
+        names = set(documents)
+        with self._lock:
+            return [(table_id, entry) for table_id, entry in self._catalog.items() if entry['document'] in names]
+
+    def entry(self, table_id: str) -> Optional[Dict]:
+        """표 카탈로그 항목 (없으면 None)"""
+        with self._lock:
+            return self._catalog.get(table_id)
+
+    def load(self, table_id: str) -> pd.DataFrame:
+        """
+        표 로드 (최근 사용한 표는 메모리 캐시 사용)
+
+        Args:
+            table_id: 표 ID
+
+        Returns:
+            pd.DataFrame: 표 데이터
+        """
+        with self._lock:
+            if table_id in self._cache:
+                self._cache.move_to_end(table_id)
+                return self._cache[table_id]
+            entry = self._catalog.get(table_id)
+        if entry is None:
+            raise KeyError(f"표를 찾을 수 없습니다: {table_id}")
+
+        path = os.path.join(self.directory, entry['file'])
+        frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+        with self._lock:
+            self._cache[table_id] = frame
+            while len(self._cache) > self.cache_tables:
+                self._cache.popitem(last=False)
+        return frame
+
+
+def validate_plan(plan: Dict, entry: Dict, max_rows: int = 50) -> Dict:
+    """
+    질의 계획 검증 및 정규화 (허용된 연산과 존재하는 컬럼만 사용)
+
+    Args:
+        plan: 질의 계획 (filters, group_by, aggregations, sort, limit)
+        entry: 표 카탈로그 항목
+        max_rows: 결과 최대 행 수
+
+    Returns:
+        Dict: 정규화된 질의 계획
+
+    Raises:
+        ValueError: 허용되지 않는 연산이나 없는 컬럼을 사용한 경우
+    """
+    dtypes = {column['name']: column['dtype'] for column in entry['columns']}
+
+    def check_column(column):
+        if column not in dtypes:
+            raise ValueError(f"없는 컬럼: {column}")
+        return column
+
+    filters = []
+    for item in plan.get('filters') or []:
+        op = item.get('op')
+        if op not in FILTER_OPS:
+            raise ValueError(f"허용되지 않는 필터 연산: {op}")
+        value = item.get('value')
+        if op == 'in' and not isinstance(value, list):
+            value = [value]
+        filters.append({'column': check_column(item.get('column')), 'op': op, 'value': value})
+
+    group_by = plan.get('group_by') or []
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    group_by = [check_column(column) for column in group_by]
+
+    aggregations = []
+    for item in plan.get('aggregations') or [{'op': 'count'}]:
+        op = item.get('op')
+        if op not in AGGREGATIONS:
+            raise ValueError(f"허용되지 않는 집계 함수: {op}")
+        column = item.get('column')
+        if column is not None:
+            check_column(column)
+        elif op != 'count':
+            raise ValueError(f"{op} 집계에는 컬럼이 필요합니다.")
+        if op in ('sum', 'mean') and dtypes[column] not in ('int', 'float', 'bool'):
+            raise ValueError(f"숫자 컬럼이 아닙니다: {column}")
+        label = _AGGREGATION_LABELS[op] + (f"({column})" if column else "")
+        name = str(item.get('as') or label)
+        if name in group_by or any(existing['as'] == name for existing in aggregations):
+            raise ValueError(f"결과 컬럼 이름이 중복됩니다: {name}")
+        aggregations.append({'op': op, 'column': column, 'as': name})
+
+    names = group_by + [item['as'] for item in aggregations]
+    sort = plan.get('sort')
+    if sort:
+        if sort.get('by') not in names:
+            raise ValueError(f"정렬 기준이 결과 컬럼이 아닙니다: {sort.get('by')}")
+        sort = {'by': sort['by'], 'descending': bool(sort.get('descending', True))}
+    elif group_by:
+        # 그룹 집계는 기본으로 첫 집계 값이 큰 순서
+        sort = {'by': aggregations[0]['as'], 'descending': True}
+
+    limit = plan.get('limit') or max_rows
+    return {
+        'filters': filters,
+        'group_by': group_by,
+        'aggregations': aggregations,
+        'sort': sort,
+        'limit': max(1, min(int(limit), max_rows))
+    }
+
+
+def _filter_mask(values: pd.Series, dtype: str, op: str, value) -> pd.Series:
+    """필터 조건 하나의 행 마스크"""
+    if op == 'contains':
+        return values.astype(str).str.contains(str(value), case=False, regex=False) & values.notna()
+
+    if dtype in ('int', 'float'):
+        convert = lambda item: pd.to_numeric(item)
+    elif dtype == 'datetime':
+        convert = lambda item: pd.Timestamp(item)
+    else:
+        # 문자열 비교는 앞뒤 공백과 대소문자 무시
+        values = values.astype(str).str.strip().str.lower().where(values.notna())
+        convert = lambda item: str(item).strip().lower()
+
+    if op == 'in':
+        return values.isin([convert(item) for item in value])
+    target = convert(value)
+    if op == '==':
+        return values == target
+    if op == '!=':
+        return values != target
+    if op == '>':
+        return values > target
+    if op == '>=':
+        return values >= target
+    if op == '<':
+        return values < target
+    return values <= target
+
+
+def _aggregate(values, op: str):
+    """컬럼(또는 그룹별 컬럼) 집계 (값이 모두 비어 있으면 합계도 0이 아닌 빈 값)"""
+    if op == 'sum':
+        return values.sum(min_count=1)
+    return getattr(values, op)()
+
+
+def execute_plan(frame: pd.DataFrame, plan: Dict, entry: Dict) -> Tuple[pd.DataFrame, int]:
+    """
+    검증된 질의 계획을 pandas 연산으로 실행 (코드 실행 없이 허용된 연산만 사용)
+
+    Args:
+        frame: 표 데이터
+        plan: validate_plan 결과
+        entry: 표 카탈로그 항목
+
+    Returns:
+        Tuple[pd.DataFrame, int]: (결과 표, limit 적용 전 결과 행 수)
+    """
+    dtypes = {column['name']: column['dtype'] for column in entry['columns']}
+
+    for item in plan['filters']:
+        mask = _filter_mask(frame[item['column']], dtypes[item['column']], item['op'], item['value'])
+        frame = frame[mask.fillna(False).astype(bool)]
+
+    if plan['group_by']:
+        # 빈 값도 하나의 그룹으로 집계
+        keys = [frame[column].astype(object).where(frame[column].notna(), "(빈 값)") for column in plan['group_by']]
+        grouped = frame.groupby(keys, sort=False)
+        columns = {}
+        for item in plan['aggregations']:
+            if item['column'] is None:
+                columns[item['as']] = grouped.size()
+            else:
+                columns[item['as']] = _aggregate(grouped[item['column']], item['op'])
+        result = pd.DataFrame(columns).reset_index()
+        result.columns = plan['group_by'] + [item['as'] for item in plan['aggregations']]
+    else:
+        row = {}
+        for item in plan['aggregations']:
+            if item['column'] is None:
+                row[item['as']] = len(frame)
+            else:
+                row[item['as']] = _aggregate(frame[item['column']], item['op'])
+        result = pd.DataFrame([row])
+
+    if plan['sort']:
+        result = result.sort_values(plan['sort']['by'], ascending=not plan['sort']['descending'], kind='stable')
+    total = len(result)
+    return result.head(plan['limit']).reset_index(drop=True), total
+
+
+def describe_plan(plan: Dict) -> str:
+    """질의 계획의 조건 설명 (예: '조건: 연도 >= 2023')"""
+    if not plan['filters']:
+        return ""
+    conditions = []
+    for item in plan['filters']:
+        value = ", ".join(map(str, item['value'])) if item['op'] == 'in' else item['value']
+        conditions.append(f"{item['column']} {item['op']} {value}")
+    return "조건: " + ", ".join(conditions)
+
+
+def format_result(result: pd.DataFrame) -> str:
+    """결과 표를 마크다운 표로 변환 (실수는 소수점 둘째 자리까지)"""
+    display = result.copy()
+    for column in display.columns:
+        if pd.api.types.is_float_dtype(display[column]):
+            display[column] = display[column].round(2)
+    display = display.astype(object).where(display.notna(), None)
+    return markdown_header(list(display.columns)) + "\n".join(markdown_rows(display))
+
+
+class TableQueryEngine:
+    """저장된 표에 대한 집계형 질문 답변기 (규칙 기반 계획, 필요시 LLM 계획)"""
+
+    def __init__(self, store: TableStore, planner: Optional[Callable[[str, List[Tuple[str, Dict]]], Optional[Dict]]] = None,
+                 max_rows: int = 50, max_candidates: int = 3):
+        """
+        표 질의 엔진 초기화
+
+        Args:
+            store: 표 저장소
+            planner: 질문과 후보 표 목록을 받아 {'table': 표 ID, ...계획} 또는 None을 반환하는 함수 (LLM 계획용)
+            max_rows: 답변에 표시할 결과 최대 행 수
+            max_candidates: LLM 계획에 전달할 후보 표 수
+        """
+        self.store = store
+        self.planner = planner
+        self.max_rows = max_rows
+        self.max_candidates = max_candidates
+
+    def answer(self, question: str, documents: List[Dict]) -> Optional[Dict]:
+        """
+        표 집계로 질문에 답변
+
+        Args:
+            question: 사용자 질문
+            documents: 문서 리스트
+
+        Returns:
+            Optional[Dict]: answer, source, table, plan, rows (답할 수 없으면 None)
+        """
+        if not is_table_question(question):
+            return None
+        tables = self.store.tables_for([doc['name'] for doc in documents])
+        if not tables:
+            return None
+
+        candidates = self._rank_tables(question, tables)
+        # 질문에 컬럼/시트/문서 이름이 하나도 없으면 일반 질문으로 보고 규칙/LLM 계획 모두 만들지 않음
+        if not candidates or candidates[0][0] <= 0:
+            return None
+
+        # 규칙으로 계획을 만들 수 있으면 LLM 호출 없이 실행
+        _, table_id, entry = candidates[0]
+        plan = self._rule_plan(question, entry)
+
+        if plan is None and self.planner is not None:
+            shortlist = [(table_id, entry) for score, table_id, entry in candidates[:self.max_candidates] if score > 0]
+            try:
+                planned = self.planner(question, shortlist)
+            except Exception as e:
+                print(f"표 질의 계획 생성 실패: {str(e)}")
+                planned = None
+            if not planned or planned.get('table') not in dict(shortlist):
+                return None
+            table_id = planned['table']
+            entry = dict(shortlist)[table_id]
+            plan = planned
+
+        if plan is None:
+            return None
+
+        try:
+            plan = validate_plan(plan, entry, self.max_rows)
+            result, total = execute_plan(self.store.load(table_id), plan, entry)
+        except Exception as e:
+            print(f"표 질의 실행 실패: {str(e)}")
+            return None
+
+        return {
+            'answer': self._format_answer(result, total, plan, entry),
+            'source': f"{entry['document']} ({entry['sheet']})",
+            'table': table_id,
+            'plan': plan,
+            'rows': total
+        }
+
+    def _rank_tables(self, question: str, tables: List[Tuple[str, Dict]]) -> List[Tuple[int, str, Dict]]:
+        """
+        질문에 언급된 컬럼/시트/문서 이름 수로 후보 표 정렬
+
+        Returns:
+            List[Tuple[int, str, Dict]]: (점수, 표 ID, 카탈로그 항목) 리스트 (점수 높은 순)
+        """
+        compact = _compact(question)
+        question_tokens = set(tokenize(question))
+        ranked = []
+        for table_id, entry in tables:
+            score = 2 * sum(1 for column in entry['columns'] if self._mentions(compact, column['name']))
+            name_tokens = set(tokenize(f"{os.path.splitext(entry['document'])[0]} {entry['sheet']}".replace('_', ' ')))
+            score += len(question_tokens & name_tokens)
+            ranked.append((score, table_id, entry))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    @staticmethod
+    def _mentions(compact_question: str, column: str) -> bool:
+        """질문에 컬럼 이름이 언급되었는지 (자동 생성된 'Unnamed' 컬럼 제외)"""
+        name = _compact(column)
+        return len(name) >= 2 and not name.startswith('unnamed:') and name in compact_question
+
+    def _rule_plan(self, question: str, entry: Dict) -> Optional[Dict]:
+        """
+        'X별 개수/합계/평균' 형태의 질문을 계획으로 변환 (필터가 필요해 보이면 None)
+
+        Args:
+            question: 사용자 질문
+            entry: 표 카탈로그 항목
+
+        Returns:
+            Optional[Dict]: 질의 계획
+        """
+        compact = _compact(question)
+        dtypes = {column['name']: column['dtype'] for column in entry['columns']}
+        mentioned = sorted((name for name in dtypes if self._mentions(compact, name)), key=len, reverse=True)
+        # 긴 컬럼 이름이 짧은 이름을 포함하는 경우 긴 이름만 사용
+        mentioned = [name for name in mentioned
+                     if not any(other != name and _compact(name) in _compact(other) for other in mentioned)]
+
+        group_by = [name for name in mentioned
+                    if re.search(re.escape(_compact(name)) + r'(별|마다|기준)', compact)]
+        targets = [name for name in mentioned if name not in group_by]
+
+        op = next((name for name, pattern in _OPERATION_PATTERNS if pattern.search(question)), None)
+        if op is None:
+            return None
+        if op in ('sum', 'mean', 'min', 'max'):
+            numeric = [name for name in targets if dtypes[name] in ('int', 'float', 'datetime')]
+            if op in ('sum', 'mean'):
+                numeric = [name for name in numeric if dtypes[name] != 'datetime']
+            if len(numeric) != 1:
+                return None
+            aggregation = {'op': op, 'column': numeric[0]}
+            targets.remove(numeric[0])
+        elif op == 'nunique':
+            if len(targets) != 1:
+                return None
+            aggregation = {'op': op, 'column': targets[0]}
+            targets = []
+        else:
+            aggregation = {'op': 'count'}
+
+        # 컬럼/표 이름과 집계 표현 외의 단어가 남으면 조건이 있는 질문으로 보고 규칙 계획 포기
+        remainder = question
+        for name in sorted(dtypes, key=len, reverse=True):
+            if self._mentions(compact, name):
+                remainder = re.sub(re.escape(name), ' ', remainder, flags=re.IGNORECASE)
+        name_tokens = set(tokenize(f"{os.path.splitext(entry['document'])[0]} {entry['sheet']}".replace('_', ' '),
+                                   remove_stopwords=False))
+        leftover = [token for token in tokenize(remainder)
+                    if token not in _FILLER_TOKENS and token not in name_tokens and not token.isdigit()]
+        if leftover or targets:
+            return None
+
+        return {'group_by': group_by, 'aggregations': [aggregation]}
+
+    def _format_answer(self, result: pd.DataFrame, total: int, plan: Dict, entry: Dict) -> str:
+        """결과 표와 계산 근거를 답변 문자열로 변환"""
+        if not plan['group_by'] and len(result) == 1 and len(result.columns) == 1:
+            column = result.columns[0]
+            value = result.iloc[0, 0]
+            if pd.isna(value):
+                value = "(빈 값)"
+            elif isinstance(value, float):
+                value = round(value, 2)
+            lines = [f"**{column}**: {value}"]
+        else:
+            lines = [format_result(result)]
+            if total > len(result):
+                lines.append(f"\n(전체 {total}행 중 상위 {len(result)}행)")
+
+        condition = describe_plan(plan)
+        if condition:
+            lines.append(f"\n{condition}")
+        basis = f"\n'{entry['sheet']}' 시트 {entry['rows']}행을 직접 집계한 결과입니다."
+        if entry.get('truncated'):
+            basis += " (추출 행 제한으로 일부 행만 저장됨)"
+        lines.append(basis)
+        return "\n".join(lines)
+
+
+def plan_prompt(question: str, tables: List[Tuple[str, Dict]]) -> str:
+    """
+    LLM 질의 계획 생성 프롬프트 (표 스키마와 예시 값만 포함, 표 본문은 넣지 않음)
+
+    Args:
+        question: 사용자 질문
+        tables: (표 ID, 카탈로그 항목) 리스트
+
+    Returns:
+        str: 프롬프트
+    """
+    schemas = []
+    for table_id, entry in tables:
+        columns = "\n".join(
+            f"  - {column['name']} ({column['dtype']}): 예) {', '.join(column['samples'])}"
+            for column in entry['columns']
+        )
+        schemas.append(f"표 ID: {table_id}\n문서: {entry['document']} / 시트: {entry['sheet']} / {entry['rows']}행\n{columns}")
+
+    return f"""다음 표 중 하나로 질문에 답하기 위한 질의 계획을 JSON으로 작성하세요.
+
+{chr(10).join(schemas)}
+
+질문: {question}
+
+JSON 형식:
+{{"table": "표 ID", "filters": [{{"column": "컬럼", "op": "{'|'.join(FILTER_OPS)}", "value": 값}}],
+ "group_by": ["컬럼"], "aggregations": [{{"op": "{'|'.join(AGGREGATIONS)}", "column": "컬럼 또는 null(count)"}}],
+ "sort": {{"by": "결과 컬럼", "descending": true}}, "limit": 숫자}}
+
+규칙:
+1. 위 표의 컬럼 이름만 그대로 사용
+2. 행 수를 세는 경우 count의 column은 null
+3. 표로 답할 수 없는 질문이면 {{"table": null}}
+4. JSON만 출력"""
+
+
+def parse_plan(text: str) -> Optional[Dict]:
+    """LLM 응답에서 JSON 질의 계획 추출 (없거나 잘못된 형식이면 None)"""
+    match = re.search(r'\{.*\}', text or '', re.DOTALL)
+    if not match:
+        return None
+    try:
+        plan = json.loads(match.group(0))
+    except ValueError:
+        return None
+    return plan if isinstance(plan, dict) and plan.get('table') else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_table_store() -> TableStore:
+    """
+    공유 표 저장소 반환 (documents/tables)
+
+    Returns:
+        TableStore: 공유 저장소
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TableStore(os.path.join("documents", "tables"))
+    return _store
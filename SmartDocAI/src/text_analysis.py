@@ -0,0 +1,145 @@
+"""
+텍스트 분석 모듈
+한국어/영어 혼합 텍스트의 토큰화, 문장 분할, 토큰 수 계산 기능 제공
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Tuple
+from text_normalizer import compact_text
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+# 한글 단어, 영문 단어, 숫자를 토큰으로 인식
+_TOKEN_PATTERN = re.compile(r'[가-힣]+|[A-Za-z][A-Za-z0-9_\-]*|\d+(?:\.\d+)?')
+
+# 문장 경계: 마침표/물음표/느낌표 뒤 공백 또는 줄바꿈
+_SENTENCE_PATTERN = re.compile(r'[^.!?。\n]+(?:[.!?。]+|$)|[^\n]+', re.MULTILINE)
+
+# 한국어 조사 및 어미 (긴 것부터 제거)
+_KOREAN_SUFFIXES = frozenset([
+    '으로부터', '에서부터', '이라는', '이라고', '에게서', '한테서',
+    '으로써', '으로서', '에서는', '에서도', '에게는', '까지는', '부터는',
+    '입니다', '습니다', '합니다', '이에요', '이다',
+    '에서', '에게', '한테', '께서', '으로', '부터', '까지', '처럼', '보다',
+    '라는', '이나', '이며', '하고', '에는', '에도', '과의', '와의', '로서', '로써',
+    '은', '는', '이', '가', '을', '를', '의', '에', '와', '과', '로', '도', '만', '요',
+])
+_SUFFIX_LENGTHS = sorted({len(suffix) for suffix in _KOREAN_SUFFIXES}, reverse=True)
+
+# 검색 품질에 기여하지 않는 불용어
+STOPWORDS = frozenset([
+    '무엇', '무엇인가', '뭐', '어떤', '어떻게', '어디', '언제', '누구', '얼마', '몇',
+    '그리고', '그러나', '하지만', '그럼', '그래서', '또한', '및', '등', '것', '수',
+    '있다', '있는', '없는', '하는', '되는', '대한', '대해', '관련', '알려', '알려줘',
+    '주세요', '해줘', '해주세요', '인가요', '있나요', '뭔가요',
+    'the', 'a', 'an', 'of', 'to', 'in', 'and', 'or', 'is', 'are', 'what', 'how', 'for', 'on',
+])
+
+
+@lru_cache(maxsize=65536)
+def strip_korean_suffix(word: str) -> str:
+    """
+    한글 단어 끝의 조사/어미 제거
+
+    Args:
+        word: 한글 단어
+
+    Returns:
+        str: 어간 (너무 짧아지면 원본 반환)
+    """
+    for length in _SUFFIX_LENGTHS:
+        if len(word) > length and word[-length:] in _KOREAN_SUFFIXES:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str, remove_stopwords: bool = True) -> List[str]:
+    """
+    한국어/영어 혼합 텍스트를 검색용 토큰으로 분할
+
+    Args:
+        text: 원본 텍스트
+        remove_stopwords: 불용어 제거 여부
+
+    Returns:
+        List[str]: 정규화된 토큰 리스트
+    """
+    if not text:
+        return []
+
+    tokens = [_normalize_token(token) for token in _TOKEN_PATTERN.findall(text)]
+    if remove_stopwords:
+        return [token for token in tokens if token not in STOPWORDS]
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def _normalize_token(token: str) -> str:
+    """토큰 정규화 (한글은 조사 제거, 영문은 소문자화)"""
+    if '가' <= token[0] <= '힣':
+        return strip_korean_suffix(token)
+    return token.lower()
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """
+    공백을 제외한 문자 n-gram 생성 (교착어 부분 일치용)
+
+    Args:
+        text: 원본 텍스트
+        n: n-gram 길이
+
+    Returns:
+        List[str]: n-gram 리스트
+    """
+    compact = compact_text(text)
+    if len(compact) < n:
+        return [compact] if compact else []
+    return [compact[i:i + n] for i in range(len(compact) - n + 1)]
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    텍스트를 문장 단위로 분할하여 (시작, 끝) 오프셋 반환
+
+    Args:
+        text: 분할할 텍스트
+
+    Returns:
+        List[Tuple[int, int]]: 문장별 (시작 오프셋, 끝 오프셋) 리스트
+    """
+    spans = []
+    for match in _SENTENCE_PATTERN.finditer(text):
+        start, end = match.span()
+        # 앞뒤 공백을 제외한 실제 문장 범위
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append((start, end))
+    return spans
+
+
+def count_tokens(text: str) -> int:
+    """
+    LLM 토큰 수 계산 (tiktoken이 없으면 근사값)
+
+    Args:
+        text: 대상 텍스트
+
+    Returns:
+        int: 토큰 수
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # 한글은 대략 1글자당 1토큰, 영문은 4글자당 1토큰으로 근사
+    hangul = sum(1 for char in text if '가' <= char <= '힣')
+    return hangul + (len(text) - hangul) // 4 + 1
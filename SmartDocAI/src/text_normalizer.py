@@ -0,0 +1,106 @@
+"""
+텍스트 정규화 모듈
+모듈 로드 시 컴파일한 문자 클래스 정규식과 str.split/join으로 제어 문자 제거, 공백 정리,
+특수 문자 정리, 문장 분할을 문자 단위 파이썬 루프 없이 한 번씩만 훑어 수행하고,
+짧은 문자열 리스트의 제어 문자는 한 번에 이어 붙여 제거하는 배치 함수 제공
+"""
+
+import re
+from typing import Callable, List
+
+# 제거할 문자: 탭/줄바꿈을 제외한 C0 제어 문자, DEL과 C1 제어 문자, 짝 없는 서로게이트, BOM과 폭 없는 문자
+# (str.translate 변환 테이블은 한글 텍스트에서 문자마다 dict 조회를 해 문자 클래스 정규식보다 약 5배 느림)
+_CONTROL_PATTERN = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ud800-\udfff\u200b-\u200d\u2060\ufeff]+')
+
+# clean_text에서 남기는 문자 외의 연속 구간
+_DISALLOWED_PATTERN = re.compile(r'[^\w\s.,!?;:()\-]+')
+_SENTENCE_END_PATTERN = re.compile(r'[.!?]+')
+
+# 배치 처리용 구분 문자 (사용자 정의 영역 문자, 제어 문자 제거 대상이 아님)
+_SEPARATOR = '\ue000'
+
+
+def remove_control_chars(text: str) -> str:
+    """
+    제어 문자/서로게이트/폭 없는 문자 제거 (탭, 줄바꿈은 유지)
+
+    Args:
+        text: 원본 텍스트
+
+    Returns:
+        str: 정리된 텍스트
+    """
+    return _CONTROL_PATTERN.sub('', text)
+
+
+def collapse_whitespace(text: str) -> str:
+    """연속된 공백을 하나로 줄이고 앞뒤 공백 제거"""
+    return " ".join(text.split())
+
+
+def compact_text(text: str) -> str:
+    """공백을 모두 제거하고 소문자로 바꾼 비교용 문자열"""
+    return "".join(text.lower().split())
+
+
+def clean_text(text: str) -> str:
+    """
+    텍스트 정리 (허용된 문자 외 특수 문자 제거 후 공백 정리)
+
+    Args:
+        text: 원본 텍스트
+
+    Returns:
+        str: 정리된 텍스트
+    """
+    if not text:
+        return ""
+    return " ".join(_DISALLOWED_PATTERN.sub('', text).split())
+
+
+def clean_sentences(text: str) -> List[str]:
+    """
+    텍스트를 정리한 뒤 문장 부호(. ! ?) 기준으로 분할 (빈 문장 제외)
+
+    Args:
+        text: 원본 텍스트
+
+    Returns:
+        List[str]: 정리된 문장 리스트
+    """
+    if not text:
+        return []
+    return [sentence for sentence in (part.strip() for part in _SENTENCE_END_PATTERN.split(clean_text(text)))
+            if sentence]
+
+
+def _apply_batch(texts: List[str], fn: Callable[[str], str]) -> List[str]:
+    """
+    문자열들을 구분 문자로 이어 한 번에 처리한 뒤 다시 분할 (구분 문자가 입력에 있으면 하나씩 처리)
+
+    Args:
+        texts: 문자열 리스트
+        fn: 문자열 처리 함수 (구분 문자를 보존해야 함)
+
+    Returns:
+        List[str]: 처리된 문자열 리스트
+    """
+    if not texts:
+        return []
+    joined = _SEPARATOR.join(texts)
+    if joined.count(_SEPARATOR) != len(texts) - 1:
+        return [fn(text) for text in texts]
+    return fn(joined).split(_SEPARATOR)
+
+
+def remove_control_chars_batch(texts: List[str]) -> List[str]:
+    """
+    remove_control_chars의 배치 버전 (짧은 문단이 많은 HWP 구역처럼 호출 수가 많을 때 사용)
+
+    Args:
+        texts: 원본 텍스트 리스트
+
+    Returns:
+        List[str]: 정리된 텍스트 리스트 (입력과 같은 순서, 같은 길이)
+    """
+    return _apply_batch(texts, remove_control_chars)
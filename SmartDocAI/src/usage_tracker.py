@@ -0,0 +1,178 @@
+"""
+사용량 추적 모듈
+모든 LLM 호출의 토큰 수, 캐시된 프롬프트 토큰, 지연 시간을 기능/세션별로 기록하고 집계하는 기능 제공
+"""
+
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import env_int, env_str
+
+
+def extract_usage(response) -> Dict[str, int]:
+    """
+    API 응답에서 토큰 사용량 추출
+
+    Args:
+        response: ChatCompletion 응답
+
+    Returns:
+        Dict[str, int]: prompt_tokens, completion_tokens, cached_tokens
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0}
+    # 프롬프트 캐시 적중 토큰은 지원되는 모델/API 버전에서만 보고됨
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'prompt_tokens': usage.prompt_tokens or 0,
+        'completion_tokens': usage.completion_tokens or 0,
+        'cached_tokens': (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+    }
+
+
+class UsageTracker:
+    """LLM 호출 사용량 기록기 (최근 기록은 메모리에, 선택적으로 JSONL 파일에 추가)"""
+
+    def __init__(self, max_records: int = 10000, log_path: Optional[str] = None):
+        """
+        사용량 기록기 초기화
+
+        Args:
+            max_records: 메모리에 유지할 최대 기록 수
+            log_path: 호출마다 한 줄씩 추가할 JSONL 파일 경로 (없으면 파일 기록 안 함)
+        """
+        self.log_path = log_path
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, feature: str, session_id: str, model: str, usage: Dict[str, int],
+               latency: float, ttft: Optional[float] = None, queue_wait: float = 0.0,
+               retries: int = 0, error: Optional[str] = None):
+        """
+        호출 한 건 기록
+
+        Args:
+            feature: 기능 이름 (chat, summary, classify 등)
+            session_id: 세션 ID
+            model: 배포/모델 이름
+            usage: extract_usage 결과
+            latency: API 호출 지연 시간 (초, 성공한 시도 기준)
+            ttft: 첫 토큰까지 걸린 시간 (초, 스트리밍 호출에서만 측정, 아니면 None으로 기록)
+            queue_wait: 요청 제한기 대기 시간 합계 (초)
+            retries: 재시도 횟수
+            error: 실패한 경우 오류 메시지
+        """
+        entry = {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'feature': feature,
+            'session_id': session_id,
+            'model': model,
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'completion_tokens': usage.get('completion_tokens', 0),
+            'cached_tokens': usage.get('cached_tokens', 0),
+            'latency': round(latency, 4),
+            'ttft': round(ttft, 4) if ttft is not None else None,
+            'queue_wait': round(queue_wait, 4),
+            'retries': retries,
+            'error': error
+        }
+        with self._lock:
+            self._records.append(entry)
+            if self.log_path:
+                try:
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                except Exception as e:
+                    print(f"사용량 로그 기록 실패: {str(e)}")
+
+    def records(self, session_id: Optional[str] = None) -> List[Dict]:
+        """
+        기록 조회
+
+        Args:
+            session_id: 특정 세션만 조회 (None이면 전체)
+
+        Returns:
+            List[Dict]: 호출 기록 리스트
+        """
+        with self._lock:
+            records = list(self._records)
+        if session_id is not None:
+            records = [record for record in records if record['session_id'] == session_id]
+        return records
+
+    def summarize(self, group_by: str = 'feature', session_id: Optional[str] = None) -> List[Dict]:
+        """
+        기능별 또는 세션별 사용량 집계
+
+        Args:
+            group_by: 집계 기준 필드 ('feature', 'session_id', 'model')
+            session_id: 특정 세션만 집계 (None이면 전체)
+
+        Returns:
+            List[Dict]: 그룹별 호출 수, 토큰 합계, 캐시 비율, 평균/p95 지연 시간, 평균 첫 토큰 시간
+                (측정된 스트리밍 호출이 없으면 None, 총 토큰 내림차순)
+        """
+        groups: Dict[str, List[Dict]] = {}
+        for record in self.records(session_id):
+            groups.setdefault(record[group_by], []).append(record)
+
+        rows = []
+        for key, records in groups.items():
+            succeeded = [record for record in records if not record['error']]
+            latencies = sorted(record['latency'] for record in succeeded)
+            ttfts = [record['ttft'] for record in succeeded if record.get('ttft') is not None]
+            prompt_tokens = sum(record['prompt_tokens'] for record in records)
+            completion_tokens = sum(record['completion_tokens'] for record in records)
+            cached_tokens = sum(record['cached_tokens'] for record in records)
+            rows.append({
+                group_by: key,
+                'calls': len(records),
+                'errors': len(records) - len(succeeded),
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cached_tokens': cached_tokens,
+                'cached_ratio': cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+                'avg_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+                'p95_latency': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0.0,
+                'avg_ttft': sum(ttfts) / len(ttfts) if ttfts else None
+            })
+        rows.sort(key=lambda row: row['prompt_tokens'] + row['completion_tokens'], reverse=True)
+        return rows
+
+    def to_jsonl(self, session_id: Optional[str] = None) -> str:
+        """
+        기록을 JSONL 문자열로 내보내기
+
+        Args:
+            session_id: 특정 세션만 내보내기 (None이면 전체)
+
+        Returns:
+            str: 한 줄에 호출 하나씩 기록된 JSONL
+        """
+        return ''.join(json.dumps(record, ensure_ascii=False) + "\n" for record in self.records(session_id))
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """
+    프로세스 전체에서 공유하는 사용량 기록기 반환
+
+    Returns:
+        UsageTracker: 공유 기록기
+    """
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker(
+                    max_records=env_int("SMARTDOC_USAGE_MAX_RECORDS", 10000),
+                    log_path=env_str("SMARTDOC_USAGE_LOG") or None
+                )
+    return _tracker
@@ -11,6 +11,7 @@ import pickle
 from typing import List, Dict, Any
 from datetime import datetime
 import streamlit as st
+import text_normalizer
 
 def validate_environment() -> Dict[str, bool]:
     """
@@ -154,19 +155,8 @@ def clean_text(text: str) -> str:
     Returns:
         str: 정리된 텍스트
     """
-    if not text:
-        return ""
-    
-    # 연속된 공백을 하나로 변경
-    text = re.sub(r'\s+', ' ', text)
-    
-    # 앞뒤 공백 제거
-    text = text.strip()
-    
-    # 특수 문자 정리
-    text = re.sub(r'[^\w\s.,!?;:()\-]', '', text)
-    
-    return text
+    # 특수 문자 제거와 공백 정리를 정규식 한 번 + split/join으로 처리
+    return text_normalizer.clean_text(text)
 
 def split_text_by_sentences(text: str) -> List[str]:
     """
@@ -178,16 +168,8 @@ def split_text_by_sentences(text: str) -> List[str]:
     Returns:
         List[str]: 문장 리스트
     """
-    if not text:
-        return []
-    
-    # 문장 구분자로 분할
-    sentences = re.split(r'[.!?]+', text)
-    
-    # 빈 문장 제거 및 정리
-    sentences = [clean_text(sentence) for sentence in sentences if clean_text(sentence)]
-    
-    return sentences
+    # 전체를 한 번 정리한 뒤 분할 (문장마다 clean_text를 두 번 호출하지 않음)
+    return text_normalizer.clean_sentences(text)
 
 def calculate_text_similarity(text1: str, text2: str) -> float:
     """
@@ -374,6 +356,8 @@ def save_documents_to_file(documents: List[Dict], filepath: str = "documents.jso
         documents_to_save = []
         for doc in documents:
             doc_copy = doc.copy()
+            # 세그먼트 테이블은 전체 본문 기준 오프셋이므로 JSON 요약본에는 저장하지 않음
+            doc_copy.pop('segments', None)
             if doc_copy.get('content') and len(doc_copy['content']) > 10000:
                 doc_copy['content'] = doc_copy['content'][:10000] + "... (내용이 잘림)"
             documents_to_save.append(doc_copy)
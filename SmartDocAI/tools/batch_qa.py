@@ -0,0 +1,216 @@
+"""
+일괄 질문-답변 스크립트
+CSV/JSONL 파일의 질문들을 업로드된 문서 기준으로 동시에 답변하고 결과를 JSONL로 기록
+
+사용법:
+    python tools/batch_qa.py questions.csv -o answers.jsonl --concurrency 8
+
+입력 형식:
+    - CSV: 'question' 열 필수, 'id' 열 선택 (--question-column, --id-column으로 변경 가능)
+    - JSONL: {"id": "Q1", "question": "..."} (id 생략 가능)
+
+중단 후 같은 명령을 다시 실행하면 출력 파일에 이미 성공한 질문은 건너뜀
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dotenv import load_dotenv
+from ai_assistant import AIAssistant
+from search_engine import SearchEngine
+from rate_limiter import get_rate_limiter
+from usage_tracker import get_usage_tracker
+from utils import load_documents_content_from_file
+
+DEFAULT_DOCUMENTS_FILE = os.path.join(os.path.dirname(__file__), '..', 'src', 'documents', 'documents_content.pkl')
+
+
+def question_id(question: str) -> str:
+    """id가 없는 질문의 안정적인 식별자"""
+    return hashlib.md5(question.strip().encode('utf-8')).hexdigest()[:12]
+
+
+def load_questions(filepath: str, question_column: str, id_column: str) -> list:
+    """
+    CSV 또는 JSONL 파일에서 질문 로드
+
+    Returns:
+        list: {'id', 'question'} 딕셔너리 리스트
+    """
+    questions = []
+    if filepath.lower().endswith('.csv'):
+        with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                question = (row.get(question_column) or '').strip()
+                if question:
+                    questions.append({'id': row.get(id_column) or question_id(question), 'question': question})
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                question = (item.get(question_column) or '').strip()
+                if question:
+                    questions.append({'id': str(item.get(id_column) or question_id(question)), 'question': question})
+    return questions
+
+
+def load_completed_ids(output_path: str) -> set:
+    """출력 파일에서 이미 성공한 질문 id 로드 (재시작용)"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시 마지막 줄이 잘렸을 수 있음
+                continue
+            if not record.get('error'):
+                completed.add(str(record.get('id')))
+    return completed
+
+
+def percentile(values: list, ratio: float) -> float:
+    """정렬된 값 리스트의 백분위수"""
+    if not values:
+        return 0.0
+    index = min(int(len(values) * ratio), len(values) - 1)
+    return sorted(values)[index]
+
+
+async def run_batch(assistant: AIAssistant, search_engine, documents: list, questions: list,
+                    output_path: str, concurrency: int, allow_direct: bool) -> list:
+    """
+    제한된 동시성으로 질문을 처리하고 완료되는 대로 결과를 기록
+
+    Returns:
+        list: 결과 레코드 리스트
+    """
+    queue = asyncio.Queue()
+    for item in questions:
+        queue.put_nowait(item)
+
+    records = []
+    total = len(questions)
+
+    with open(output_path, 'a', encoding='utf-8') as output:
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                started = time.perf_counter()
+                record = {'id': item['id'], 'question': item['question']}
+                try:
+                    result = await assistant.aask_question_detailed(
+                        item['question'], documents, search_engine, allow_direct_answer=allow_direct
+                    )
+                    record.update(result)
+                except Exception as e:
+                    record.update({'error': str(e), 'latency': time.perf_counter() - started})
+
+                # 완료 즉시 한 줄씩 기록하여 중단되어도 결과 보존
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                records.append(record)
+
+                status = "❌" if record.get('error') else "✅"
+                print(f"{status} [{len(records)}/{total}] {item['id']} ({record['latency']:.1f}초)")
+
+        await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+
+    return records
+
+
+def print_report(records: list, elapsed: float, skipped: int):
+    """처리량 보고서 출력"""
+    succeeded = [record for record in records if not record.get('error')]
+    latencies = [record['latency'] for record in succeeded]
+    prompt_tokens = sum(record.get('prompt_tokens', 0) for record in succeeded)
+    completion_tokens = sum(record.get('completion_tokens', 0) for record in succeeded)
+    direct_count = sum(1 for record in succeeded if record.get('direct'))
+
+    print("\n📊 처리 결과")
+    print(f"- 처리: {len(records)}개 (성공 {len(succeeded)}, 실패 {len(records) - len(succeeded)}, 이전 완료 건너뜀 {skipped})")
+    if direct_count:
+        print(f"- LLM 없이 직접 답변: {direct_count}개")
+    print(f"- 소요 시간: {elapsed:.1f}초")
+    if elapsed > 0:
+        print(f"- 처리량: {len(records) / elapsed * 60:.1f}개/분, {(prompt_tokens + completion_tokens) / elapsed:.0f} 토큰/초")
+    print(f"- 지연 시간: 평균 {sum(latencies) / max(len(latencies), 1):.2f}초, "
+          f"p50 {percentile(latencies, 0.5):.2f}초, p95 {percentile(latencies, 0.95):.2f}초")
+    print(f"- 토큰: 프롬프트 {prompt_tokens:,} / 완성 {completion_tokens:,}")
+
+    limiter_stats = get_rate_limiter().get_stats()
+    print(f"- 요청 제한기 대기: 평균 {limiter_stats['avg_wait_seconds']:.2f}초, 최대 {limiter_stats['max_wait_seconds']:.2f}초")
+
+    for row in get_usage_tracker().summarize('feature'):
+        print(f"- [{row['feature']}] 호출 {row['calls']}건, 프롬프트 {row['prompt_tokens']:,} / 완성 {row['completion_tokens']:,} 토큰, "
+              f"캐시 {row['cached_ratio']:.0%}, 평균 {row['avg_latency']:.2f}초")
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="문서 기반 일괄 질문-답변")
+    parser.add_argument('input', help="질문 파일 (.csv 또는 .jsonl)")
+    parser.add_argument('-o', '--output', default='answers.jsonl', help="결과 JSONL 파일")
+    parser.add_argument('--concurrency', type=int, default=8, help="동시에 처리할 질문 수")
+    parser.add_argument('--documents', default=DEFAULT_DOCUMENTS_FILE, help="문서 저장 파일 (documents_content.pkl)")
+    parser.add_argument('--question-column', default='question', help="질문 열 이름")
+    parser.add_argument('--id-column', default='id', help="id 열 이름")
+    parser.add_argument('--no-search', action='store_true', help="Azure AI Search 없이 키워드 매칭만 사용")
+    parser.add_argument('--allow-direct', action='store_true', help="사실형 질문에 LLM 없이 직접 답변 허용")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    documents = load_documents_content_from_file(args.documents)
+    if not documents:
+        print(f"❌ 문서를 찾을 수 없습니다: {args.documents}")
+        sys.exit(1)
+
+    questions = load_questions(args.input, args.question_column, args.id_column)
+    completed = load_completed_ids(args.output)
+    pending = [item for item in questions if str(item['id']) not in completed]
+    print(f"📄 문서 {len(documents)}개, 질문 {len(questions)}개 (남은 질문 {len(pending)}개)")
+
+    search_engine = None
+    if not args.no_search:
+        try:
+            search_engine = SearchEngine()
+        except Exception as e:
+            print(f"⚠️ 검색 엔진 초기화 실패, 키워드 매칭만 사용합니다: {str(e)}")
+
+    assistant = AIAssistant()
+    assistant.session_id = "batch"
+    assistant.build_document_index(documents)
+
+    started = time.perf_counter()
+    try:
+        records = asyncio.run(run_batch(
+            assistant, search_engine, documents, pending,
+            args.output, args.concurrency, args.allow_direct
+        ))
+    except KeyboardInterrupt:
+        print("\n⏸️ 중단되었습니다. 같은 명령으로 다시 실행하면 이어서 처리합니다.")
+        sys.exit(130)
+
+    print_report(records, time.perf_counter() - started, len(questions) - len(pending))
+
+
+if __name__ == "__main__":
+    main()
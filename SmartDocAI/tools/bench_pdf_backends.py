@@ -0,0 +1,66 @@
+"""
+PDF 백엔드 벤치마크
+설치된 PDF 텍스트 백엔드(PyPDF2, pypdf, pdfminer.six, pypdfium2)의 처리량과 추출 품질을 비교하고,
+--save로 선택 결과를 저장하면 SMARTDOC_PDF_BACKEND=auto일 때 앱이 이 결과를 사용
+
+사용법:
+    python tools/bench_pdf_backends.py ./sample_pdfs
+    python tools/bench_pdf_backends.py ./sample_pdfs --backends pypdf2 pypdfium2
+    python tools/bench_pdf_backends.py ./sample_pdfs --save   # src/에서 앱을 실행하는 경우 src/에서 실행
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pdf_extraction import BENCHMARK_FILE, PDF_BACKENDS, available_backends, benchmark_backends, choose_backend
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="PDF 백엔드 벤치마크")
+    parser.add_argument('corpus', help="PDF 파일이 들어 있는 폴더")
+    parser.add_argument('--backends', nargs='+', choices=sorted(PDF_BACKENDS), help="측정할 백엔드 (기본값: 설치된 전체)")
+    parser.add_argument('--min-yield', type=float, default=0.9, help="최고 추출 글자 수 대비 최소 비율")
+    parser.add_argument('--save', action='store_true', help=f"선택 결과를 {BENCHMARK_FILE}에 저장")
+    args = parser.parse_args()
+
+    filepaths = sorted(glob.glob(os.path.join(args.corpus, '**', '*.pdf'), recursive=True))
+    if not filepaths:
+        print(f"❌ PDF 파일이 없습니다: {args.corpus}")
+        sys.exit(1)
+
+    installed = available_backends()
+    backends = [name for name in (args.backends or installed) if name in installed]
+    missing = sorted(set(args.backends or []) - set(installed))
+    if missing:
+        print(f"⚠️ 설치되지 않은 백엔드 제외: {', '.join(missing)}")
+    if not backends:
+        print("❌ 측정할 백엔드가 없습니다.")
+        sys.exit(1)
+
+    print(f"📄 PDF {len(filepaths)}개, 백엔드 {', '.join(backends)}")
+    results = benchmark_backends(filepaths, backends)
+    selected = choose_backend(results, args.min_yield)
+
+    print(f"\n{'백엔드':<12}{'페이지/초':>10}{'글자/페이지':>12}{'성공률':>8}{'시간(초)':>10}")
+    for result in sorted(results, key=lambda result: result['pages_per_second'], reverse=True):
+        marker = ' ✅' if result['backend'] == selected else ''
+        print(f"{result['backend']:<12}{result['pages_per_second']:>10.1f}{result['chars_per_page']:>12.0f}"
+              f"{result['success_rate']:>8.0%}{result['seconds']:>10.2f}{marker}")
+    print(f"\n선택: {selected or '없음'}")
+
+    if args.save and selected:
+        os.makedirs(os.path.dirname(BENCHMARK_FILE), exist_ok=True)
+        with open(BENCHMARK_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'selected': selected, 'min_yield_ratio': args.min_yield, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"💾 저장: {BENCHMARK_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+표 직렬화 형식 비교
+Excel 통합 문서를 legacy('col: value | ...')와 markdown(헤더 한 번) 형식으로 추출해
+본문 토큰 수, 청크 수, 청크 헤더를 포함한 인덱싱 토큰 수를 비교
+
+사용법:
+    python tools/bench_table_format.py 프로젝트_카테고리별_정리.xlsx 예산.xlsx
+    python tools/bench_table_format.py --synthetic-rows 5000 --synthetic-columns 12
+"""
+
+import argparse
+import datetime
+import io
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from excel_extraction import write_workbook
+from segments import SegmentBuilder, segment_chunk_spans
+from table_format import TABLE_FORMATS
+from text_analysis import count_tokens
+
+
+def synthetic_workbook(rows: int, columns: int, seed: int = 0) -> bytes:
+    """컬럼 이름이 긴 합성 통합 문서 생성"""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('프로젝트 목록')
+    names = ['프로젝트 번호', '프로젝트 이름', '카테고리', '담당 부서', '예산(원)', '진행률',
+             '시작일', '상태', '비고', '고객사', '우선순위', '검토 의견']
+    sheet.append([names[i % len(names)] + ('' if i < len(names) else f' {i // len(names)}') for i in range(columns)])
+    for row in range(rows):
+        values = [row + 1, f'프로젝트 {row + 1}', rng.choice(['AI', '웹', '모바일', '데이터']),
+                  rng.choice(['개발팀', '기획팀', '연구소']), rng.randint(1, 500) * 100000, round(rng.random(), 2),
+                  datetime.date(2024, 1, 1) + datetime.timedelta(days=row % 365), rng.choice(['진행', '완료', '보류']),
+                  None if row % 3 else '확인 필요', f'고객사 {row % 40}', rng.randint(1, 5), '특이사항 없음']
+        sheet.append([values[i % len(values)] for i in range(columns)])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(file_bytes: bytes, table_format: str, chunk_tokens: int, overlap: int = 200) -> dict:
+    """형식별 본문/청크 토큰 수 측정 (SearchEngine._chunk_segments와 같은 방식으로 청크 구성)"""
+    builder = SegmentBuilder()
+    write_workbook(builder, file_bytes, table_format)
+    text, segments = builder.build()
+
+    token_counts = [count_tokens(segments.text_of(text, index)) for index in range(len(segments))]
+    header_tokens = max((count_tokens(segments.header_text(text, index)) for index in range(len(segments))
+                         if segments.header_starts[index] >= 0), default=0)
+    spans = segment_chunk_spans(segments, token_counts.__getitem__, max(chunk_tokens - header_tokens, chunk_tokens // 2))
+
+    chunks = 0
+    indexed_tokens = 0
+    for start, end, oversized in spans:
+        tokens = count_tokens(segments.header_for(text, start) + text[start:end])
+        if oversized:
+            # 예산보다 큰 세그먼트는 토큰 단위로 겹치게 분할됨 (_chunk_document)
+            parts = max(math.ceil((tokens - overlap) / (chunk_tokens - overlap)), 1)
+            header = count_tokens(segments.header_text(text, segments.locate(start)))
+            chunks += parts
+            indexed_tokens += tokens + (parts - 1) * (overlap + header)
+        else:
+            chunks += 1
+            indexed_tokens += tokens
+    return {'chars': len(text), 'tokens': count_tokens(text), 'chunks': chunks, 'indexed_tokens': indexed_tokens}
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="표 직렬화 형식 비교")
+    parser.add_argument('files', nargs='*', help="xlsx 파일 경로")
+    parser.add_argument('--synthetic-rows', type=int, default=2000, help="파일이 없을 때 합성 통합 문서 행 수")
+    parser.add_argument('--synthetic-columns', type=int, default=12, help="합성 통합 문서 컬럼 수")
+    parser.add_argument('--chunk-tokens', type=int, default=1000, help="청크 크기 (토큰 수)")
+    args = parser.parse_args()
+
+    if args.files:
+        workbooks = [(os.path.basename(path), open(path, 'rb').read()) for path in args.files]
+    else:
+        workbooks = [(f"합성 {args.synthetic_rows}행 x {args.synthetic_columns}열",
+                      synthetic_workbook(args.synthetic_rows, args.synthetic_columns))]
+
+    for name, file_bytes in workbooks:
+        results = {table_format: measure(file_bytes, table_format, args.chunk_tokens) for table_format in TABLE_FORMATS}
+        legacy = results['legacy']
+        print(f"\n📊 {name}")
+        print(f"{'형식':<10}{'문자 수':>12}{'본문 토큰':>12}{'청크 수':>9}{'인덱싱 토큰':>13}{'절감':>8}")
+        for table_format, result in results.items():
+            saving = 1 - result['indexed_tokens'] / legacy['indexed_tokens'] if legacy['indexed_tokens'] else 0.0
+            print(f"{table_format:<10}{result['chars']:>12,}{result['tokens']:>12,}{result['chunks']:>9,}"
+                  f"{result['indexed_tokens']:>13,}{saving:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+텍스트 정규화 마이크로 벤치마크
+text_normalizer 함수와 이전 구현(문자 단위 필터, 여러 번의 정규식, 문장마다 clean_text 두 번 호출)의
+MB당 처리 시간을 같은 합성 텍스트로 비교
+
+사용법:
+    python tools/bench_text_normalizer.py
+    python tools/bench_text_normalizer.py --size-mb 8 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_normalizer import clean_sentences, clean_text, remove_control_chars, remove_control_chars_batch
+
+
+def legacy_clean_text(text: str) -> str:
+    """이전 utils.clean_text (공백 정리 → strip → 특수 문자 제거)"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+    return re.sub(r'[^\w\s.,!?;:()\-]', '', text)
+
+
+def legacy_split_text_by_sentences(text: str) -> list:
+    """이전 utils.split_text_by_sentences (문장마다 clean_text 두 번 호출)"""
+    if not text:
+        return []
+    sentences = re.split(r'[.!?]+', text)
+    return [legacy_clean_text(sentence) for sentence in sentences if legacy_clean_text(sentence)]
+
+
+def legacy_sanitize_stream_text(text: str) -> str:
+    """이전 HWP 스트림 텍스트 정리 (문자 단위 isprintable 필터 + 한글 포함 여부 검사)"""
+    cleaned = ''.join(char for char in text if char.isprintable() or char.isspace())
+    if any('가' <= char <= '힯' for char in cleaned):
+        return cleaned
+    return ""
+
+
+def synthetic_text(size_mb: float, seed: int = 0) -> str:
+    """한글/영문/숫자/특수 문자/제어 문자가 섞인 합성 텍스트"""
+    rng = random.Random(seed)
+    words = ['문서', '분석', '결과', '프로젝트', '예산', '보고서', 'SmartDoc', 'AI', '2024년', '※', '★',
+             '(참고)', '“인용”', '데이터', 'report', '- 항목', '①', '​', '\x07', '\t', '  ']
+    ends = ['. ', '! ', '? ', '.\n', '\n\n', ' ']
+    parts = []
+    length = 0
+    target = int(size_mb * 1024 * 1024 / 3)  # UTF-8 기준 대략 size_mb (한글 3바이트)
+    while length < target:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(4, 14))) + rng.choice(ends)
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def best_time(fn, repeat: int) -> float:
+    """repeat번 실행 중 가장 짧은 시간 (초)"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    """명령행 실행"""
+    parser = argparse.ArgumentParser(description="텍스트 정규화 마이크로 벤치마크")
+    parser.add_argument('--size-mb', type=float, default=4, help="합성 텍스트 크기 (MB)")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (가장 빠른 값 사용)")
+    args = parser.parse_args()
+
+    text = synthetic_text(args.size_mb)
+    megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+    lines = text.split('\n')
+
+    cases = [
+        ("clean_text (문서 전체)", lambda: legacy_clean_text(text), lambda: clean_text(text)),
+        ("split_text_by_sentences", lambda: legacy_split_text_by_sentences(text), lambda: clean_sentences(text)),
+        (f"제어 문자 제거 배치 ({len(lines)}줄, HWP 문단)", lambda: [legacy_sanitize_stream_text(line) for line in lines],
+         lambda: remove_control_chars_batch(lines)),
+        ("스트림 텍스트 제어 문자 제거", lambda: legacy_sanitize_stream_text(text), lambda: remove_control_chars(text)),
+    ]
+
+    print(f"합성 텍스트 {megabytes:.1f}MB, {len(lines)}줄\n")
+    print(f"{'작업':<32} {'이전 ms/MB':>12} {'현재 ms/MB':>12} {'속도 향상':>10}")
+    for name, legacy, current in cases:
+        legacy_ms = best_time(legacy, args.repeat) * 1000 / megabytes
+        current_ms = best_time(current, args.repeat) * 1000 / megabytes
+        print(f"{name:<32} {legacy_ms:>12.1f} {current_ms:>12.1f} {legacy_ms / current_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
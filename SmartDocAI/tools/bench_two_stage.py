@@ -0,0 +1,146 @@
+"""
+두 단계 검색 벤치마크
+전체 청크 검색(flat)과 문서 선택 → 청크 검색(two-stage)의 지연 시간과 recall@N 비교
+
+사용법:
+    # 합성 코퍼스 (문서 2000개)
+    python tools/bench_two_stage.py --synthetic-docs 2000
+
+    # 저장된 문서 + 평가 질문
+    python tools/bench_two_stage.py --documents src/documents/documents_content.pkl --questions questions.jsonl
+
+    # Azure AI Search에서 flat 검색과 source 필터 검색 비교
+    python tools/bench_two_stage.py --documents ... --questions ... --azure
+
+questions.jsonl 형식 (한 줄에 하나):
+    {"question": "제출 마감일은?", "relevant": ["공고문.pdf"]}
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dotenv import load_dotenv
+from document_index import DocumentSummaryIndex, TwoStageRetriever
+from reranker import LexicalReranker, recall_at_n
+from utils import load_documents_content_from_file
+
+# 합성 코퍼스용 주제 어휘
+_TOPIC_WORDS = [
+    '예산', '계약', '서버', '배포', '교육', '강의', '법률', '조항', '연구', '실험', '매출', '고객',
+    '보안', '인증', '네트워크', '데이터', '모델', '학습', '정책', '규정', '일정', '회의', '인사', '채용',
+    '물류', '재고', '품질', '검사', '설계', '도면', '환경', '에너지', '의료', '진료', '금융', '투자'
+]
+_FILLER_WORDS = ['관련', '내용', '진행', '검토', '결과', '계획', '현황', '기준', '방안', '추진', '확인', '운영']
+
+
+def synthetic_corpus(num_docs: int, chunks_per_doc: int, seed: int = 0):
+    """
+    문서마다 고유 식별어와 주제 어휘를 가진 합성 코퍼스 및 질문 생성
+
+    Returns:
+        tuple: (문서 리스트, 질문 리스트)
+    """
+    rng = random.Random(seed)
+    documents = []
+    questions = []
+    for doc_idx in range(num_docs):
+        topic = rng.sample(_TOPIC_WORDS, 3)
+        marker = f"프로젝트{doc_idx:05d}"
+        sentences = []
+        for _ in range(chunks_per_doc * 12):
+            words = rng.sample(_FILLER_WORDS, 4) + [rng.choice(topic), rng.choice(topic)]
+            if rng.random() < 0.2:
+                words.append(marker)
+            rng.shuffle(words)
+            sentences.append(' '.join(words) + '.')
+        name = f"문서{doc_idx:05d}.txt"
+        documents.append({'name': name, 'content': ' '.join(sentences)})
+        if doc_idx % max(num_docs // 50, 1) == 0:
+            questions.append({'question': f"{marker}의 {topic[0]} {topic[1]} 현황", 'relevant': [name]})
+    return documents, questions
+
+
+def load_questions(filepath: str) -> list:
+    """평가 질문 로드"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def measure(search_fn, questions: list, top_n: int) -> dict:
+    """질문별 검색 지연 시간과 recall@N 측정"""
+    latencies = []
+    recalls = []
+    for item in questions:
+        started = time.perf_counter()
+        results = search_fn(item['question'])
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(recall_at_n(results, item['relevant'], top_n))
+    latencies.sort()
+    count = max(len(questions), 1)
+    return {
+        'avg_ms': sum(latencies) / count,
+        'p95_ms': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0.0,
+        'recall': sum(recalls) / count
+    }
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="두 단계 검색 벤치마크")
+    parser.add_argument('--documents', help="문서 저장 파일 (documents_content.pkl)")
+    parser.add_argument('--questions', help="평가 질문 JSONL 파일")
+    parser.add_argument('--synthetic-docs', type=int, default=2000, help="합성 코퍼스 문서 수")
+    parser.add_argument('--chunks-per-doc', type=int, default=10, help="합성 문서당 청크 수 (근사)")
+    parser.add_argument('--top-documents', type=int, default=5, help="1단계에서 선택할 문서 수")
+    parser.add_argument('--top-n', type=int, default=3, help="평가할 상위 결과 수")
+    parser.add_argument('--budget-ms', type=float, default=1500, help="두 단계 지연 시간 예산")
+    parser.add_argument('--azure', action='store_true', help="Azure AI Search로 flat/필터 검색 비교")
+    args = parser.parse_args()
+
+    if args.documents:
+        documents = load_documents_content_from_file(args.documents)
+        if not args.questions:
+            print("❌ 저장된 문서를 사용할 때는 --questions가 필요합니다.")
+            sys.exit(1)
+        questions = load_questions(args.questions)
+    else:
+        documents, questions = synthetic_corpus(args.synthetic_docs, args.chunks_per_doc)
+
+    index = DocumentSummaryIndex()
+    started = time.perf_counter()
+    index.build(documents)
+    print(f"📄 문서 {len(index)}개, 청크 {index.num_chunks}개, 질문 {len(questions)}개 "
+          f"(인덱스 생성 {time.perf_counter() - started:.1f}초)")
+
+    search_engine = None
+    if args.azure:
+        load_dotenv()
+        from search_engine import SearchEngine
+        search_engine = SearchEngine()
+
+    retriever = TwoStageRetriever(index, search_engine, top_documents=args.top_documents, budget_ms=args.budget_ms)
+    if search_engine:
+        flat_fn = lambda query: search_engine.hybrid_search(query, top_k=args.top_n)
+    else:
+        # 전체 청크를 후보로 하는 로컬 검색
+        all_docs = list(range(len(index)))
+        reranker = LexicalReranker()
+        flat_fn = lambda query: index.search_chunks(query, all_docs, args.top_n, reranker)
+
+    flat = measure(flat_fn, questions, args.top_n)
+    two_stage = measure(lambda query: retriever.retrieve(query, args.top_n), questions, args.top_n)
+
+    print(f"\n📊 상위 {args.top_n}개 기준 ({'Azure AI Search' if search_engine else '로컬'})")
+    print(f"- 전체 청크 검색: 평균 {flat['avg_ms']:.1f}ms, p95 {flat['p95_ms']:.1f}ms, recall {flat['recall']:.3f}")
+    print(f"- 두 단계 검색:   평균 {two_stage['avg_ms']:.1f}ms, p95 {two_stage['p95_ms']:.1f}ms, "
+          f"recall {two_stage['recall']:.3f} (문서 {args.top_documents}개 선택)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+재순위 평가 스크립트
+1단계 검색(top N)과 2단계 검색(후보 확대 + 로컬 재순위)의 recall@N을 비교
+
+사용법:
+    python tools/eval_reranker.py questions.jsonl --candidates 30 --top-n 3
+
+questions.jsonl 형식 (한 줄에 하나):
+    {"question": "제출 마감일은?", "relevant": ["공고문.pdf"]}
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from dotenv import load_dotenv
+from search_engine import SearchEngine
+from reranker import evaluate_reranking
+
+
+def load_questions(filepath: str) -> list:
+    """평가 질문 로드"""
+    questions = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                questions.append(json.loads(line))
+    return questions
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="로컬 재순위 recall@N 평가")
+    parser.add_argument('questions', help="평가 질문 JSONL 파일")
+    parser.add_argument('--candidates', type=int, default=30, help="2단계 검색 후보 수")
+    parser.add_argument('--top-n', type=int, default=3, help="평가할 상위 결과 수")
+    args = parser.parse_args()
+
+    load_dotenv()
+    search_engine = SearchEngine()
+    questions = load_questions(args.questions)
+
+    report = evaluate_reranking(
+        lambda query, top_k: search_engine.hybrid_search(query, top_k=top_k),
+        questions,
+        candidates=args.candidates,
+        top_n=args.top_n
+    )
+
+    print(f"📊 질문 {report['questions']}개, 후보 {report['candidates']}개 → 상위 {report['top_n']}개")
+    print(f"- 1단계 recall@{report['top_n']}: {report['baseline_recall']:.3f}")
+    print(f"- 2단계 recall@{report['top_n']}: {report['reranked_recall']:.3f}")
+    print(f"- 평균 재순위 시간: {report['avg_rerank_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()